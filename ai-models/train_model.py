@@ -4,10 +4,10 @@ Trains machine learning models to predict water pollution events and identify ho
 """
 
 import os
+import sys
 import pandas as pd
-import numpy as np
 import joblib
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Tuple, Any
 import logging
 from pathlib import Path
@@ -21,10 +21,17 @@ from tensorflow import keras
 from tensorflow.keras import layers
 
 # Data processing
-import sqlite3
 import warnings
 warnings.filterwarnings('ignore')
 
+# Helpers shared with the data pipeline (db_pool, sqlite_store, readings_batch, synthetic_data)
+_PIPELINE_DIR = str(Path(__file__).resolve().parent.parent / 'data-pipeline')
+if _PIPELINE_DIR not in sys.path:
+    sys.path.insert(0, _PIPELINE_DIR)
+import sqlite_store
+from readings_batch import ReadingsBatch
+from synthetic_data import generate_readings
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -49,8 +56,9 @@ class WaterQualityPredictor:
         db_url = os.getenv('DATABASE_URL')
         if db_url:
             try:
-                import psycopg2
-                conn = psycopg2.connect(db_url, sslmode='require')
+                # Share the data pipeline's pooled, TLS-enabled connections
+                from db_pool import connection
+
                 query = """
                 SELECT 
                     l.name as location_name,
@@ -69,44 +77,28 @@ class WaterQualityPredictor:
                 WHERE r.value IS NOT NULL
                 ORDER BY r.measurement_date DESC
                 """
-                # Use raw fetch to avoid Pandas sqlalchemy warning
-                cursor = conn.cursor()
-                cursor.execute(query)
-                columns = [desc[0] for desc in cursor.description]
-                data = cursor.fetchall()
-                df = pd.DataFrame(data, columns=columns)
-                cursor.close()
-                conn.close()
+                # Stream rows straight into a columnar batch instead of a list of tuples
+                with connection() as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute(query)
+                        batch = ReadingsBatch.from_rows(cursor)
+                df = batch.to_frame()
                 logger.info(f"Loaded {len(df)} records from PostgreSQL database")
                 return df
             except Exception as e:
-                if 'conn' in locals() and conn:
-                    conn.close()
                 logger.error(f"Error loading from PostgreSQL: {str(e)}")
                 # fallback to SQLite
                 
         try:
-            conn = sqlite3.connect(self.data_path)
-            
-            query = """
-            SELECT 
-                location_name,
-                state,
-                district,
-                latitude,
-                longitude,
-                parameter,
-                value,
-                unit,
-                measurement_date,
-                source
-            FROM water_quality_readings
-            WHERE value IS NOT NULL
-            ORDER BY measurement_date DESC
-            """
-            
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            conn = sqlite_store.connect(self.data_path, readonly=True)
+            # Flat and normalized files yield the same columns
+            layout = sqlite_store.reading_layout(conn) or sqlite_store.FLAT
+            query = sqlite_store.READINGS_QUERY[layout]
+
+            try:
+                df = ReadingsBatch.from_rows(conn.execute(query)).to_frame()
+            finally:
+                conn.close()
             
             logger.info(f"Loaded {len(df)} records from SQLite database")
             return df
@@ -116,62 +108,12 @@ class WaterQualityPredictor:
             # Return sample data for development
             return self._generate_sample_data()
     
-    def _generate_sample_data(self) -> pd.DataFrame:
+    def _generate_sample_data(self, n_rows: int = 5000) -> pd.DataFrame:
         """Generate sample data for development/testing"""
-        logger.info("Generating sample water quality data for model training")
-        
-        np.random.seed(42)
+        logger.info(f"Generating {n_rows} sample water quality readings for model training")
         
-        # Indian states and major rivers/cities
-        locations = [
-            ("Ganga", "Uttar Pradesh", "Varanasi", 25.3176, 82.9739),
-            ("Yamuna", "Delhi", "Delhi", 28.6139, 77.2090),
-            ("Godavari", "Maharashtra", "Nashik", 19.9975, 73.7898),
-            ("Krishna", "Karnataka", "Vijayawada", 16.5062, 80.6480),
-            ("Narmada", "Madhya Pradesh", "Jabalpur", 23.1815, 79.9864),
-            ("Brahmaputra", "Assam", "Guwahati", 26.1445, 91.7362)
-        ]
-        
-        parameters = ["BOD", "TDS", "pH", "DO", "Lead", "Mercury", "Coliform", "Nitrates"]
-        
-        data = []
-        start_date = datetime(2020, 1, 1)
-        
-        for i in range(5000):  # Generate 5000 sample records
-            location = np.random.choice(locations)
-            parameter = np.random.choice(parameters)
-            
-            # Generate realistic water quality values
-            base_values = {
-                "BOD": np.random.normal(4.5, 2.0),
-                "TDS": np.random.normal(400, 150),
-                "pH": np.random.normal(7.5, 1.0),
-                "DO": np.random.normal(5.5, 1.5),
-                "Lead": np.random.lognormal(-4, 1),
-                "Mercury": np.random.lognormal(-6, 0.5),
-                "Coliform": np.random.lognormal(2, 1),
-                "Nitrates": np.random.normal(25, 10)
-            }
-            
-            # Add seasonal variation
-            date = start_date + timedelta(days=np.random.randint(0, 1460))
-            seasonal_factor = 1 + 0.3 * np.sin(2 * np.pi * date.timetuple().tm_yday / 365)
-            
-            value = max(0, base_values[parameter] * seasonal_factor)
-            
-            data.append({
-                'location_name': location[0],
-                'state': location[1],
-                'district': location[2],
-                'latitude': location[3],
-                'longitude': location[4],
-                'parameter': parameter,
-                'value': value,
-                'measurement_date': date.strftime('%Y-%m-%d'),
-                'source': 'sample_data'
-            })
-        
-        return pd.DataFrame(data)
+        # Four years of seasonal readings across the configured rivers
+        return generate_readings(n_rows, seed=42, start='2020-01-01', days=1460)
     
     def preprocess_data(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Preprocess data for machine learning"""
@@ -191,7 +133,8 @@ class WaterQualityPredictor:
                    'measurement_date', 'year', 'month', 'day_of_year'],
             columns='parameter',
             values='value',
-            aggfunc='mean'
+            aggfunc='mean',
+            observed=True
         ).reset_index()
 
         # Sort chronologically for valid time-series splitting
@@ -0,0 +1,232 @@
+"""
+In-process alert evaluation for newly inserted readings
+Applies the backend alert generator's rules (backend/src/utils/alertGenerator.js) to just the
+readings a batch inserted, so alerting cost follows the new data rather than the table size
+"""
+
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from config import WATER_QUALITY_PARAMETERS
+
+logger = logging.getLogger(__name__)
+
+# Where alerts are generated after a run: "python" evaluates inserted readings in the pipeline,
+# "backend" runs `npm run alerts:generate` as before and "off" disables alerting.
+ALERT_MODES = ("python", "backend", "off")
+
+# (location_id, parameter_id, value, measurement_date), as returned by the readings insert
+Reading = Tuple[int, int, Any, Any]
+
+
+def alert_mode() -> str:
+    mode = os.getenv("DATA_PIPELINE_ALERTS", "python").strip().lower()
+    return mode if mode in ALERT_MODES else "python"
+
+
+def risk_level(parameter: str, value: float) -> Optional[str]:
+    """
+    Risk level of a reading, matching the calculate_risk_level() trigger in schema.sql.
+
+    pH is scored by its distance from the safe band; parameters whose limits fall as the risk
+    rises (dissolved oxygen) are scored from above. Unknown parameters have no level.
+    """
+    limits = WATER_QUALITY_PARAMETERS.get(parameter)
+    if limits is None:
+        return None
+    if "safe_min" in limits:
+        low, high, margin = limits["safe_min"], limits["safe_max"], limits["moderate_range"]
+        if low <= value <= high:
+            return "low"
+        if low - margin <= value <= high + margin:
+            return "medium"
+        return "high"
+    if limits["critical_limit"] < limits["safe_limit"]:
+        if value >= limits["safe_limit"]:
+            return "low"
+        if value >= limits["moderate_limit"]:
+            return "medium"
+        if value >= limits["high_limit"]:
+            return "high"
+        return "critical"
+    if value <= limits["safe_limit"]:
+        return "low"
+    if value <= limits["moderate_limit"]:
+        return "medium"
+    if value <= limits["high_limit"]:
+        return "high"
+    return "critical"
+
+
+def threshold_for(parameter: str, level: str, value: float) -> Optional[float]:
+    """The limit a reading crossed to reach `level`, reported with the alert."""
+    limits = WATER_QUALITY_PARAMETERS[parameter]
+    if "safe_min" in limits:
+        margin = limits["moderate_range"] if level == "high" else 0.0
+        if value < limits["safe_min"]:
+            return limits["safe_min"] - margin
+        return limits["safe_max"] + margin
+    key = {"medium": "moderate_limit", "high": "high_limit", "critical": "critical_limit"}
+    return limits.get(key.get(level, "safe_limit"))
+
+
+class AlertEngine:
+    """
+    Keeps the `alerts` table in step with newly inserted readings.
+
+    For each station and parameter a batch touched, the newest inserted reading is evaluated
+    when no newer reading is stored. Like the backend generator, a risky reading opens an
+    alert unless one is already active, a change of severity updates the active alert and a
+    safe reading resolves it. All of it costs two lookups and at most two batched writes.
+    """
+
+    def __init__(self):
+        self.counts = {"evaluated": 0, "created": 0, "updated": 0, "resolved": 0}
+
+    def evaluate(
+        self,
+        cursor,
+        readings: Sequence[Reading],
+        parameter_codes: Mapping[int, str],
+        location_names: Mapping[int, str],
+    ) -> Dict[str, int]:
+        """Evaluate inserted readings inside the caller's transaction and return what changed."""
+        from psycopg2.extras import execute_values
+
+        newest: Dict[Tuple[int, int], Reading] = {}
+        for reading in readings:
+            key = (reading[0], reading[1])
+            if parameter_codes.get(reading[1]) not in WATER_QUALITY_PARAMETERS:
+                continue
+            if key not in newest or reading[3] > newest[key][3]:
+                newest[key] = reading
+        if not newest:
+            return {}
+
+        keys = sorted(newest)
+        stored = execute_values(
+            cursor,
+            """
+            SELECT r.location_id, r.parameter_id, MAX(r.measurement_date)
+            FROM water_quality_readings r
+            JOIN (VALUES %s) AS k (location_id, parameter_id)
+              ON r.location_id = k.location_id AND r.parameter_id = k.parameter_id
+            GROUP BY r.location_id, r.parameter_id
+            """,
+            keys,
+            page_size=len(keys),
+            fetch=True,
+        )
+        for location_id, parameter_id, latest in stored:
+            reading = newest.get((location_id, parameter_id))
+            if reading is not None and _as_datetime(latest) > _as_datetime(reading[3]):
+                del newest[(location_id, parameter_id)]  # an older reading was backfilled
+        if not newest:
+            return {}
+
+        active: Dict[Tuple[int, int], List[Tuple[int, str]]] = {}
+        keys = sorted(newest)
+        for alert_id, location_id, parameter_id, severity in execute_values(
+            cursor,
+            """
+            SELECT id, location_id, parameter_id, severity::text FROM alerts
+            WHERE status = 'active' AND (location_id, parameter_id) IN (VALUES %s)
+            """,
+            keys,
+            page_size=len(keys),
+            fetch=True,
+        ):
+            active.setdefault((location_id, parameter_id), []).append((alert_id, severity))
+
+        created: List[tuple] = []
+        updated: List[tuple] = []
+        for key in keys:
+            location_id, parameter_id, value, measurement_date = newest[key]
+            code = parameter_codes[parameter_id]
+            value = float(value)
+            level = risk_level(code, value)
+            name = WATER_QUALITY_PARAMETERS[code]["name"]
+            location = location_names.get(location_id, str(location_id))
+            threshold = threshold_for(code, level, value)  # type: ignore[arg-type]
+            alerts = active.get(key, [])
+            if level != "low" and not alerts:
+                unit = WATER_QUALITY_PARAMETERS[code]["unit"]
+                message = (
+                    f"{name} at {location} is at {level} level ({value} {unit or ''}). "
+                    f"Threshold: {threshold}"
+                )
+                created.append(
+                    (location_id, parameter_id, level, message, threshold, value, measurement_date)
+                )
+            elif level != "low":
+                message = (
+                    f"{name} at {location} escalated to {level} level ({value}). "
+                    f"Threshold: {threshold}"
+                )
+                for alert_id, severity in alerts:
+                    if severity != level:
+                        updated.append((alert_id, "active", level, value, message))
+            else:
+                for alert_id, _ in alerts:
+                    updated.append((alert_id, "resolved", None, value, None))
+
+        if created:
+            execute_values(
+                cursor,
+                """
+                INSERT INTO alerts
+                (location_id, parameter_id, alert_type, severity, message,
+                 threshold_value, actual_value, status, triggered_at, created_at)
+                SELECT v.location_id, v.parameter_id, 'threshold_exceeded', v.severity::risk_level,
+                       v.message, v.threshold_value, v.actual_value, 'active', v.triggered_at, NOW()
+                FROM (VALUES %s) AS v
+                  (location_id, parameter_id, severity, message,
+                   threshold_value, actual_value, triggered_at)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM alerts a
+                    WHERE a.status = 'active'
+                      AND a.location_id = v.location_id
+                      AND a.parameter_id = v.parameter_id
+                )
+                """,
+                created,
+                template="(%s::int, %s::int, %s, %s, %s::numeric, %s::numeric, %s::timestamp)",
+                page_size=len(created),
+            )
+        if updated:
+            execute_values(
+                cursor,
+                """
+                UPDATE alerts a SET
+                    status = v.status::alert_status,
+                    severity = COALESCE(v.severity::risk_level, a.severity),
+                    message = COALESCE(v.message, a.message),
+                    actual_value = v.actual_value,
+                    resolved_at = CASE WHEN v.status = 'resolved' THEN NOW() ELSE a.resolved_at END
+                FROM (VALUES %s) AS v (id, status, severity, actual_value, message)
+                WHERE a.id = v.id
+                """,
+                updated,
+                template="(%s::int, %s, %s, %s::numeric, %s)",
+                page_size=len(updated),
+            )
+
+        resolved = sum(1 for row in updated if row[1] == "resolved")
+        changes = {
+            "evaluated": len(newest),
+            "created": len(created),
+            "updated": len(updated) - resolved,
+            "resolved": resolved,
+        }
+        for name, count in changes.items():
+            self.counts[name] += count
+        return changes
+
+
+def _as_datetime(value: Any) -> datetime:
+    """Compare stored timestamps with inserted dates, which come back as date or str."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
@@ -0,0 +1 @@
+"""Benchmarks for the data-pipeline ingestion hot paths (see benchmarks.run)."""
@@ -0,0 +1,250 @@
+"""
+End-to-end load test of WaterQualityDataFetcher against the local mock data.gov.in server
+
+    python -m benchmarks.load_test --records 50000 --concurrency 8
+    python -m benchmarks.load_test --throttle-rate 0.1 --retry-after 2 --rate-limit 600
+    python -m benchmarks.load_test --fetch-only --latency 0.3 --concurrency 16
+
+Every scheduled data.gov.in source is pointed at the mock server and fetched the way a real
+run does (DATA_GOV_IN_CONCURRENCY windows in flight, the shared host token bucket, retries and
+Retry-After). By default pages are also saved to a throwaway SQLite database through
+fetch_all_data; --fetch-only drains the page iterators without saving. The report gives
+throughput in normalized readings and pages, client-side page latency percentiles (including
+rate-limit waits and retries) and the statuses the server answered with.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from contextlib import aclosing, contextmanager
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+_PIPELINE_DIR = Path(__file__).resolve().parent.parent
+if str(_PIPELINE_DIR) not in sys.path:
+    sys.path.insert(0, str(_PIPELINE_DIR))
+
+from benchmarks.mock_server import (  # noqa: E402
+    MockDataGovIn,
+    MockServerConfig,
+    add_server_arguments,
+    server_config,
+)
+from benchmarks.run import _SQLiteFetcher  # noqa: E402
+from config import GOVERNMENT_APIS  # noqa: E402
+
+MOCK_API_KEY = "mock-key"
+
+
+class LoadTestFetcher(_SQLiteFetcher):
+    """SQLite-backed fetcher that keeps the wall time of every page request"""
+
+    def __init__(self, db_path: str):
+        self.page_seconds: List[float] = []
+        self.failed_pages = 0
+        super().__init__(db_path=db_path)
+
+    async def _fetch_page(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            data = await super()._fetch_page(*args, **kwargs)
+        except Exception:
+            self.failed_pages += 1
+            raise
+        self.page_seconds.append(time.perf_counter() - started)
+        return data
+
+
+@contextmanager
+def _environment(values: Dict[str, Optional[str]]) -> Iterator[None]:
+    """Set (or with None, unset) environment variables for the duration of the block."""
+    saved = {key: os.environ.get(key) for key in values}
+    try:
+        for key, value in values.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@contextmanager
+def mocked_sources(
+    base_url: str, sources: List[str], rate_limit: int, retries: int, timeout: int
+) -> Iterator[None]:
+    """Point the given GOVERNMENT_APIS entries at the mock server and turn weather off."""
+    saved = dict(GOVERNMENT_APIS)
+    try:
+        for key in sources:
+            GOVERNMENT_APIS[key] = replace(
+                GOVERNMENT_APIS[key],
+                base_url=base_url,
+                api_key=MOCK_API_KEY,
+                rate_limit=rate_limit,
+                retry_attempts=retries,
+                timeout=timeout,
+            )
+        GOVERNMENT_APIS["weather_api"] = replace(GOVERNMENT_APIS["weather_api"], api_key=None)
+        yield
+    finally:
+        GOVERNMENT_APIS.clear()
+        GOVERNMENT_APIS.update(saved)
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99/max of `values` in milliseconds."""
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(max(values) * 1000, 2),
+    }
+
+
+async def run_load_test(
+    server: MockServerConfig,
+    concurrency: int = 4,
+    limit: int = 1000,
+    rate_limit: int = 6000,
+    retries: int = 3,
+    timeout: int = 30,
+    fetch_only: bool = False,
+    sources: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Serve `server`, run the fetcher against it and return the load test report."""
+    sources = sources or _SQLiteFetcher.scheduled_sources()
+    env = {
+        "DATA_GOV_IN_LIMIT": str(limit),
+        "DATA_GOV_IN_MAX_PAGES": str(math.ceil(server.records / max(1, limit)) + 1),
+        "DATA_GOV_IN_CONCURRENCY": str(concurrency),
+        "DATA_PIPELINE_INCREMENTAL": "false",
+        "DATA_PIPELINE_METRICS_DIR": "off",
+        "DATA_PIPELINE_ALERTS": "off",
+        "DATA_PIPELINE_WEATHER_CACHE": "off",
+        "DATA_PIPELINE_LANDING_ZONE": None,
+        "DATA_PIPELINE_BLOOM_FILTER": None,
+        "ALLOW_SAMPLE_DATA": "false",
+    }
+    mock = MockDataGovIn(server)
+    for key in sources:
+        mock.dataset(GOVERNMENT_APIS[key].resource_id)
+
+    async with mock:
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            _environment(env),
+            mocked_sources(mock.base_url, sources, rate_limit, retries, timeout),
+        ):
+            fetcher = LoadTestFetcher(str(Path(tmp) / "load_test.db"))
+            fetcher.scheduled_sources = lambda: sources  # type: ignore[method-assign]
+            started = time.perf_counter()
+            # The fetcher, its HTTP session and every page iterator are closed before the mock
+            # server stops, including when sources fail or the run is cancelled
+            async with fetcher:
+                if fetch_only:
+                    counts = await _drain_all(fetcher, sources)
+                    failed = [key for key, n in zip(sources, counts) if isinstance(n, Exception)]
+                    readings = sum(n for n in counts if not isinstance(n, Exception))
+                else:
+                    try:
+                        summary, _ = await fetcher.fetch_all_data()
+                        failed, readings = summary["failed_sources"], summary["records"]
+                    except Exception:
+                        # fetch_all_data raises when every source failed
+                        failed, readings = list(sources), 0
+            seconds = time.perf_counter() - started
+
+    pages = len(fetcher.page_seconds)
+    return {
+        "sources": sources,
+        "fetch_only": fetch_only,
+        "concurrency": concurrency,
+        "limit": limit,
+        "rate_limit_per_minute": rate_limit,
+        "readings": readings,
+        "pages": pages,
+        "failed_pages": fetcher.failed_pages,
+        "failed_sources": failed,
+        "seconds": round(seconds, 3),
+        "readings_per_second": round(readings / seconds, 1) if seconds > 0 else None,
+        "pages_per_second": round(pages / seconds, 2) if seconds > 0 else None,
+        "bytes_downloaded": fetcher.metrics.counters.get("bytes_downloaded", 0),
+        "page_latency": percentiles(fetcher.page_seconds),
+        "server_latency": percentiles([entry.seconds for entry in mock.requests]),
+        "server_statuses": {str(k): v for k, v in sorted(mock.status_counts().items())},
+        "server_requests": len(mock.requests),
+    }
+
+
+async def _drain_all(fetcher: LoadTestFetcher, sources: List[str]) -> List[Any]:
+    """Drain every source concurrently; per source, the reading count or its exception."""
+    drains = [asyncio.ensure_future(_drain(fetcher, key)) for key in sources]
+    try:
+        return await asyncio.gather(*drains, return_exceptions=True)
+    finally:
+        for task in drains:
+            task.cancel()
+        await asyncio.gather(*drains, return_exceptions=True)
+
+
+async def _drain(fetcher: LoadTestFetcher, source_key: str) -> int:
+    readings = 0
+    async with aclosing(fetcher._iter_resource_pages(source_key)) as pages:
+        async for page in pages:
+            readings += len(page)
+    return readings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the fetcher against a mock API")
+    add_server_arguments(parser)
+    parser.add_argument("--concurrency", type=int, default=4, help="DATA_GOV_IN_CONCURRENCY")
+    parser.add_argument("--limit", type=int, default=1000, help="records asked for per page")
+    parser.add_argument(
+        "--rate-limit", type=int, default=6000, help="requests per minute for the mock host"
+    )
+    parser.add_argument("--retries", type=int, default=3, help="attempts per page")
+    parser.add_argument("--timeout", type=int, default=30, help="seconds per attempt")
+    parser.add_argument("--fetch-only", action="store_true", help="do not save to SQLite")
+    parser.add_argument("--source", action="append", help="source to fetch (repeatable)")
+    parser.add_argument("--output", type=Path, help="also write the report here as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(
+        run_load_test(
+            server_config(args),
+            concurrency=args.concurrency,
+            limit=args.limit,
+            rate_limit=args.rate_limit,
+            retries=args.retries,
+            timeout=args.timeout,
+            fetch_only=args.fetch_only,
+            sources=args.source,
+        )
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    return 1 if report["failed_sources"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Local stand-in for the data.gov.in resource API
+Serves synthetic paginated `records`/`total`/`count`/`limit` pages (benchmarks.payloads) with
+configurable latency, payload size and injected 429/5xx failures, so the fetcher's concurrency
+and rate-limit handling can be exercised without spending API quota
+
+    python -m benchmarks.mock_server --port 8080 --records 100000 --throttle-rate 0.05
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+_PIPELINE_DIR = Path(__file__).resolve().parent.parent
+if str(_PIPELINE_DIR) not in sys.path:
+    sys.path.insert(0, str(_PIPELINE_DIR))
+
+from benchmarks.payloads import synthetic_pages  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Server errors picked from when a 5xx is injected
+SERVER_ERRORS = (500, 502, 503, 504)
+
+
+@dataclass
+class MockServerConfig:
+    """How the mock resource API behaves"""
+
+    records: int = 10_000  # total records per resource
+    max_limit: int = 1000  # largest page served, whatever `limit` is asked for
+    latency: float = 0.05  # base response delay in seconds
+    jitter: float = 0.05  # extra uniform delay of up to this many seconds
+    padding_bytes: int = 0  # filler text added to every record to grow the payload
+    throttle_rate: float = 0.0  # share of requests answered with 429
+    error_rate: float = 0.0  # share of requests answered with a 5xx
+    retry_after: Optional[float] = 1.0  # Retry-After sent with 429/503 (None: no header)
+    seed: int = 0
+
+
+@dataclass
+class RequestLog:
+    """One request the mock server answered"""
+
+    resource: str
+    offset: int
+    status: int
+    seconds: float
+
+
+class MockDataGovIn:
+    """
+    aiohttp app serving GET /resource/<resource_id>?offset=&limit= like api.data.gov.in.
+
+    Each resource id gets its own deterministic dataset, generated on first use. Every request
+    is logged in `requests` so load tests can check what the client actually did.
+    """
+
+    def __init__(self, config: Optional[MockServerConfig] = None):
+        self.config = config or MockServerConfig()
+        self.requests: List[RequestLog] = []
+        self._datasets: Dict[str, List[Dict[str, Any]]] = {}
+        self._random = random.Random(self.config.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/resource/{resource_id}", self.handle_resource)
+        return app
+
+    def dataset(self, resource_id: str) -> List[Dict[str, Any]]:
+        """Records served for a resource; call it before timing to leave generation out."""
+        records = self._datasets.get(resource_id)
+        if records is None:
+            digest = hashlib.sha256(f"{self.config.seed}:{resource_id}".encode()).digest()
+            seed = int.from_bytes(digest[0:8], "little")
+            filler = "x" * self.config.padding_bytes
+            records = []
+            for page in synthetic_pages(self.config.records, self.config.max_limit, seed):
+                if filler:
+                    for record in page["records"]:
+                        record["remarks"] = filler
+                records.extend(page["records"])
+            self._datasets[resource_id] = records
+        return records
+
+    async def handle_resource(self, request: web.Request) -> web.Response:
+        started = time.perf_counter()
+        resource_id = request.match_info["resource_id"]
+        try:
+            offset = max(0, int(request.query.get("offset", "0")))
+            limit = int(request.query.get("limit", "10"))
+        except ValueError:
+            return self._log(
+                resource_id, 0, started, web.json_response({"error": "bad"}, status=400)
+            )
+        limit = max(1, min(limit, self.config.max_limit))
+
+        config = self.config
+        await asyncio.sleep(config.latency + self._random.uniform(0, config.jitter))
+
+        roll = self._random.random()
+        if roll < config.throttle_rate:
+            return self._log(resource_id, offset, started, self._failure(429))
+        if roll < config.throttle_rate + config.error_rate:
+            status = self._random.choice(SERVER_ERRORS)
+            return self._log(resource_id, offset, started, self._failure(status))
+
+        records = self.dataset(resource_id)[offset : offset + limit]
+        body = {
+            "status": "ok",
+            "total": config.records,
+            "count": len(records),
+            "limit": str(limit),
+            "offset": str(offset),
+            "records": records,
+        }
+        return self._log(resource_id, offset, started, web.json_response(body))
+
+    def _failure(self, status: int) -> web.Response:
+        headers = {}
+        if status in (429, 503) and self.config.retry_after is not None:
+            headers["Retry-After"] = f"{self.config.retry_after:g}"
+        message = "Too Many Requests" if status == 429 else "Upstream unavailable"
+        return web.json_response({"error": message}, status=status, headers=headers)
+
+    def _log(
+        self, resource: str, offset: int, started: float, response: web.Response
+    ) -> web.Response:
+        seconds = time.perf_counter() - started
+        self.requests.append(RequestLog(resource, offset, response.status, seconds))
+        return response
+
+    def status_counts(self) -> Dict[int, int]:
+        return dict(Counter(entry.status for entry in self.requests))
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve in the running event loop; returns the base URL (port 0 picks a free port)."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{bound_port}/resource/"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockDataGovIn":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.stop()
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """Mock server options, shared with the load test CLI."""
+    defaults = MockServerConfig()
+    parser.add_argument("--records", type=int, default=defaults.records)
+    parser.add_argument("--max-limit", type=int, default=defaults.max_limit)
+    parser.add_argument("--latency", type=float, default=defaults.latency)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--padding-bytes", type=int, default=defaults.padding_bytes)
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument(
+        "--retry-after", type=float, default=defaults.retry_after, help="negative: no header"
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def server_config(args: argparse.Namespace) -> MockServerConfig:
+    return MockServerConfig(
+        records=args.records,
+        max_limit=args.max_limit,
+        latency=args.latency,
+        jitter=args.jitter,
+        padding_bytes=args.padding_bytes,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        retry_after=None if args.retry_after < 0 else args.retry_after,
+        seed=args.seed,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve a mock data.gov.in resource API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(MockDataGovIn(server_config(args)).app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
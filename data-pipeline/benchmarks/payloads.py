@@ -0,0 +1,120 @@
+"""
+Synthetic data.gov.in payloads for benchmarks and load tests
+Pages mimic the wide CPCB resources: one record per station-day with one column per parameter,
+using the field and parameter key variants normalize.py recognises
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import INDIAN_WATER_BODIES
+from normalize import FIELD_MAPPING, PARAM_MAPPING
+
+# Typical readings per parameter as (lognormal mean, sigma) of the value distribution
+VALUE_SHAPES = {
+    "BOD": (1.2, 0.6),
+    "TDS": (6.0, 0.5),
+    "pH": (2.0, 0.07),
+    "DO": (1.7, 0.3),
+    "Lead": (-4.0, 1.0),
+    "Mercury": (-6.0, 0.5),
+    "Coliform": (3.0, 1.5),
+    "Nitrates": (2.5, 0.8),
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y")
+
+
+class PageSchema:
+    """Keys one synthetic resource uses for its fields, and how it writes dates"""
+
+    def __init__(self, rng: np.random.Generator):
+        def pick(options: List[str]) -> str:
+            return options[int(rng.integers(len(options)))]
+
+        self.state = pick(FIELD_MAPPING["state"])
+        self.location = pick(FIELD_MAPPING["location"])
+        self.latitude = pick(FIELD_MAPPING["latitude"])
+        self.longitude = pick(FIELD_MAPPING["longitude"])
+        self.date = pick(["date", "measurement_date", "timestamp", "year"])
+        self.date_format = "%Y" if self.date == "year" else pick(list(DATE_FORMATS[0:3]))
+        # Most resources report most parameters; each uses one spelling per parameter
+        self.params: List[Tuple[str, str]] = [
+            (param, pick(keys)) for param, keys in PARAM_MAPPING.items() if rng.random() < 0.85
+        ] or [("pH", "ph")]
+        # Data portals title-case some headers
+        self.title_case = bool(rng.random() < 0.3)
+
+    def key(self, name: str) -> str:
+        return name.title() if self.title_case else name
+
+
+def synthetic_pages(
+    n_records: int,
+    page_size: int = 1000,
+    seed: int = 0,
+    schemas: int = 6,
+    missing_rate: float = 0.03,
+    stations: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield data.gov.in style pages (`records`, `total`, `count`, `limit`) holding `n_records`.
+
+    Every page uses one of `schemas` field layouts, so the key-variant handling is exercised
+    while each page stays single-schema like a real resource. About `missing_rate` of the
+    parameter cells hold "NA" or are blank. Output is fully determined by `seed`.
+    """
+    rng = np.random.default_rng(seed)
+    layouts = [PageSchema(rng) for _ in range(max(1, schemas))]
+    states = np.array(list(INDIAN_WATER_BODIES), dtype=object)
+    n_stations = stations or max(10, n_records // 50)
+    station_state = rng.integers(len(states), size=n_stations)
+    centres = np.array([INDIAN_WATER_BODIES[s]["coordinates"] for s in states])
+    coords = centres[station_state] + rng.normal(0, 0.8, size=(n_stations, 2))
+
+    # Text for every station and day is rendered once and indexed per page
+    station_state_text = states[station_state]
+    station_name = np.array([f"Station {i:05d}" for i in range(n_stations)], dtype=object)
+    station_lat = np.array([f"{v:.4f}" for v in coords[:, 0]], dtype=object)
+    station_lon = np.array([f"{v:.4f}" for v in coords[:, 1]], dtype=object)
+    day_count = 6 * 365
+    days = pd.date_range("2019-01-01", periods=day_count, freq="D")
+    day_text = {fmt: np.array(days.strftime(fmt), dtype=object) for fmt in DATE_FORMATS}
+
+    for offset in range(0, n_records, page_size):
+        count = min(page_size, n_records - offset)
+        layout = layouts[int(rng.integers(len(layouts)))]
+        station = rng.integers(n_stations, size=count)
+        day = rng.integers(0, day_count, size=count)
+
+        keys = [
+            layout.key(layout.state),
+            layout.key(layout.location),
+            layout.key(layout.latitude),
+            layout.key(layout.longitude),
+            layout.key(layout.date),
+        ]
+        columns = [
+            station_state_text[station],
+            station_name[station],
+            station_lat[station],
+            station_lon[station],
+            day_text[layout.date_format][day],
+        ]
+        for param, key in layout.params:
+            mean, sigma = VALUE_SHAPES[param]
+            values = np.round(rng.lognormal(mean, sigma, size=count), 3).astype(str).astype(object)
+            missing = rng.random(count) < missing_rate
+            values[missing] = np.where(rng.random(int(missing.sum())) < 0.5, "NA", "")
+            keys.append(layout.key(key))
+            columns.append(values)
+
+        yield {
+            "total": n_records,
+            "count": count,
+            "limit": page_size,
+            "offset": offset,
+            "records": [dict(zip(keys, row)) for row in zip(*(c.tolist() for c in columns))],
+        }
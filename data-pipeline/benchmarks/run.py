@@ -0,0 +1,237 @@
+"""
+Benchmarks for the ingestion hot paths
+
+    python -m benchmarks.run                               # 1k and 100k records
+    python -m benchmarks.run --sizes 1000 100000 1000000   # add the 1M run
+    python -m benchmarks.run --postgres                    # also time the Postgres save path
+    python -m benchmarks.run --save-baseline               # record this machine's baseline
+
+Run from data-pipeline/. Each case is timed `--repeat` times on synthetic data.gov.in pages
+(benchmarks.payloads) and the median is compared with the baseline JSON; a case slower than
+the baseline by more than `--threshold` is a regression and the command exits with status 1.
+Baselines only compare like with like, so record one per machine.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+_PIPELINE_DIR = Path(__file__).resolve().parent.parent
+if str(_PIPELINE_DIR) not in sys.path:
+    sys.path.insert(0, str(_PIPELINE_DIR))
+
+import db_pool  # noqa: E402
+from benchmarks.payloads import synthetic_pages  # noqa: E402
+from fetch_data import TEXT_FIELDS, WaterQualityDataFetcher, sanitize_records  # noqa: E402
+from normalize import process_data_gov_in, process_data_gov_in_batch  # noqa: E402
+from readings_batch import ReadingsBatch  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "baseline.json"
+DEFAULT_SIZES = [1000, 100_000]
+
+
+class _SQLiteFetcher(WaterQualityDataFetcher):
+    """Fetcher that writes to SQLite without probing Postgres first"""
+
+    def setup_database(self):
+        self.use_postgres = False
+        super().setup_database()
+
+
+def measure(
+    func: Callable[[], Any],
+    records: int,
+    repeat: int,
+    setup: Optional[Callable[[], Any]] = None,
+) -> Dict[str, Any]:
+    """Time `func` `repeat` times (after an untimed `setup` each time) and summarise."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings)
+    return {
+        "records": records,
+        "repeat": repeat,
+        "median_seconds": round(median, 6),
+        "min_seconds": round(min(timings), 6),
+        "records_per_second": round(records / median, 1) if median > 0 else None,
+    }
+
+
+def _batches(rows: List[Dict[str, Any]], size: int) -> List[ReadingsBatch]:
+    return [ReadingsBatch.from_records(rows[i : i + size]) for i in range(0, len(rows), size)]
+
+
+def run_suite(
+    sizes: List[int], repeat: int = 3, postgres: bool = False, seed: int = 0
+) -> Dict[str, Dict[str, Any]]:
+    """Results keyed "<case>/<records>" for every case and size."""
+    batch_size = max(1, int(os.getenv("DATA_PIPELINE_BATCH_SIZE", "5000")))
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        pages = list(synthetic_pages(size, seed=seed))
+
+        def process() -> List[Dict[str, Any]]:
+            rows = []
+            for page in pages:
+                rows.extend(process_data_gov_in(page))
+            return rows
+
+        results[f"process_data_gov_in/{size}"] = measure(process, size, repeat)
+        results[f"process_data_gov_in_batch/{size}"] = measure(
+            lambda: [process_data_gov_in_batch(page) for page in pages], size, repeat
+        )
+        readings = process()
+        for reading in readings:
+            reading["source"] = "government"
+
+        results[f"sanitize_records/{size}"] = measure(
+            lambda: sanitize_records(readings, TEXT_FIELDS), len(readings), repeat
+        )
+        readings = sanitize_records(readings, TEXT_FIELDS)
+        batches = _batches(readings, batch_size)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            state: Dict[str, Any] = {}
+
+            def fresh_sqlite() -> None:
+                db_path = Path(tmp) / f"{uuid.uuid4().hex}.db"
+                state["fetcher"] = _SQLiteFetcher(db_path=str(db_path))
+
+            def save_sqlite() -> None:
+                for batch in batches:
+                    state["fetcher"]._save_to_sqlite(batch)
+
+            results[f"save_sqlite/{size}"] = measure(
+                save_sqlite, len(readings), repeat, setup=fresh_sqlite
+            )
+
+        if postgres:
+            results[f"save_postgres/{size}"] = _measure_postgres(batches, len(readings), repeat)
+    return results
+
+
+def _measure_postgres(batches: List[ReadingsBatch], records: int, repeat: int) -> Dict[str, Any]:
+    """
+    Time `_save_to_postgres` against the configured database (DATABASE_URL / DB_*).
+
+    Every repeat writes stations under a fresh "bench-" prefix so nothing conflicts with
+    earlier rows, and the stations (with their readings, by cascade) are deleted afterwards.
+    """
+    fetcher = WaterQualityDataFetcher()
+    if not fetcher.use_postgres:
+        raise RuntimeError("--postgres needs a reachable PostgreSQL database")
+    state: Dict[str, Any] = {}
+
+    def relabel() -> None:
+        prefix = f"bench-{uuid.uuid4().hex[0:8]} "
+        state["batches"] = [
+            [dict(r, location_name=prefix + r["location_name"]) for r in batch] for batch in batches
+        ]
+
+    def save() -> None:
+        for batch in state["batches"]:
+            if fetcher._save_to_postgres(batch) is None:
+                raise RuntimeError("Postgres save failed; see the log")
+
+    try:
+        return measure(save, records, repeat, setup=relabel)
+    finally:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM locations WHERE name LIKE 'bench-%%'")
+            conn.commit()
+        fetcher.dimension_cache.clear()
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Describe every case whose median is more than `threshold` slower than the baseline."""
+    regressions = []
+    for case, result in results.items():
+        base = baseline.get("results", {}).get(case)
+        if not base:
+            continue
+        limit = base["median_seconds"] * (1 + threshold)
+        if result["median_seconds"] > limit:
+            change = result["median_seconds"] / base["median_seconds"] - 1
+            regressions.append(
+                f"{case}: {result['median_seconds']:.4f}s vs baseline "
+                f"{base['median_seconds']:.4f}s (+{change:.0%}, threshold {threshold:.0%})"
+            )
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.node(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the data-pipeline ingestion paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--postgres", action="store_true", help="also time the Postgres save")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slowdown (0.25=25%%)"
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="write results as baseline")
+    parser.add_argument("--output", type=Path, help="also write this run's results here")
+    args = parser.parse_args(argv)
+
+    # Time the save paths alone: no metrics files, alerts or cross-run de-dup
+    os.environ["DATA_PIPELINE_METRICS_DIR"] = "off"
+    os.environ["DATA_PIPELINE_ALERTS"] = "off"
+    os.environ.pop("DATA_PIPELINE_BLOOM_FILTER", None)
+    logging.getLogger().setLevel(logging.WARNING)
+    results = run_suite(args.sizes, args.repeat, args.postgres, args.seed)
+    report = dict(environment(), threshold=args.threshold, results=results)
+
+    print(f"{'case':<34}{'median s':>12}{'records/s':>16}")
+    for case, result in results.items():
+        print(f"{case:<34}{result['median_seconds']:>12.4f}{result['records_per_second']:>16,.0f}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"No regressions against {args.baseline} ({baseline.get('created_at')})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Shared PostgreSQL connection pool for the data pipeline
+Used by fetch_data, check_db and the model trainer so each process pays for
+the TLS handshake once per connection instead of once per query
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+from config import DB_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[pool.ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+# Last time each pooled connection was handed back, keyed by id(conn)
+_last_used: Dict[int, float] = {}
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def pool_settings() -> Dict[str, int]:
+    """
+    Pool sizing and timeouts from the environment.
+
+    DB_POOL_MIN / DB_POOL_MAX bound the number of connections, DB_STATEMENT_TIMEOUT_MS is applied
+    to every session (0 disables it) and DB_POOL_HEALTHCHECK_SECONDS is how long a connection may
+    sit idle before it is pinged on checkout.
+    """
+    min_size = max(0, _env_int("DB_POOL_MIN", 1))
+    return {
+        "min_size": min_size,
+        "max_size": max(1, min_size, _env_int("DB_POOL_MAX", 5)),
+        "statement_timeout_ms": max(0, _env_int("DB_STATEMENT_TIMEOUT_MS", 60000)),
+        "healthcheck_seconds": max(0, _env_int("DB_POOL_HEALTHCHECK_SECONDS", 30)),
+    }
+
+
+def get_pool() -> pool.ThreadedConnectionPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            settings = pool_settings()
+            connect_kwargs = {
+                "host": DB_CONFIG.host,
+                "port": DB_CONFIG.port,
+                "dbname": DB_CONFIG.database,
+                "user": DB_CONFIG.username,
+                "password": DB_CONFIG.password,
+                "sslmode": os.getenv("DB_SSLMODE", "require"),
+                "connect_timeout": _env_int("DB_CONNECT_TIMEOUT", 10),
+            }
+            if settings["statement_timeout_ms"]:
+                connect_kwargs["options"] = (
+                    f"-c statement_timeout={settings['statement_timeout_ms']}"
+                )
+            _pool = pool.ThreadedConnectionPool(
+                settings["min_size"], settings["max_size"], **connect_kwargs
+            )
+            logger.info(
+                f"PostgreSQL pool ready (host={DB_CONFIG.host} db={DB_CONFIG.database} "
+                f"size={settings['min_size']}..{settings['max_size']})"
+            )
+        return _pool
+
+
+def _is_healthy(conn, idle_for: float, healthcheck_seconds: int) -> bool:
+    if conn.closed:
+        return False
+    if idle_for < healthcheck_seconds:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout(conn_pool: pool.ThreadedConnectionPool):
+    healthcheck_seconds = pool_settings()["healthcheck_seconds"]
+    # Every pooled connection may have gone stale; one more attempt gets a fresh one.
+    for _ in range(conn_pool.maxconn + 1):
+        conn = conn_pool.getconn()
+        now = time.monotonic()
+        idle_for = now - _last_used.get(id(conn), now)
+        if _is_healthy(conn, idle_for, healthcheck_seconds):
+            return conn
+        logger.warning("Discarding broken PostgreSQL connection from the pool")
+        _last_used.pop(id(conn), None)
+        conn_pool.putconn(conn, close=True)
+    raise psycopg2.OperationalError("Could not get a healthy PostgreSQL connection from the pool")
+
+
+@contextmanager
+def connection() -> Iterator["extensions.connection"]:
+    """
+    Borrow a pooled connection for the duration of a `with` block.
+
+    The caller commits; anything left uncommitted is rolled back before the connection goes
+    back to the pool. Connections that broke while in use are closed instead of reused.
+
+    Raises:
+        psycopg2.Error: When no connection can be established.
+    """
+    conn_pool = get_pool()
+    conn = _checkout(conn_pool)
+    try:
+        yield conn
+    finally:
+        close = bool(conn.closed)
+        if not close and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                close = True
+        if close:
+            _last_used.pop(id(conn), None)
+        else:
+            _last_used[id(conn)] = time.monotonic()
+        conn_pool.putconn(conn, close=close)
+
+
+def check_connection() -> bool:
+    """Return True when the pool can hand out a working connection."""
+    try:
+        with connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        return True
+    except psycopg2.Error as e:
+        logger.error(f"PostgreSQL connection check failed: {e}")
+        return False
+
+
+def close_pool() -> None:
+    """Close every pooled connection; the next `connection()` call builds a new pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
+        _last_used.clear()
+
+
+atexit.register(close_pool)
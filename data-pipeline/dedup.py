@@ -0,0 +1,238 @@
+"""
+Pre-insert de-duplication of readings
+Drops repeats of a natural key within a batch and, optionally, keys a persisted Bloom filter
+says were already stored, so only readings that may be new are sent to the database
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from readings_batch import ReadingsBatch
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"AQUA-BLOOM-1\n"
+
+
+def natural_key(record: Dict[str, Any]) -> bytes:
+    """(location, state, parameter, date) of a reading, the key the readings table is unique on."""
+    return "\x1f".join(
+        str(record.get(field))
+        for field in ("location_name", "state", "parameter", "measurement_date")
+    ).encode("utf-8")
+
+
+def natural_keys(batch: ReadingsBatch) -> List[bytes]:
+    """`natural_key` of every reading in a batch, building each label's text once."""
+    stations = [f"{s.location_name}\x1f{s.state}\x1f" for s in batch.stations]
+    parameters = [f"{parameter}\x1f" for parameter in batch.parameters]
+    return [
+        f"{stations[s]}{parameters[p]}{day}".encode("utf-8")
+        for s, p, day in zip(
+            batch.station.tolist(), batch.parameter.tolist(), batch.date_texts().tolist()
+        )
+    ]
+
+
+def _first_occurrences(keys: List[bytes]) -> np.ndarray:
+    seen = set()
+    first = np.zeros(len(keys), dtype=bool)
+    for i, key in enumerate(keys):
+        if key not in seen:
+            seen.add(key)
+            first[i] = True
+    return first
+
+
+def dedupe_batch(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep the first reading of each natural key, as ON CONFLICT DO NOTHING would."""
+    seen = set()
+    unique = []
+    for record in records:
+        key = natural_key(record)
+        if key not in seen:
+            seen.add(key)
+            unique.append(record)
+    return unique
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over byte keys, checked and updated a batch at a time.
+
+    Positions come from double hashing one 128-bit BLAKE2b digest per key, so a batch costs
+    one hash per key and a few vectorised numpy operations.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, identity: str = ""):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.identity = identity
+        self.size = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.count = 0
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, keys: List[bytes]) -> np.ndarray:
+        digests = b"".join(hashlib.blake2b(key, digest_size=16).digest() for key in keys)
+        halves = np.frombuffer(digests, dtype="<u8").reshape(-1, 2)
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            combined = halves[:, 0:1] + steps[None, :] * (halves[:, 1:2] | np.uint64(1))
+        return combined % np.uint64(self.size)
+
+    def contains(self, keys: List[bytes]) -> np.ndarray:
+        """Per key, False when it was certainly never added and True when it may have been."""
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(keys)
+        hits = (
+            self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)
+        ) & 1
+        return hits.all(axis=1)
+
+    def add(self, keys: List[bytes]) -> None:
+        if not keys:
+            return
+        positions = self._positions(keys).ravel()
+        masks = np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.intp), masks)
+        self.count += len(keys)
+
+    @property
+    def full(self) -> bool:
+        """Past capacity the false-positive rate climbs above `error_rate`."""
+        return self.count >= self.capacity
+
+    def save(self, path: Path) -> None:
+        header = {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "identity": self.identity,
+            "count": self.count,
+        }
+        tmp_path = path.with_name(path.name + ".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(self.bits.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BloomFilter":
+        with open(path, "rb") as f:
+            if f.readline() != _MAGIC:
+                raise ValueError("not a Bloom filter file")
+            header = json.loads(f.readline())
+            bloom = cls(header["capacity"], header["error_rate"], header["identity"])
+            bits = np.frombuffer(f.read(), dtype=np.uint8)
+        if len(bits) != len(bloom.bits):
+            raise ValueError("truncated Bloom filter file")
+        bloom.bits = bits.copy()
+        bloom.count = header["count"]
+        return bloom
+
+
+class ReadingDeduplicator:
+    """
+    Filters batches down to readings that may be new before they are saved.
+
+    Repeats within a batch are always dropped. With a Bloom filter file configured, keys
+    recorded as stored by earlier batches or runs against the same database are dropped too.
+    A Bloom filter can report a key it never saw, so `error_rate` is also the share of new
+    readings that are wrongly skipped; keep it small. The filter starts over when it fills up
+    or when it was built for a different database.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        capacity: int = 5_000_000,
+        error_rate: float = 1e-6,
+        identity: str = "",
+    ):
+        self.path = Path(path) if path else None
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.identity = identity
+        self.bloom: Optional[BloomFilter] = None
+        self._dirty = False
+        if self.path is not None:
+            self.bloom = self._load()
+
+    @classmethod
+    def from_env(cls, identity: str) -> "ReadingDeduplicator":
+        """
+        DATA_PIPELINE_BLOOM_FILTER names the filter file (unset: within-batch de-dup only);
+        DATA_PIPELINE_BLOOM_CAPACITY and DATA_PIPELINE_BLOOM_ERROR_RATE size it.
+        """
+        return cls(
+            os.getenv("DATA_PIPELINE_BLOOM_FILTER") or None,
+            int(os.getenv("DATA_PIPELINE_BLOOM_CAPACITY", "5000000")),
+            float(os.getenv("DATA_PIPELINE_BLOOM_ERROR_RATE", "1e-6")),
+            identity,
+        )
+
+    def _fresh(self) -> BloomFilter:
+        return BloomFilter(self.capacity, self.error_rate, self.identity)
+
+    def _load(self) -> BloomFilter:
+        assert self.path is not None
+        try:
+            bloom = BloomFilter.load(self.path)
+        except FileNotFoundError:
+            return self._fresh()
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable Bloom filter {self.path}: {e}")
+            return self._fresh()
+        if bloom.identity != self.identity:
+            logger.info(f"Bloom filter {self.path} was built for another database; starting over")
+            return self._fresh()
+        return bloom
+
+    def filter_new(self, records: Any) -> Tuple[Any, int]:
+        """Readings that may not be stored yet, and how many were dropped; a batch stays a batch."""
+        if isinstance(records, ReadingsBatch):
+            keys = natural_keys(records)
+            keep = _first_occurrences(keys)
+            if self.bloom is not None and keep.any():
+                kept = np.flatnonzero(keep)
+                keep[kept[self.bloom.contains([keys[i] for i in kept])]] = False
+            unique_batch = records if keep.all() else records.take(keep)
+            return unique_batch, len(records) - len(unique_batch)
+
+        unique = dedupe_batch(records)
+        if self.bloom is not None and unique:
+            seen = self.bloom.contains([natural_key(record) for record in unique])
+            unique = [record for record, stored in zip(unique, seen) if not stored]
+        return unique, len(records) - len(unique)
+
+    def mark_stored(self, records: Union[ReadingsBatch, Iterable[Dict[str, Any]]]) -> None:
+        """Remember the keys of a batch that has been committed."""
+        if self.bloom is None:
+            return
+        if self.bloom.full:
+            logger.info(f"Bloom filter {self.path} reached its capacity; starting over")
+            self.bloom = self._fresh()
+        if isinstance(records, ReadingsBatch):
+            self.bloom.add(natural_keys(records))
+        else:
+            self.bloom.add([natural_key(record) for record in records])
+        self._dirty = True
+
+    def save(self) -> None:
+        if self.bloom is None or self.path is None or not self._dirty:
+            return
+        try:
+            self.bloom.save(self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Could not write Bloom filter {self.path}: {e}")
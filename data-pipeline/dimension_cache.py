@@ -0,0 +1,136 @@
+"""
+Cache of dimension ids (parameters and locations) for the PostgreSQL writer
+Keeps parameter_code -> id and (name, state) -> location id across batches, and
+optionally across runs in a local JSON file guarded by a cheap fingerprint query
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LocationKey = Tuple[str, str]
+
+# Row counts and id ranges of both dimension tables. If any of these moved since the
+# cache was written, rows were added or removed by someone else (or the database was
+# rebuilt) and cached ids can no longer be trusted.
+FINGERPRINT_QUERY = """
+    SELECT
+        current_database(),
+        (SELECT COUNT(*) FROM water_quality_parameters),
+        (SELECT COALESCE(MAX(id), 0) FROM water_quality_parameters),
+        (SELECT COUNT(*) FROM locations),
+        (SELECT COALESCE(MIN(id), 0) FROM locations),
+        (SELECT COALESCE(MAX(id), 0) FROM locations)
+"""
+
+
+class DimensionCache:
+    """Dimension ids for the readings writer, validated once per run"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.parameters: Dict[str, int] = {}
+        self.locations: Dict[LocationKey, int] = {}
+        self.fingerprint: Optional[List[Any]] = None
+        self._validated = False
+        self._parameters_loaded = False
+        self._dirty = False
+        if self.path is not None:
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> "DimensionCache":
+        """Build the cache, persisted at DATA_PIPELINE_DIMENSION_CACHE when that is set."""
+        return cls(os.getenv("DATA_PIPELINE_DIMENSION_CACHE") or None)
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:  # type: ignore[arg-type]
+                state = json.load(f)
+            self.parameters = {code: int(pid) for code, pid in state["parameters"].items()}
+            self.locations = {(name, st): int(lid) for name, st, lid in state["locations"]}
+            self.fingerprint = state["fingerprint"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable dimension cache {self.path}: {e}")
+            self.clear()
+
+    def save(self) -> None:
+        """Write the cache to its file (if it has one) atomically."""
+        if self.path is None:
+            return
+        state = {
+            "fingerprint": self.fingerprint,
+            "parameters": self.parameters,
+            "locations": [[name, st, lid] for (name, st), lid in self.locations.items()],
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write dimension cache {self.path}: {e}")
+
+    def clear(self) -> None:
+        self.parameters = {}
+        self.locations = {}
+        self.fingerprint = None
+        self._parameters_loaded = False
+
+    @staticmethod
+    def _fingerprint(cursor) -> List[Any]:
+        cursor.execute(FINGERPRINT_QUERY)
+        return [str(value) for value in cursor.fetchone()]
+
+    def validate(self, cursor) -> None:
+        """
+        Drop cached ids if the dimension tables changed behind our back.
+
+        Runs the fingerprint query on the first call only; later batches of the same run trust
+        the cache, which `commit` keeps in step with our own inserts.
+        """
+        if self._validated:
+            return
+        current = self._fingerprint(cursor)
+        if self.fingerprint != current:
+            if self.fingerprint is not None:
+                logger.info("Dimension tables changed since the cache was written; reloading ids")
+                self.clear()
+            self.fingerprint = current
+            self._dirty = True
+        self._validated = True
+
+    def parameter_ids(self, cursor, codes: Iterable[str]) -> Dict[str, int]:
+        """Return parameter_code -> id, reading the table only when a code is not cached yet."""
+        if not self._parameters_loaded and any(code not in self.parameters for code in codes):
+            cursor.execute("SELECT parameter_code, id FROM water_quality_parameters")
+            self.parameters = {row[0]: row[1] for row in cursor.fetchall()}
+            self._parameters_loaded = True
+            self._dirty = True
+        return self.parameters
+
+    def missing_locations(self, keys: Iterable[LocationKey]) -> set:
+        return {key for key in keys if key not in self.locations}
+
+    def commit(self, cursor, location_ids: Dict[LocationKey, int]) -> None:
+        """
+        Remember ids of locations upserted in a committed transaction and persist the cache.
+
+        Call only after commit: ids from a rolled-back insert would point at nothing. The
+        fingerprint is refreshed so our own inserts do not invalidate the cache next run.
+        """
+        if location_ids:
+            self.locations.update(location_ids)
+            if self.path is not None:
+                self.fingerprint = self._fingerprint(cursor)
+            self._dirty = True
+        if self._dirty:
+            self.save()
+            self._dirty = False
@@ -3,23 +3,50 @@ Main data fetching script for Aqua-AI
 Fetches water quality data from various government sources
 """
 
+import argparse
 import asyncio
-import aiohttp
-import sqlite3
+import csv
+import hashlib
+import html
+import io
 import logging
 import os
-import uuid
+import re
+import sqlite3
 import subprocess
+import time
+import uuid
+from collections import ChainMap, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import aclosing
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, cast
-import random
-import numpy as np
+from itertools import islice
 from pathlib import Path
-from dateutil import parser as date_parser
+from typing import AsyncIterator, Deque, Dict, List, Mapping, Optional, Any, Tuple, Union
+
+import aiohttp
+import numpy as np
 import psycopg2
-import re
-import html
-import hashlib
+
+import db_pool
+import sqlite_store
+from alert_engine import AlertEngine, alert_mode
+from config import GOVERNMENT_APIS, DB_CONFIG
+from dedup import ReadingDeduplicator
+from dimension_cache import DimensionCache
+from landing_zone import LandingZone, process_archived_page
+from metrics import RunMetrics
+from normalize import process_data_gov_in, process_data_gov_in_batch
+from rate_limiter import RateLimiter
+from readings_batch import NO_DATE, ReadingsBatch, Station
+from synthetic_data import generate_readings, to_records
+from watermarks import FetchPlan, Watermark, WatermarkStore, page_hash
+from weather_cache import Cell, WeatherCache
+
+
+_HTML_TAG = re.compile(r"<[^>]+>")
+# Null bytes and control characters (except newline, tab and carriage return)
+_CONTROL_CHARS = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
 
 
 def sanitize_text(value: str, max_length: int = 500) -> str:
@@ -28,13 +55,12 @@ def sanitize_text(value: str, max_length: int = 500) -> str:
         return str(value)[0:max_length] if value is not None else ""  # type: ignore
 
     # Strip HTML tags
-    value = re.sub(r"<[^>]+>", "", value)
+    if "<" in value:
+        value = _HTML_TAG.sub("", value)
     # Decode HTML entities
     value = html.unescape(value)
-    # Remove null bytes
-    value = value.replace("\x00", "")
-    # Remove control characters (except newline, tab)
-    value = re.sub(r"[\x01-\x08\x0b\x0c\x0e-\x1f\x7f]", "", value)
+    # Remove null bytes and control characters in one pass
+    value = value.translate(_CONTROL_CHARS)
     # Trim whitespace
     value = value.strip()
     # Enforce max length
@@ -52,7 +78,77 @@ def sanitize_record(record: Dict[str, Any], text_fields: List[str]) -> Dict[str,
     return sanitized
 
 
-from config import GOVERNMENT_APIS, WATER_QUALITY_PARAMETERS, INDIAN_WATER_BODIES, DB_CONFIG
+def sanitize_records(records: List[Dict[str, Any]], text_fields: List[str]) -> List[Dict[str, Any]]:
+    """
+    Sanitize text fields across a batch of records.
+
+    Gives the same result as calling `sanitize_record` on each record, but every distinct
+    string is sanitized once; station and state names repeat on every parameter row.
+    """
+    cache: Dict[str, str] = {}
+    sanitized_records = []
+    for record in records:
+        sanitized = record.copy()
+        for field in text_fields:
+            value = sanitized.get(field)
+            if value is None:
+                continue
+            if isinstance(value, str):
+                clean = cache.get(value)
+                if clean is None:
+                    clean = cache[value] = sanitize_text(value)
+                sanitized[field] = clean
+            else:
+                sanitized[field] = sanitize_text(value)
+        sanitized_records.append(sanitized)
+    return sanitized_records
+
+
+def sanitize_batch(batch: ReadingsBatch, text_fields: List[str]) -> ReadingsBatch:
+    """
+    Sanitize text fields of a ReadingsBatch.
+
+    Same result as `sanitize_records` on its readings; a batch keeps its text on the stations,
+    so each station is sanitized once however many readings it has. Batches already marked
+    `text_clean` are returned as they are.
+    """
+    if batch.text_clean:
+        return batch
+    batch = batch.map_station_text(sanitize_text, text_fields)
+    batch.text_clean = True
+    return batch
+
+
+# Free-text fields sanitized before records are saved
+TEXT_FIELDS = [
+    "location_name",
+    "state",
+    "district",
+    "city",
+    "station_name",
+    "source_name",
+    "organization",
+]
+
+
+def parse_page(raw_data: Dict[str, Any], run_id: str = "-") -> ReadingsBatch:
+    """
+    Normalize and sanitize one data.gov.in page.
+
+    Module-level so it can run on the parse pool: the worker hands back a batch that
+    `save_to_database` does not have to sanitize again.
+    """
+    return sanitize_batch(process_data_gov_in_batch(raw_data, run_id), TEXT_FIELDS)
+
+
+def parse_archived_page(path: str, run_id: str = "-") -> ReadingsBatch:
+    """Same as `parse_page` for a page kept in the landing zone."""
+    return sanitize_batch(process_archived_page(path, run_id), TEXT_FIELDS)
+
+
+# Temp table used to stage COPY loads of readings before merging them
+READINGS_STAGING_TABLE = "water_quality_readings_staging"
+READINGS_COPY_COLUMNS = "location_id, parameter_id, value, measurement_date, source"
 
 # Setup logging
 _script_dir = Path(__file__).parent
@@ -75,33 +171,38 @@ class WaterQualityDataFetcher:
         self.session: Optional[aiohttp.ClientSession] = None
         self.use_postgres = True  # Flag to toggle Postgres usage
         self.run_id = os.getenv("AQUA_RUN_ID") or uuid.uuid4().hex
+        self.metrics = RunMetrics.from_env(self.run_id, _script_dir)
         self.allow_sample_data = os.getenv("ALLOW_SAMPLE_DATA", "false").lower() == "true"
+        self.rate_limiter = RateLimiter(GOVERNMENT_APIS)
+        self.parse_executor: Optional[Executor] = None
+        self.dimension_cache = DimensionCache.from_env()
+        self.sqlite_layout = sqlite_store.FLAT
+        self.incremental = os.getenv("DATA_PIPELINE_INCREMENTAL", "false").lower() == "true"
+        self.watermarks = WatermarkStore.from_env(_script_dir)
+        self.pending_watermarks: Dict[str, Watermark] = {}
+        self.landing_zone = LandingZone.from_env()
+        self.weather_cache = WeatherCache.from_env(_script_dir)
+        self.weather_semaphore = asyncio.Semaphore(
+            max(1, int(os.getenv("WEATHER_CONCURRENCY", "8")))
+        )
+        self.weather_lookups: Dict[Cell, asyncio.Task] = {}
+        self.alert_mode = alert_mode()
+        self.alert_engine = AlertEngine() if self.alert_mode == "python" else None
         self.setup_database()
-
-    def get_postgres_connection(self):
-        """Get PostgreSQL database connection"""
-        try:
-            conn_str = DB_CONFIG.connection_string
-            logger.info(f"[run_id={self.run_id}] Connecting to PostgreSQL via standardized config")
-            return psycopg2.connect(conn_str, sslmode="require")
-        except Exception as e:
-            logger.error(f"[run_id={self.run_id}] Failed to connect to PostgreSQL: {e}")
-            return None
+        self.deduplicator = ReadingDeduplicator.from_env(self.storage_identity())
 
     def setup_database(self):
         """Initialize database (Postgres or SQLite fallback)"""
         allow_sqlite = os.getenv("ALLOW_SQLITE_FALLBACK", "false").lower() == "true"
 
         if self.use_postgres:
-            conn = self.get_postgres_connection()
-            if conn:
+            if db_pool.check_connection():
                 logger.info(
                     f"[run_id={self.run_id}] Connected to PostgreSQL database "
                     f"(host={DB_CONFIG.host} port={DB_CONFIG.port} db={DB_CONFIG.database} user={DB_CONFIG.username})"
                 )
                 # We assume schema is managed by backend migrations (Knex)
                 # But we can verify if tables exist if needed
-                conn.close()
                 return
             else:
                 if allow_sqlite:
@@ -119,7 +220,7 @@ class WaterQualityDataFetcher:
                     )
 
         # SQLite Fallback
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_store.connect(self.db_path)
         cursor = conn.cursor()
 
         def create_water_quality_readings_table() -> None:
@@ -156,15 +257,6 @@ class WaterQualityDataFetcher:
                 pass
             return False
 
-        if not check_unique_constraint():
-            logger.warning(
-                f"[run_id={self.run_id}] water_quality_readings missing expected unique "
-                "constraint; dropping and recreating table (existing data will be lost)"
-            )
-            cursor.execute("DROP TABLE IF EXISTS water_quality_readings")
-
-        create_water_quality_readings_table()
-
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS locations (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -178,6 +270,35 @@ class WaterQualityDataFetcher:
             )
         """)
 
+        # The normalized layout is kept once a file has it; a flat table is migrated when
+        # SQLITE_SCHEMA=normalized is requested.
+        layout = sqlite_store.reading_layout(conn)
+        if layout == sqlite_store.NORMALIZED or (
+            layout is None and sqlite_store.requested_layout() == sqlite_store.NORMALIZED
+        ):
+            sqlite_store.create_normalized_schema(cursor)
+            self.sqlite_layout = sqlite_store.NORMALIZED
+        elif (
+            check_unique_constraint()
+            and sqlite_store.requested_layout() == sqlite_store.NORMALIZED
+        ):
+            logger.info(
+                f"[run_id={self.run_id}] Migrating SQLite readings to the normalized layout"
+            )
+            sqlite_store.migrate_to_normalized(conn)
+            self.sqlite_layout = sqlite_store.NORMALIZED
+        else:
+            if not check_unique_constraint():
+                logger.warning(
+                    f"[run_id={self.run_id}] water_quality_readings missing expected unique "
+                    "constraint; dropping and recreating table (existing data will be lost)"
+                )
+                cursor.execute("DROP TABLE IF EXISTS water_quality_readings")
+
+            create_water_quality_readings_table()
+            sqlite_store.create_reading_indexes(cursor)
+            self.sqlite_layout = sqlite_store.FLAT
+
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS data_sources (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -195,9 +316,27 @@ class WaterQualityDataFetcher:
             f"[run_id={self.run_id}] SQLite database initialized successfully (db_path={self.db_path})"
         )
 
+    @staticmethod
+    def create_parse_executor() -> Optional[Executor]:
+        """
+        Build the worker pool used to parse data.gov.in pages, or None to parse on the event loop.
+
+        DATA_PIPELINE_PARSE_WORKERS sets the pool size ("auto" uses every CPU; 0, the default,
+        keeps parsing inline). DATA_PIPELINE_PARSE_EXECUTOR picks "process" (default) or "thread".
+        """
+        workers_env = os.getenv("DATA_PIPELINE_PARSE_WORKERS", "0").strip().lower()
+        workers = (os.cpu_count() or 1) if workers_env == "auto" else int(workers_env or 0)
+        if workers <= 0:
+            return None
+        if os.getenv("DATA_PIPELINE_PARSE_EXECUTOR", "process").strip().lower() == "thread":
+            return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+        return ProcessPoolExecutor(max_workers=workers)
+
     async def __aenter__(self) -> "WaterQualityDataFetcher":
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession()
+        # Executor first: __aexit__ does not run when __aenter__ raises, so nothing may be left open
+        self.parse_executor = self.create_parse_executor()
+        self.session = aiohttp.ClientSession(trace_configs=[self.metrics.trace_config()])
         return self
 
     async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
@@ -208,6 +347,21 @@ class WaterQualityDataFetcher:
         """
         if self.session:
             await self.session.close()  # type: ignore
+        if self.parse_executor is not None:
+            self.parse_executor.shutdown(cancel_futures=True)
+            self.parse_executor = None
+        await asyncio.to_thread(self.write_metrics, "failed" if exc_type else "success")
+
+    def write_metrics(self, status: str = "success") -> Dict[str, Any]:
+        """Write this run's JSON report and Prometheus textfile and log the slowest stages"""
+        report = self.metrics.write(status)
+        stages = sorted(report["stages"].items(), key=lambda item: -item[1]["seconds"])
+        timings = ", ".join(f"{name}={stats['seconds']:.2f}s" for name, stats in stages[0:5])
+        logger.info(
+            f"[run_id={self.run_id}] Run {status} in {report['duration_seconds']:.2f}s "
+            f"({report['records_per_second'] or 0:.1f} records/s); {timings or 'no stages'}"
+        )
+        return report
 
     async def _fetch_from_resource(self, config_key: str) -> List[Dict[str, Any]]:
         """Generic helper to fetch data from a data.gov.in resource"""
@@ -225,6 +379,29 @@ class WaterQualityDataFetcher:
         Raises:
             RuntimeError: If the resource has no API key and ALLOW_SAMPLE_DATA is false, or if an API request fails and sample data is not permitted.
         """
+        all_processed: List[Dict[str, Any]] = []
+        async with aclosing(self._iter_resource_pages(config_key)) as pages:
+            async for processed in pages:
+                all_processed.extend(processed.to_records())
+        return all_processed
+
+    async def _iter_resource_pages(self, config_key: str) -> AsyncIterator[ReadingsBatch]:
+        """
+        Yield processed readings from a data.gov.in resource one ReadingsBatch per page, in offset
+        order.
+
+        Once the first page reports `total`, up to DATA_GOV_IN_CONCURRENCY later offset windows are
+        fetched ahead of the consumer. New windows are only requested as pages are consumed, so a
+        slow consumer holds back the producer instead of letting pages pile up in memory. The
+        sample-data fallback rules are the same as in `_fetch_from_resource`; pages that were
+        already yielded before a failure are kept. Pages are parsed on `parse_executor` when one
+        is configured, so later windows keep downloading while earlier ones are parsed.
+
+        With DATA_PIPELINE_INCREMENTAL=true the source's watermark decides where to start: an
+        unchanged first page and a grown total mean only the new tail is fetched (and the first
+        page is not yielded again). A full sweep runs when there is no watermark, earlier pages
+        changed, or DATA_PIPELINE_FULL_SWEEP_HOURS have passed since the last one.
+        """
         config = GOVERNMENT_APIS[config_key]
         logger.info(f"[run_id={self.run_id}] Fetching data for {config_key} from {config.base_url}")
 
@@ -234,91 +411,184 @@ class WaterQualityDataFetcher:
                     f"API key for {config_key} is required when ALLOW_SAMPLE_DATA is false"
                 )
             logger.warning(f"[run_id={self.run_id}] No API key for {config_key}, using sample data")
-            return self._generate_sample_data(config_key)
+            yield ReadingsBatch.from_records(self._generate_sample_data(config_key))
+            return
 
+        url = f"{config.base_url}{config.resource_id}"
+        limit = int(os.getenv("DATA_GOV_IN_LIMIT", "1000"))
+        headers = {
+            "Accept": "application/json",
+            "User-Agent": "Aqua-AI/1.0",
+            "X-Api-Key": config.api_key,
+        }
+        max_pages = int(os.getenv("DATA_GOV_IN_MAX_PAGES", "10"))  # Reduced for CPCB specifically
+        concurrency = max(1, int(os.getenv("DATA_GOV_IN_CONCURRENCY", "4")))
+
+        async def fetch_page(offset: int) -> tuple[ReadingsBatch, Dict[str, Any]]:
+            started = time.perf_counter()
+            data = await self._fetch_page(config_key, url, headers, offset, limit)
+            elapsed = time.perf_counter() - started
+            self.metrics.observe("page_fetch_seconds", elapsed)
+            self.metrics.record_stage("fetch", elapsed)
+            self.metrics.count("pages")
+            if self.landing_zone is not None:
+                with self.metrics.stage("archive"):
+                    await self._archive_page(config_key, offset, data)
+            with self.metrics.stage("parse"):
+                # Normalized readings are already tagged with source "government"
+                processed = await self._parse_page(data)
+            return processed, data
+
+        pending: Deque[asyncio.Task] = deque()
         try:
-            url = f"{config.base_url}{config.resource_id}"
-            limit = int(os.getenv("DATA_GOV_IN_LIMIT", "1000"))
-            headers = {
-                "Accept": "application/json",
-                "User-Agent": "Aqua-AI/1.0",
-                "X-Api-Key": config.api_key,
-            }
-
-            all_processed = []
-            offset = 0
-            total = None
-            max_pages = int(
-                os.getenv("DATA_GOV_IN_MAX_PAGES", "10")
-            )  # Reduced for CPCB specifically
-            page = 0
-
-            while page < max_pages:
-                params = {
-                    "api-key": config.api_key,
-                    "format": "json",
-                    "limit": limit,
-                    "offset": offset,
-                }
-
-                assert self.session is not None
-                async with self.session.get(url, params=params, headers=headers) as response:  # type: ignore
-                    if response.status != 200:
-                        response_text = (await response.text())[:500]
-                        logger.error(
-                            f"[run_id={self.run_id}] API request failed for {config_key}: {response.status} body={response_text}"
-                        )
-                        if not self.allow_sample_data:
-                            raise RuntimeError(
-                                f"{config_key} request failed with status {response.status}: {response_text}"
-                            )
-                        return self._generate_sample_data(config_key)
-
-                    data = await response.json()
-                    processed = self._process_data_gov_in(data)
-
-                    # Tag with source
-                    for record in processed:
-                        record["source"] = "government"  # Mapped to schema enum
-
-                    all_processed.extend(processed)
-
-                    try:
-                        total = int(data.get("total")) if data.get("total") is not None else total
-                    except (ValueError, TypeError):
-                        pass
-
-                    page_count = data.get("count")
-                    if page_count is None:
-                        page_count = len(data.get("records") or [])
-                    try:
-                        page_count = int(page_count)
-                    except (ValueError, TypeError):
-                        page_count = len(data.get("records") or [])
-
+            processed, data = await fetch_page(0)
+            total, page_count, page_limit = self._page_bounds(data, limit)
+
+            # In incremental mode the watermark decides which pages can hold new data
+            plan: Optional[FetchPlan] = None
+            first_hash = ""
+            if self.incremental:
+                first_hash = page_hash(data.get("records") or [])
+                plan = self.watermarks.plan(config_key, total, page_limit, first_hash)
+                logger.info(
+                    f"[run_id={self.run_id}] {config_key}: "
+                    f"{'full sweep' if plan.full_sweep else 'incremental fetch'} ({plan.reason})"
+                )
+            start_offset = page_limit if plan is None else plan.start_offset
+            fetched_until = page_count if plan is None or plan.full_sweep else start_offset
+            newest_date = None
+            if plan is None or plan.full_sweep:
+                newest_date = self._newest_measurement_date(processed, newest_date)
+                yield processed
+
+            if page_count <= 0 or max_pages <= 1:
+                pass
+            elif total is None:
+                # Without a total we cannot plan the offset windows up front, so
+                # walk the remaining pages one after another.
+                offset = page_limit
+                page = 1
+                while page < max_pages:
+                    processed, data = await fetch_page(offset)
+                    newest_date = self._newest_measurement_date(processed, newest_date)
+                    yield processed
+                    total, page_count, page_limit = self._page_bounds(data, limit, total)
+                    fetched_until = offset + max(page_count, 0)
                     if page_count <= 0:
                         break
-
-                    try:
-                        page_limit = (
-                            int(data.get("limit")) if data.get("limit") is not None else limit
-                        )
-                    except (ValueError, TypeError):
-                        page_limit = limit
-
                     offset += page_limit
                     page += 1
-
-                    if total is not None and offset >= int(total):  # type: ignore
+                    if total is not None and offset >= total:
                         break
-
-            return all_processed
+            else:
+                offset_list = list(range(start_offset, total, page_limit))[0 : max_pages - 1]
+                offsets = iter(offset_list)
+                logger.info(
+                    f"[run_id={self.run_id}] Fetching remaining pages for {config_key} "
+                    f"(total={total}, pages={len(offset_list)}, concurrency={concurrency})"
+                )
+                for offset in islice(offsets, concurrency):
+                    pending.append(asyncio.ensure_future(fetch_page(offset)))
+                for offset in offset_list:
+                    processed, data = await pending.popleft()
+                    for next_offset in islice(offsets, 1):
+                        pending.append(asyncio.ensure_future(fetch_page(next_offset)))
+                    newest_date = self._newest_measurement_date(processed, newest_date)
+                    fetched_until = min(total, offset + len(data.get("records") or []))
+                    yield processed
+
+            if plan is not None:
+                # Committed by fetch_all_data once every page of the source has been saved
+                self.pending_watermarks[config_key] = self.watermarks.advance(
+                    config_key, plan, fetched_until, page_limit, first_hash, newest_date
+                )
 
         except Exception as e:
             logger.error(f"[run_id={self.run_id}] Error fetching from {config_key}: {str(e)}")
             if not self.allow_sample_data:
                 raise
-            return self._generate_sample_data(config_key)
+            yield ReadingsBatch.from_records(self._generate_sample_data(config_key))
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    @staticmethod
+    def _newest_measurement_date(batch: ReadingsBatch, newest: Optional[str]) -> Optional[str]:
+        dates = [d for d in (batch.newest_date(), newest) if d]
+        return max(dates, default=None)
+
+    async def _archive_page(self, config_key: str, offset: int, data: Dict[str, Any]) -> None:
+        """Keep the raw page in the landing zone; a full disk must not fail the fetch."""
+        try:
+            await asyncio.to_thread(
+                self.landing_zone.write, config_key, offset, self.run_id, data  # type: ignore
+            )
+        except OSError as e:
+            logger.warning(f"[run_id={self.run_id}] Could not archive {config_key}@{offset}: {e}")
+
+    async def _parse_page(self, data: Dict[str, Any]) -> ReadingsBatch:
+        """
+        Normalize and sanitize one page, on the parse pool when there is one so fetching
+        carries on.
+
+        Pages come back as a ReadingsBatch, which also keeps what a process pool has to pickle
+        down to a few arrays and one entry per station.
+        """
+        if self.parse_executor is None:
+            return parse_page(data, self.run_id)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, parse_page, data, self.run_id)
+
+    async def _fetch_page(
+        self, config_key: str, url: str, headers: Dict[str, str], offset: int, limit: int
+    ) -> Dict[str, Any]:
+        """Request a single offset window from a data.gov.in resource."""
+        config = GOVERNMENT_APIS[config_key]
+        params = {
+            "api-key": config.api_key,
+            "format": "json",
+            "limit": limit,
+            "offset": offset,
+        }
+
+        assert self.session is not None
+        return await self.rate_limiter.request_json(
+            self.session, config, url, params=params, headers=headers, label=config_key
+        )
+
+    @staticmethod
+    def _page_bounds(
+        data: Dict[str, Any], limit: int, total: Optional[int] = None
+    ) -> tuple[Optional[int], int, int]:
+        """Read `total`, record count and page size from a data.gov.in response."""
+        try:
+            total = int(data.get("total")) if data.get("total") is not None else total
+        except (ValueError, TypeError):
+            pass
+
+        page_count = data.get("count")
+        if page_count is None:
+            page_count = len(data.get("records") or [])
+        try:
+            page_count = int(page_count)
+        except (ValueError, TypeError):
+            page_count = len(data.get("records") or [])
+
+        try:
+            page_limit = int(data.get("limit")) if data.get("limit") is not None else limit
+        except (ValueError, TypeError):
+            page_limit = limit
+        if page_limit <= 0:
+            page_limit = limit
+
+        return total, page_count, page_limit
+
+    @staticmethod
+    def scheduled_sources() -> List[str]:
+        """Keys of GOVERNMENT_APIS entries served as data.gov.in resources (have a resource_id)."""
+        return [key for key, api in GOVERNMENT_APIS.items() if api.resource_id]
 
     async def fetch_data_gov_in(self) -> List[Dict[str, Any]]:
         """Fetch data from data.gov.in API"""
@@ -351,13 +621,20 @@ class WaterQualityDataFetcher:
 
     async def fetch_weather_data(self, locations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Fetch current weather observations for up to five provided locations for correlation with water-quality data.
+        Fetch current weather observations for the provided locations for correlation with
+        water-quality data.
+
+        Locations are grouped into WEATHER_GRID_DEGREES grid cells (0.1° by default) and each cell
+        is looked up once, at its centre, with up to WEATHER_CONCURRENCY requests in flight.
+        Observations younger than WEATHER_CACHE_TTL_SECONDS are served from the weather cache,
+        and a cell already being looked up for another batch is awaited rather than requested again.
 
         Parameters:
             locations (List[Dict]): Iterable of location objects; each must contain keys "name", "latitude", and "longitude".
 
         Returns:
-            List[Dict[str, Any]]: A list of weather records (one per location, up to the first five). Each record contains the keys:
+            List[Dict[str, Any]]: A list of weather records (one per location whose cell lookup
+            succeeded). Each record contains the keys:
                 - "location_name": location name
                 - "temperature": ambient temperature in degrees Celsius
                 - "humidity": relative humidity percentage
@@ -374,100 +651,95 @@ class WaterQualityDataFetcher:
             logger.warning(f"[run_id={self.run_id}] No weather API key, skipping weather data")
             return []
 
-        weather_data = []
-
-        for location in locations[0:5]:  # Limit to 5 locations for demo  # type: ignore
-            try:
-                url = f"{GOVERNMENT_APIS['weather_api'].base_url}weather"
-                params = {
-                    "lat": location["latitude"],
-                    "lon": location["longitude"],
-                    "appid": GOVERNMENT_APIS["weather_api"].api_key,
-                    "units": "metric",
-                }
+        cells: Dict[Cell, List[Dict[str, Any]]] = {}
+        for location in locations:
+            if location.get("latitude") is None or location.get("longitude") is None:
+                continue
+            cell = self.weather_cache.cell_for(location["latitude"], location["longitude"])
+            cells.setdefault(cell, []).append(location)
+
+        lookups = []
+        for cell in cells:
+            task = self.weather_lookups.get(cell)
+            if task is None:
+                task = asyncio.create_task(self._fetch_weather_cell(cell))
+                self.weather_lookups[cell] = task
+                task.add_done_callback(lambda _, cell=cell: self.weather_lookups.pop(cell, None))
+            lookups.append(task)
+        observations = await asyncio.gather(*lookups, return_exceptions=True)
 
-                assert self.session is not None
-                async with self.session.get(url, params=params) as response:  # type: ignore
-                    if response.status == 200:
-                        data = await response.json()
-                        weather_data.append(
-                            {
-                                "location_name": location["name"],
-                                "temperature": data["main"]["temp"],
-                                "humidity": data["main"]["humidity"],
-                                "pressure": data["main"]["pressure"],
-                                "wind_speed": data["wind"]["speed"],
-                                "weather_condition": data["weather"][0]["main"],
-                                "measurement_date": datetime.now().strftime("%Y-%m-%d"),
-                                "source": "weather_api",
-                            }
-                        )
-            except Exception as e:
-                logger.error(f"[run_id={self.run_id}] Error fetching weather data: {str(e)}")
+        weather_data = []
+        for (cell, members), observation in zip(cells.items(), observations):
+            if isinstance(observation, BaseException):
+                logger.error(
+                    f"[run_id={self.run_id}] Error fetching weather data for cell {cell}: "
+                    f"{str(observation)}"
+                )
                 continue
+            for location in members:
+                weather_data.append({"location_name": location["name"], **observation})
 
+        # Snapshot on the event loop: other lookups keep adding observations while the thread writes
+        observations = self.weather_cache.snapshot()
+        if observations is not None:
+            await asyncio.to_thread(self.weather_cache.write, observations)
+        logger.info(
+            f"[run_id={self.run_id}] Weather for {len(weather_data)} locations "
+            f"from {len(cells)} grid cells"
+        )
         return weather_data
 
+    async def _fetch_weather_cell(self, cell: Cell) -> Dict[str, Any]:
+        """One observation for a grid cell, from the cache when it is still fresh."""
+        observation = self.weather_cache.get(cell)
+        if observation is not None:
+            return observation
+
+        weather_api = GOVERNMENT_APIS["weather_api"]
+        params = {
+            "lat": cell[0],
+            "lon": cell[1],
+            "appid": weather_api.api_key,
+            "units": "metric",
+        }
+        assert self.session is not None
+        self.metrics.count("weather_requests")
+        async with self.weather_semaphore:
+            with self.metrics.stage("weather"):
+                data = await self.rate_limiter.request_json(
+                    self.session,
+                    weather_api,
+                    f"{weather_api.base_url}weather",
+                    params=params,
+                    label="weather_api",
+                )
+        observation = {
+            "temperature": data["main"]["temp"],
+            "humidity": data["main"]["humidity"],
+            "pressure": data["main"]["pressure"],
+            "wind_speed": data["wind"]["speed"],
+            "weather_condition": data["weather"][0]["main"],
+            "measurement_date": datetime.now().strftime("%Y-%m-%d"),
+            "source": "weather_api",
+        }
+        self.weather_cache.put(cell, observation)
+        return observation
+
     def _generate_sample_data(self, source: str) -> List[Dict[str, Any]]:
         """Generate sample water quality data for development"""
         if not self.allow_sample_data:
             raise RuntimeError("Sample data generation is disabled")
         logger.info(f"[run_id={self.run_id}] Generating sample data for {source}")
 
-        data = []
-        np.random.seed(42)
-
-        # Generate data for each state and their water bodies
-        for state, info in INDIAN_WATER_BODIES.items():
-            for river in info.get("rivers", []):  # type: ignore
-                # Generate 10-20 readings per river
-                num_readings = np.random.randint(10, 21)
-
-                for _ in range(num_readings):
-                    # Random date within last 30 days
-                    days_ago = np.random.randint(0, 30)
-                    date = datetime.now() - timedelta(days=days_ago)
-
-                    # Random location along the river
-                    base_lat, base_lon = info["coordinates"]  # type: ignore
-                    lat = base_lat + np.random.uniform(-0.5, 0.5)
-                    lon = base_lon + np.random.uniform(-0.5, 0.5)
-
-                    # Generate readings for each parameter
-                    for param, config in cast(dict, WATER_QUALITY_PARAMETERS).items():  # type: ignore
-                        # Generate realistic values based on parameter type
-                        if param == "pH":
-                            value = np.random.normal(7.0, 1.0)
-                        elif param in ["Lead", "Mercury"]:
-                            value = np.random.lognormal(-4, 1)
-                        elif param == "Coliform":
-                            value = np.random.lognormal(2, 1)
-                        else:
-                            value = np.random.normal(
-                                config["safe_limit"] * 0.8, config["safe_limit"] * 0.3
-                            )
-
-                        # Ensure positive values
-                        value = max(0.001, value)
-
-                        data.append(
-                            {
-                                "location_name": f"{river} at {state}",
-                                "state": state,
-                                "district": f"District {np.random.randint(1, 10)}",
-                                "latitude": lat,
-                                "longitude": lon,
-                                "parameter": param,
-                                "value": round(float(value), 3),  # type: ignore
-                                "unit": config["unit"],
-                                "measurement_date": date.strftime("%Y-%m-%d"),
-                                "source": (
-                                    "government" if source in ["data_gov_in", "cpcb"] else "sensor"
-                                ),
-                            }
-                        )
-
-        return data
+        # Readings from every configured river over the last 30 days
+        readings = generate_readings(
+            int(os.getenv("DATA_PIPELINE_SAMPLE_READINGS", "3720")),
+            seed=42,
+            start=datetime.now().date() - timedelta(days=29),
+            days=30,
+            source="government" if source in ["data_gov_in", "cpcb"] else "sensor",
+        )
+        return to_records(readings)
 
     def _process_data_gov_in(self, raw_data: Dict) -> List[Dict[str, Any]]:
         """
@@ -498,413 +770,163 @@ class WaterQualityDataFetcher:
                 - source (str) — set to "government"
             Returns an empty list when the input contains no usable records.
         """
-        logger.info(f"[run_id={self.run_id}] Processing data from data.gov.in")
-
-        if not raw_data or "records" not in raw_data:
-            logger.warning(f"[run_id={self.run_id}] No records found in data.gov.in response")
-            return []
-
-        processed_data = []
-        records = raw_data["records"]
-        first_record_keys = None
-        state_key_by_normalized = {k.lower().strip(): k for k in INDIAN_WATER_BODIES.keys()}
-        title = str(raw_data.get("title") or "")
-        year_match = re.search(r"(?:19|20)\d{2}", title)
-        default_measurement_date = datetime.now().strftime("%Y-%m-%d")
-        if year_match:
-            default_measurement_date = f"{year_match.group(0)}-01-01"
-
-        # Mapping for fuzzy matching of fields
-        # Key: Standardized field name
-        # Value: List of potential field names in API response
-        field_mapping = {
-            "state": ["state", "state_name", "state name"],
-            "district": ["district", "district_name", "city"],
-            "location": [
-                "location",
-                "location_name",
-                "locations",
-                "station_name",
-                "station",
-                "station_code",
-                "water quality locations",
-                "water_quality_locations",
-            ],
-            "latitude": ["latitude", "lat"],
-            "longitude": ["longitude", "long", "lon"],
-        }
-
-        # Parameter mapping
-        # Key: Parameter name in WATER_QUALITY_PARAMETERS
-        # Value: List of potential field names in API response
-        param_mapping = {
-            "BOD": [
-                "biochemical oxygen demand-mean",
-                "biochemical_oxygen_demand-mean",
-                "biochemical_oxygen_demand_b_o_d_mg_l__mean",
-                "bod",
-                "b.o.d",
-                "biochemical_oxygen_demand",
-                "bod_mg_l",
-                "biochemical_oxygen_demand_mg_l",
-                "biochemical_oxygen_demand_b_o_d_mg_l",
-            ],
-            "TDS": [
-                "conductivity-mean",
-                "conductivity_mhos_cm__mean",
-                "tds",
-                "total_dissolved_solids",
-                "total_dissolved_solids_mg_l",
-                "conductivity_mhos_cm",
-                "total_dissolved_solid_mg_l",
-            ],
-            "pH": ["ph-mean", "ph_mean", "ph", "p_h", "ph_level", "p_h_level"],
-            "DO": [
-                "dissolved oxygen-mean",
-                "dissolved_oxygen-mean",
-                "dissolved_oxygen_d_o_mg_l__mean",
-                "do",
-                "d.o",
-                "dissolved_oxygen",
-                "dissolved_oxygen_mg_l",
-                "dissolved_oxygen_d_o_mg_l",
-            ],
-            "Lead": ["lead", "pb", "lead_pb", "lead_mg_l"],
-            "Mercury": ["mercury", "hg", "mercury_hg", "mercury_mg_l"],
-            "Coliform": [
-                "fecal coliform-mean",
-                "fecal_coliform-mean",
-                "fecal_coliform_mpn_100ml__mean",
-                "total_coliform_mpn_100ml__mean",
-                "coliform",
-                "total_coliform",
-                "fecal_coliform",
-                "fecal_coliform_mpn_100ml",
-                "total_coliform_mpn_100ml",
-            ],
-            "Nitrates": [
-                "nitrate-mean",
-                "nitrate__n_nitrite_n_mg_l__mean",
-                "nitrate",
-                "nitrates",
-                "no3",
-                "nitrate_n_nitrite_n_mg_l",
-                "nitrate_mg_l",
-            ],
-        }
-
-        for record in records:
-            try:
-                # normalize keys to lowercase for matching
-                record_lower: Dict[str, Any] = {str(k).lower(): v for k, v in record.items()}
-                if first_record_keys is None:
-                    first_record_keys = sorted(list(record_lower.keys()))
-
-                # Extract location info
-                state = None
-                for key in field_mapping.get("state", []):
-                    if key in record_lower:
-                        state = record_lower[key]
-                        break
-                if isinstance(state, str):
-                    state = state.strip().replace('"', "").replace("'", "")
-                    state = " ".join(state.split())
-
-                district = None
-                for key in field_mapping.get("district", []):
-                    if key in record_lower:
-                        district = record_lower[key]
-                        break
-                if isinstance(district, str):
-                    district = district.strip().replace('"', "").replace("'", "")
-                    district = " ".join(district.split())
-
-                location_name = None
-                for key in field_mapping.get("location", []):
-                    if key in record_lower:
-                        location_name = record_lower[key]
-                        break
-                if isinstance(location_name, str):
-                    location_name = location_name.strip().replace('"', "").replace("'", "")
-                    location_name = " ".join(location_name.split())
-
-                # Default location name if missing
-                if not location_name:
-                    if district and state:
-                        location_name = f"Station in {district}, {state}"
-                    elif state:
-                        location_name = f"Station in {state}"
-                    else:
-                        location_name = "Unknown Location"
-
-                latitude = None
-                for key in field_mapping.get("latitude", []):
-                    if key in record_lower:
-                        try:
-                            latitude = float(record_lower[key])
-                        except (ValueError, TypeError):
-                            pass
-                        break
-
-                longitude = None
-                for key in field_mapping.get("longitude", []):
-                    if key in record_lower:
-                        try:
-                            longitude = float(record_lower[key])
-                        except (ValueError, TypeError):
-                            pass
-                        break
-
-                # If lat/long missing, try to estimate from state (very rough fallback)
-                if latitude is None or longitude is None:
-                    normalized_state = state.lower().strip() if isinstance(state, str) else None
-                    if normalized_state and normalized_state in state_key_by_normalized:
-                        state_key = state_key_by_normalized[normalized_state]  # type: ignore
-                        base_lat, base_lon = (
-                            cast(dict, INDIAN_WATER_BODIES)
-                            .get(state_key, {})
-                            .get("coordinates", (0.0, 0.0))
-                        )
-                        latitude = base_lat + random.uniform(-0.15, 0.15)
-                        longitude = base_lon + random.uniform(-0.15, 0.15)
-                    else:
-                        base_lat, base_lon = 22.9734, 78.6569
-                        latitude = base_lat + random.uniform(-2.0, 2.0)
-                        longitude = base_lon + random.uniform(-2.0, 2.0)
-
-                # measurement date
-                measurement_date = default_measurement_date
-                # Try to find a date field
-                for date_key in [
-                    "date",
-                    "created_date",
-                    "updated_date",
-                    "timestamp",
-                    "measurement_date",
-                    "year",
-                ]:
-                    if date_key in record_lower:
-                        try:
-                            # Parse date using dateutil which is robust
-                            dt = date_parser.parse(str(record_lower[date_key]))
-                            measurement_date = dt.strftime("%Y-%m-%d")
-                            break
-                        except (ValueError, TypeError):
-                            continue
-
-                # Extract parameters
-                any_parameter_added = False
-                for param, potential_keys in param_mapping.items():
-                    value = None
-                    for key in potential_keys:
-                        if key in record_lower:  # type: ignore
-                            try:
-                                val_str = str(record_lower[key]).strip()  # type: ignore
-                                if val_str and val_str.lower() != "na" and val_str.lower() != "nan":
-                                    value = float(val_str)
-                                    break
-                            except (ValueError, TypeError):
-                                continue
-
-                    if value is not None:
-                        processed_data.append(
-                            {
-                                "location_name": location_name,
-                                "state": state or "Unknown State",
-                                "district": district,
-                                "latitude": latitude,
-                                "longitude": longitude,
-                                "parameter": param,
-                                "value": value,
-                                "unit": WATER_QUALITY_PARAMETERS[param]["unit"],
-                                "measurement_date": measurement_date,
-                                "source": "government",  # Mapped to schema enum
-                            }
-                        )
-                        any_parameter_added = True
-
-                if not any_parameter_added:
-                    candidate_param = None
-                    for key in [
-                        "parameter",
-                        "param",
-                        "parameter_name",
-                        "parameter code",
-                        "parameter_code",
-                        "indicator",
-                        "variable",
-                    ]:
-                        if key in record_lower and record_lower[key]:
-                            candidate_param = str(record_lower[key]).strip()
-                            break
-
-                    candidate_value = None
-                    for key in [
-                        "value",
-                        "val",
-                        "result",
-                        "reading",
-                        "measurement",
-                        "measured_value",
-                    ]:
-                        if key in record_lower and record_lower[key] is not None:  # type: ignore
-                            candidate_value = record_lower[key]  # type: ignore
-                            break
-
-                    if candidate_param is not None and candidate_value is not None:
-                        normalized_param = (
-                            candidate_param.lower()
-                            .replace("_", " ")
-                            .replace("-", " ")
-                            .replace(".", " ")
-                        )
-                        normalized_param = " ".join(normalized_param.split())
-
-                        mapped_param = None
-                        if normalized_param in ["bod", "b o d", "biochemical oxygen demand"]:
-                            mapped_param = "BOD"
-                        elif normalized_param in ["tds", "total dissolved solids", "conductivity"]:
-                            mapped_param = "TDS"
-                        elif normalized_param in ["ph", "p h", "ph level"]:
-                            mapped_param = "pH"
-                        elif normalized_param in ["do", "d o", "dissolved oxygen"]:
-                            mapped_param = "DO"
-                        elif "coliform" in normalized_param:
-                            mapped_param = "Coliform"
-                        elif "nitrate" in normalized_param or normalized_param == "no3":
-                            mapped_param = "Nitrates"
-                        elif normalized_param in ["lead", "pb"]:
-                            mapped_param = "Lead"
-                        elif normalized_param in ["mercury", "hg"]:
-                            mapped_param = "Mercury"
-
-                        if mapped_param:
-                            try:
-                                val_str = str(candidate_value).strip()
-                                if val_str and val_str.lower() not in [
-                                    "na",
-                                    "nan",
-                                    "null",
-                                    "none",
-                                    "",
-                                ]:
-                                    processed_data.append(
-                                        {
-                                            "location_name": location_name,
-                                            "state": state or "Unknown State",
-                                            "district": district,
-                                            "latitude": latitude,
-                                            "longitude": longitude,
-                                            "parameter": mapped_param,
-                                            "value": float(val_str),
-                                            "unit": WATER_QUALITY_PARAMETERS[mapped_param]["unit"],
-                                            "measurement_date": measurement_date,
-                                            "source": "government",
-                                        }
-                                    )
-                            except (ValueError, TypeError):
-                                pass
-
-            except Exception as e:
-                logger.warning(f"Error processing record: {str(e)}")
-                continue
+        return process_data_gov_in(raw_data, self.run_id)
 
-        if not processed_data:
-            logger.warning(
-                f"[run_id={self.run_id}] Parsed 0 readings from data.gov.in; first record keys: {first_record_keys}"
-            )
-
-        return processed_data
+    def save_to_database(self, data: Union[ReadingsBatch, List[Dict[str, Any]]]) -> bool:
+        """
+        Save fetched data (a ReadingsBatch or reading dicts) to database (Postgres or SQLite).
 
-    def save_to_database(self, data: List[Dict[str, Any]]):
-        """Save fetched data to database (Postgres or SQLite)"""
-        if not data:
+        Returns False when the database write failed and was rolled back, True otherwise.
+        """
+        if not len(data):
             logger.warning(f"[run_id={self.run_id}] No data to save")
-            return
-
-        # Before inserting data, sanitize text fields
-        TEXT_FIELDS = [
-            "location_name",
-            "state",
-            "district",
-            "city",
-            "station_name",
-            "source_name",
-            "organization",
-        ]
+            return True
 
-        sanitized_data = []
-        for record in data:
-            sanitized_data.append(sanitize_record(record, TEXT_FIELDS))
+        # Before inserting data, sanitize text fields; parsed pages arrive already sanitized
+        with self.metrics.stage("sanitize"):
+            data = sanitize_batch(ReadingsBatch.coerce(data), TEXT_FIELDS)
 
-        data = sanitized_data
+        # Only readings that may be new go over the wire
+        with self.metrics.stage("dedup"):
+            data, skipped = self.deduplicator.filter_new(data)
+        self.metrics.count("rows_skipped_before_insert", skipped)
+        if skipped:
+            logger.info(f"[run_id={self.run_id}] Skipped {skipped} readings already seen or stored")
+        if not len(data):
+            return True
 
         if self.use_postgres:
             logger.info(
                 f"[run_id={self.run_id}] Saving to PostgreSQL (host={DB_CONFIG.host} port={DB_CONFIG.port} db={DB_CONFIG.database})"
             )
-            self._save_to_postgres(data)
+            stored = self._save_to_postgres(data)
         else:
             logger.info(f"[run_id={self.run_id}] Saving to SQLite (db_path={self.db_path})")
-            self._save_to_sqlite(data)
+            stored = self._save_to_sqlite(data)
+        # Readings the writer skipped stay eligible, e.g. once their parameter is known
+        if stored is None:
+            return False
+        self.deduplicator.mark_stored(stored)
+        return True
 
-    def _upsert_postgres_locations(self, cursor, data: List[Dict[str, Any]]) -> Dict[tuple[str, str], int]:
-        locations: Dict[tuple[str, str], Dict[str, Any]] = {}
-        for record in data:
-            key = (record["location_name"], record["state"])
-            if key not in locations:
-                locations[key] = {
-                    "name": record["location_name"],
-                    "state": record["state"],
-                    "district": record.get("district"),
-                    "latitude": record["latitude"],
-                    "longitude": record["longitude"],
+    def storage_identity(self) -> str:
+        """Names the database being written, so per-database state is not reused elsewhere"""
+        if self.use_postgres:
+            return f"postgres://{DB_CONFIG.host}:{DB_CONFIG.port}/{DB_CONFIG.database}"
+        return f"sqlite://{os.path.abspath(self.db_path)}"
+
+    def _upsert_postgres_locations(
+        self, cursor, data: Union[ReadingsBatch, List[Dict[str, Any]]]
+    ) -> Dict[tuple[str, str], int]:
+        """
+        Upsert every distinct location and map (name, state) keys to ids.
+
+        Locations are sent DATA_PIPELINE_BATCH_SIZE rows per statement, so a batch is normally a
+        single statement and a large backfill never builds an unbounded query.
+
+        locations.name is the conflict key, so keys that share a name resolve to one row: it keeps
+        the state/district it was first inserted with and takes the last coordinates seen, as the
+        previous row-by-row upsert did.
+        """
+        from psycopg2.extras import execute_values
+
+        batch = ReadingsBatch.coerce(data)
+        locations: Dict[str, Dict[str, Any]] = {}
+        keys: List[tuple[str, str]] = []
+        seen_keys = set()
+        for station in self._stations_in_order(batch):
+            key = (station.location_name, station.state)
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            keys.append(key)
+            location = locations.get(station.location_name)
+            if location is None:
+                locations[station.location_name] = {
+                    "name": station.location_name,
+                    "state": station.state,
+                    "district": station.district,
+                    "latitude": station.latitude,
+                    "longitude": station.longitude,
                     "water_body_type": "river",
                 }
-
-        location_ids: Dict[tuple[str, str], int] = {}
-        sorted_locations = sorted(locations.values(), key=lambda x: x["name"])
-        for location in sorted_locations:
-            cursor.execute(
-                """
-                INSERT INTO locations (name, state, district, latitude, longitude, water_body_type)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (name) DO UPDATE SET
-                    latitude = EXCLUDED.latitude,
-                    longitude = EXCLUDED.longitude
-                RETURNING id
-            """,
-                (
-                    location["name"],
-                    location["state"],
-                    location["district"],
-                    location["latitude"],
-                    location["longitude"],
-                    location["water_body_type"],
-                ),
+            else:
+                location["latitude"] = station.latitude
+                location["longitude"] = station.longitude
+
+        if not locations:
+            return {}
+
+        # Sorted so concurrent writers take row locks in the same order
+        rows = [
+            (
+                location["name"],
+                location["state"],
+                location["district"],
+                location["latitude"],
+                location["longitude"],
+                location["water_body_type"],
             )
-            location_ids[(location["name"], location["state"])] = cursor.fetchone()[0]
-        return location_ids
+            for location in sorted(locations.values(), key=lambda x: x["name"])
+        ]
+        returned = execute_values(
+            cursor,
+            """
+            INSERT INTO locations (name, state, district, latitude, longitude, water_body_type)
+            VALUES %s
+            ON CONFLICT (name) DO UPDATE SET
+                latitude = EXCLUDED.latitude,
+                longitude = EXCLUDED.longitude
+            RETURNING name, id
+            """,
+            rows,
+            page_size=max(1, int(os.getenv("DATA_PIPELINE_BATCH_SIZE", "5000"))),
+            fetch=True,
+        )
+        ids_by_name = {name: location_id for name, location_id in returned}
+        return {key: ids_by_name[key[0]] for key in keys}
+
+    def _insert_postgres_readings(
+        self,
+        cursor,
+        data: Union[ReadingsBatch, List[Dict[str, Any]]],
+        location_ids: Mapping[tuple[str, str], int],
+    ) -> Tuple[List[tuple], np.ndarray]:
+        """
+        Insert readings, skipping ones already stored.
 
-    def _insert_postgres_readings(self, cursor, data: List[Dict[str, Any]], location_ids: Dict[tuple[str, str], int]):
-        cursor.execute("SELECT parameter_code, id FROM water_quality_parameters")
-        param_map = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        insert_args = []
-        for record in data:
-            location_key = (record["location_name"], record["state"])
-            if location_key not in location_ids or record["parameter"] not in param_map:
-                continue
-            insert_args.append((
-                location_ids[location_key],
-                param_map[record["parameter"]],
-                record["value"],
-                record["measurement_date"],
-                record["source"],
-            ))
-
-        inserted_count = 0
-        if insert_args:
+        Returns the rows actually inserted and a mask of the batch's readings that are now in the
+        table (inserted, or already there); readings of unknown stations or parameters are not.
+        """
+        batch = ReadingsBatch.coerce(data)
+        param_map = self.dimension_cache.parameter_ids(
+            cursor, {batch.parameters[code] for code in batch.parameter_order()}
+        )
+
+        # Ids are resolved once per station and parameter, then spread over the readings;
+        # readings of unknown stations or parameters get -1 and are left out
+        station_ids = np.array(
+            [location_ids.get((s.location_name, s.state), -1) for s in batch.stations] or [-1],
+            dtype=np.int64,
+        )[batch.station]
+        parameter_ids = np.array(
+            [param_map.get(parameter, -1) for parameter in batch.parameters] or [-1],
+            dtype=np.int64,
+        )[batch.parameter]
+        keep = (station_ids >= 0) & (parameter_ids >= 0)
+        insert_args = list(zip(
+            station_ids[keep].tolist(),
+            parameter_ids[keep].tolist(),
+            batch.value_list(keep),
+            batch.date_texts()[keep].tolist(),
+            [batch.sources[code] for code in batch.source[keep].tolist()],
+        ))
+
+        inserted: List[tuple] = []
+        copy_min_rows = int(os.getenv("DATA_PIPELINE_COPY_MIN_ROWS", "5000"))
+        if insert_args and 0 < copy_min_rows <= len(insert_args):
+            inserted = self._copy_postgres_readings(cursor, insert_args)
+        elif insert_args:
             from psycopg2.extras import execute_values
             insert_args.sort(key=lambda x: (x[0], x[1], x[3]))
             res = execute_values(
@@ -914,14 +936,51 @@ class WaterQualityDataFetcher:
                 (location_id, parameter_id, value, measurement_date, source)
                 VALUES %s
                 ON CONFLICT (location_id, parameter_id, measurement_date) DO NOTHING
-                RETURNING id
+                RETURNING location_id, parameter_id, value, measurement_date
                 """,
                 insert_args,
                 fetch=True
             )
-            inserted_count = len(res) if res else 0
+            inserted = list(res) if res else []
 
-        logger.info(f"[run_id={self.run_id}] Finished processing readings. Attempted: {len(insert_args)}, Inserted: {inserted_count}")
+        self.metrics.count("rows_attempted", len(insert_args))
+        self.metrics.count("rows_inserted", len(inserted))
+        logger.info(
+            f"[run_id={self.run_id}] Finished processing readings. "
+            f"Attempted: {len(insert_args)}, Inserted: {len(inserted)}"
+        )
+        return inserted, keep
+
+    def _copy_postgres_readings(self, cursor, rows: List[tuple]) -> List[tuple]:
+        """
+        Bulk-load reading rows with COPY into a temp staging table, then merge them.
+
+        The staging table lives for the session (pooled connections reuse it) and is emptied on
+        commit. One INSERT ... SELECT ... ON CONFLICT DO NOTHING merges the batch and returns the
+        readings actually inserted.
+        """
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {READINGS_STAGING_TABLE} ON COMMIT DELETE ROWS AS
+            SELECT {READINGS_COPY_COLUMNS} FROM water_quality_readings WITH NO DATA
+        """)
+        cursor.execute(f"TRUNCATE {READINGS_STAGING_TABLE}")
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {READINGS_STAGING_TABLE} ({READINGS_COPY_COLUMNS}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+        cursor.execute(f"""
+            INSERT INTO water_quality_readings ({READINGS_COPY_COLUMNS})
+            SELECT {READINGS_COPY_COLUMNS} FROM {READINGS_STAGING_TABLE}
+            ORDER BY location_id, parameter_id, measurement_date
+            ON CONFLICT (location_id, parameter_id, measurement_date) DO NOTHING
+            RETURNING location_id, parameter_id, value, measurement_date
+        """)
+        return cursor.fetchall()
 
     def _update_postgres_sources(self, cursor):
         for source_name, api in GOVERNMENT_APIS.items():
@@ -956,128 +1015,395 @@ class WaterQualityDataFetcher:
                 (source_name, source_type, api.base_url, api_key_hash, status, last_error),
             )
 
-    def _save_to_postgres(self, data: List[Dict[str, Any]]):
-        """Save data to PostgreSQL"""
-        conn = self.get_postgres_connection()
-        if not conn:
-            logger.error(f"[run_id={self.run_id}] Could not connect to Postgres to save data")
-            return
+    def update_source_status(self):
+        """Record last_fetch/status for every configured source once per run"""
+        try:
+            with db_pool.connection() as conn, self.metrics.stage("source_update"):
+                try:
+                    cursor = conn.cursor()
+                    self._update_postgres_sources(cursor)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"[run_id={self.run_id}] Failed to update data sources: {str(e)}")
+        except psycopg2.Error as e:
+            logger.error(
+                f"[run_id={self.run_id}] Could not connect to Postgres to update sources: {e}"
+            )
 
+    def _save_to_postgres(
+        self, data: Union[ReadingsBatch, List[Dict[str, Any]]]
+    ) -> Optional[ReadingsBatch]:
+        """Save data to PostgreSQL; returns the readings now stored, or None if nothing committed"""
+        data = ReadingsBatch.coerce(data)
         try:
-            cursor = conn.cursor()
-            location_ids = self._upsert_postgres_locations(cursor, data)
-            self._insert_postgres_readings(cursor, data, location_ids)
-            self._update_postgres_sources(cursor)
-            conn.commit()
+            with db_pool.connection() as conn:
+                try:
+                    cursor = conn.cursor()
+                    cache = self.dimension_cache
+                    cache.validate(cursor)
+                    # Only stations the cache has not seen yet go through the upsert
+                    station_keys = [(s.location_name, s.state) for s in data.stations]
+                    missing = cache.missing_locations(station_keys)
+                    unknown = np.array([key in missing for key in station_keys] or [False])
+                    with self.metrics.stage("location_upsert"):
+                        new_location_ids = self._upsert_postgres_locations(
+                            cursor, data.take(unknown[data.station])
+                        )
+                    location_ids = ChainMap(new_location_ids, cache.locations)
+                    with self.metrics.stage("reading_insert"):
+                        inserted, stored = self._insert_postgres_readings(
+                            cursor, data, location_ids
+                        )
+                    if self.alert_engine is not None and inserted:
+                        with self.metrics.stage("alerts"):
+                            self._evaluate_postgres_alerts(cursor, data, location_ids, inserted)
+                    with self.metrics.stage("commit"):
+                        conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"[run_id={self.run_id}] Failed to save to Postgres: {str(e)}")
+                    return None
+                # The batch is committed; a cache failure only costs lookups in later batches
+                try:
+                    cache.commit(cursor, new_location_ids)
+                except Exception as e:
+                    cache.clear()
+                    logger.warning(
+                        f"[run_id={self.run_id}] Could not update the dimension cache: {e}"
+                    )
+                return data.take(stored)
+        except psycopg2.Error as e:
+            logger.error(f"[run_id={self.run_id}] Could not connect to Postgres to save data: {e}")
+        return None
+
+    def _evaluate_postgres_alerts(
+        self,
+        cursor,
+        data: Union[ReadingsBatch, List[Dict[str, Any]]],
+        location_ids: Mapping[tuple[str, str], int],
+        inserted: List[tuple],
+    ):
+        """Raise and resolve alerts for the inserted readings; failures never cost the batch"""
+        location_names = {}
+        for station in self._stations_in_order(ReadingsBatch.coerce(data)):
+            location_id = location_ids.get((station.location_name, station.state))
+            if location_id is not None:
+                location_names[location_id] = station.location_name
+        parameter_codes = {pid: code for code, pid in self.dimension_cache.parameters.items()}
+
+        cursor.execute("SAVEPOINT alert_evaluation")
+        try:
+            changes = self.alert_engine.evaluate(  # type: ignore
+                cursor, inserted, parameter_codes, location_names
+            )
+            cursor.execute("RELEASE SAVEPOINT alert_evaluation")
         except Exception as e:
-            conn.rollback()
-            logger.error(f"[run_id={self.run_id}] Failed to save to Postgres: {str(e)}")
+            cursor.execute("ROLLBACK TO SAVEPOINT alert_evaluation")
+            logger.warning(f"[run_id={self.run_id}] Alert evaluation failed: {e}")
+            return
+        if changes.get("created") or changes.get("updated") or changes.get("resolved"):
+            logger.info(
+                f"[run_id={self.run_id}] Alerts: {changes['created']} created, "
+                f"{changes['updated']} updated, {changes['resolved']} resolved"
+            )
+
+    def _save_to_sqlite(self, data: Union[ReadingsBatch, List[Dict[str, Any]]]) -> ReadingsBatch:
+        """Save fetched data to SQLite in a single transaction; returns the readings now stored"""
+        data = ReadingsBatch.coerce(data)
+        conn = sqlite_store.connect(self.db_path)
+
+        # Insert unique locations
+        locations: Dict[tuple[str, str], tuple] = {}
+        for station in self._stations_in_order(data):
+            key = (station.location_name, station.state)
+            if key not in locations:
+                locations[key] = (*station, "river")
+
+        try:
+            with conn:
+                with self.metrics.stage("location_upsert"):
+                    conn.executemany(
+                        """
+                        INSERT OR IGNORE INTO locations
+                        (name, state, district, latitude, longitude, water_body_type)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        list(locations.values()),
+                    )
+                changes_before = conn.total_changes
+                with self.metrics.stage("reading_insert"):
+                    if self.sqlite_layout == sqlite_store.NORMALIZED:
+                        self._insert_sqlite_normalized_readings(conn, data)
+                    else:
+                        self._insert_sqlite_flat_readings(conn, data)
+                inserted = conn.total_changes - changes_before
         finally:
             conn.close()
+        self.metrics.count("rows_attempted", len(data))
+        self.metrics.count("rows_inserted", inserted)
 
-    def _save_to_sqlite(self, data: List[Dict[str, Any]]):
-        """Save fetched data to SQLite"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        logger.info(f"[run_id={self.run_id}] Saved {len(data)} records to SQLite")
+        return data.take(self._sqlite_storable(data))
 
-        # Insert water quality readings
-        insert_args = []
-        for record in data:
-            insert_args.append((
-                record["location_name"],
-                record["state"],
-                record.get("district"),
-                record["latitude"],
-                record["longitude"],
-                record["parameter"],
-                record["value"],
-                record["unit"],
-                record["measurement_date"],
-                record["source"],
-            ))
-        
-        if insert_args:
-            cursor.executemany(
-                """
-                INSERT OR IGNORE INTO water_quality_readings 
-                (location_name, state, district, latitude, longitude, 
-                 parameter, value, unit, measurement_date, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                insert_args
+    @staticmethod
+    def _sqlite_storable(batch: ReadingsBatch) -> np.ndarray:
+        """
+        Mask of readings the SQLite tables accept (inserted, or already there).
+
+        INSERT OR IGNORE also skips rows with NULL in a NOT NULL column instead of failing.
+        """
+        station_ok = np.array(
+            [s.location_name is not None and s.state is not None for s in batch.stations] or [False]
+        )
+        parameter_ok = np.array([p is not None for p in batch.parameters] or [False])
+        source_ok = np.array([s is not None for s in batch.sources] or [False])
+        return (
+            station_ok[batch.station]
+            & parameter_ok[batch.parameter]
+            & source_ok[batch.source]
+            & ~np.isnan(batch.value)
+            & (batch.date != NO_DATE)
+        )
+
+    def _insert_sqlite_flat_readings(self, conn, batch: ReadingsBatch):
+        """Insert readings into the flat SQLite layout"""
+        stations, parameters, units, sources = (
+            batch.stations, batch.parameters, batch.units, batch.sources
+        )
+        insert_args = (
+            (*stations[s], parameters[p], value, units[p], day, sources[o])
+            for s, p, value, day, o in zip(
+                batch.station.tolist(),
+                batch.parameter.tolist(),
+                batch.value_list(),
+                batch.date_texts().tolist(),
+                batch.source.tolist(),
             )
+        )
 
-        # Insert unique locations
-        locations: Dict[tuple[str, str], Dict[str, Any]] = {}
-        for record in data:
-            key = (record["location_name"], record["state"])
-            if key not in locations:
-                locations[key] = {
-                    "name": record["location_name"],
-                    "state": record["state"],
-                    "district": record.get("district"),
-                    "latitude": record["latitude"],
-                    "longitude": record["longitude"],
-                    "water_body_type": "river",
-                }
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO water_quality_readings
+            (location_name, state, district, latitude, longitude,
+             parameter, value, unit, measurement_date, source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            insert_args
+        )
 
-        for location in locations.values():
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO locations 
-                (name, state, district, latitude, longitude, water_body_type)
-                VALUES (?, ?, ?, ?, ?, ?)
+    def _insert_sqlite_normalized_readings(self, conn, batch: ReadingsBatch):
+        """Insert readings into the normalized SQLite layout, resolving ids by name and code"""
+        conn.executemany(
+            "INSERT OR IGNORE INTO water_quality_parameters (parameter_code, unit) VALUES (?, ?)",
+            [(batch.parameters[code], batch.units[code]) for code in batch.parameter_order()],
+        )
+        location_ids = dict(conn.execute("SELECT name, id FROM locations"))
+        parameter_ids = dict(
+            conn.execute("SELECT parameter_code, id FROM water_quality_parameters")
+        )
+        # Resolved once per station and parameter; only the codes readings use are looked up
+        station_ids = {
+            code: location_ids[batch.stations[code].location_name]
+            for code in batch.station_order()
+        }
+        param_ids = {
+            code: parameter_ids[batch.parameters[code]] for code in batch.parameter_order()
+        }
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO water_quality_readings
+            (location_id, parameter_id, measurement_date, value, source)
+            VALUES (?, ?, ?, ?, ?)
             """,
-                (
-                    location["name"],
-                    location["state"],
-                    location["district"],
-                    location["latitude"],
-                    location["longitude"],
-                    location["water_body_type"],
-                ),
-            )
+            (
+                (station_ids[s], param_ids[p], day, value, batch.sources[o])
+                for s, p, day, value, o in zip(
+                    batch.station.tolist(),
+                    batch.parameter.tolist(),
+                    batch.date_texts().tolist(),
+                    batch.value_list(),
+                    batch.source.tolist(),
+                )
+            ),
+        )
 
-        conn.commit()
-        conn.close()
+    @staticmethod
+    def _stations_in_order(batch: ReadingsBatch) -> List[Station]:
+        """Stations of a batch's readings, in order of their first reading"""
+        return [batch.stations[code] for code in batch.station_order()]
 
-        logger.info(f"[run_id={self.run_id}] Saved {len(data)} records to SQLite")
+    async def fetch_all_data(self) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Stream data from all sources into the database, then trigger alert generation.
+
+        Every source from `scheduled_sources()` runs at the same time, so the fetch takes about as
+        long as the slowest source. Sources push processed pages into a bounded queue; a single
+        consumer saves them in DATA_PIPELINE_BATCH_SIZE batches, and a full queue pauses the
+        producers. Memory therefore stays flat however many pages are fetched, and batches saved
+        before a late failure are kept. A failing source is logged and skipped; the run only fails
+        when every source fails. Weather lookups start as soon as new locations appear.
+        Incremental watermarks are only advanced for sources whose pages were all saved, and not
+        at all when a batch failed to save.
 
-    async def fetch_all_data(self) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-        """Fetch data from all sources"""
+        Returns:
+            tuple: A run summary (`records`, `batches`, `failed_batches`, per-source counts,
+                `failed_sources`, a `preview` of the first record and, when alerts are raised in-process, `alerts`
+                counts) and the fetched weather records.
+        """
         logger.info(f"[run_id={self.run_id}] Starting data fetch from all sources")
 
-        all_data = []
+        source_keys = self.scheduled_sources()
+        batch_size = max(1, int(os.getenv("DATA_PIPELINE_BATCH_SIZE", "5000")))
+        queue: asyncio.Queue = asyncio.Queue(
+            maxsize=max(1, int(os.getenv("DATA_PIPELINE_QUEUE_SIZE", "8")))
+        )
+        summary: Dict[str, Any] = {
+            "records": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "sources": {key: 0 for key in source_keys},
+            "failed_sources": [],
+            "preview": None,
+        }
+        errors: List[Exception] = []
+        weather_tasks: List[asyncio.Task] = []
+        seen: set = set()
+
+        async def produce(source_key: str) -> None:
+            # Each source fails or falls back to sample data on its own
+            try:
+                async with aclosing(self._iter_resource_pages(source_key)) as pages:
+                    async for page in pages:
+                        summary["sources"][source_key] += len(page)
+                        await queue.put(page)
+            except Exception as e:
+                logger.error(f"[run_id={self.run_id}] Source {source_key} failed: {e}")
+                summary["failed_sources"].append(source_key)
+                errors.append(e)
+
+        async def flush(batch: ReadingsBatch) -> None:
+            if await asyncio.to_thread(self.save_to_database, batch):
+                summary["batches"] += 1
+            else:
+                summary["failed_batches"] += 1
+
+        async def close_queue() -> None:
+            await asyncio.gather(*producers)
+            await queue.put(None)
 
-        # Fetch from different sources
-        data_gov_data = await self.fetch_data_gov_in_data()
-        cpcb_data = await self.fetch_cpcb_data()
+        producers = [asyncio.create_task(produce(key)) for key in source_keys]
+        closer = asyncio.create_task(close_queue())
 
-        all_data.extend(data_gov_data)
-        all_data.extend(cpcb_data)
+        # Weather lookups still running when a run fails are cancelled rather than left behind
+        try:
+            # Pages are kept as batches and only concatenated once a full batch can be saved
+            buffer: List[ReadingsBatch] = []
+            buffered = 0
+            try:
+                while True:
+                    page = await queue.get()
+                    if page is None:
+                        break
+                    page = ReadingsBatch.coerce(page)
+                    if summary["preview"] is None and len(page):
+                        summary["preview"] = page.record(0)
+                    summary["records"] += len(page)
+                    self.metrics.count("records", len(page))
+
+                    # Start weather lookups for newly seen locations while fetching continues
+                    locations = []
+                    for station in self._stations_in_order(page):
+                        key = (station.location_name, station.state)
+                        if key not in seen:
+                            locations.append(
+                                {
+                                    "name": station.location_name,
+                                    "latitude": station.latitude,
+                                    "longitude": station.longitude,
+                                }
+                            )
+                            seen.add(key)
+                    if locations:
+                        weather_tasks.append(
+                            asyncio.create_task(self.fetch_weather_data(locations))
+                        )
 
-        # Get unique locations for weather data
-        locations = []
-        seen = set()
-        for record in all_data:
-            key = (record["location_name"], record["state"])
-            if key not in seen:
-                locations.append(
+                    buffer.append(page)
+                    buffered += len(page)
+                    if buffered >= batch_size:
+                        pending = ReadingsBatch.concat(buffer)
+                        start = 0
+                        while len(pending) - start >= batch_size:
+                            await flush(pending[start : start + batch_size])
+                            start += batch_size
+                        buffer = [pending[start:]] if start < len(pending) else []
+                        buffered = len(pending) - start
+                if buffered:
+                    await flush(ReadingsBatch.concat(buffer))
+                    buffer = []
+            finally:
+                if not closer.done():
+                    closer.cancel()
+                    for producer in producers:
+                        producer.cancel()
+                    await asyncio.gather(closer, *producers, return_exceptions=True)
+
+            # Watermarks only move forward once every page that was fetched has been saved;
+            # batches mix sources, so one failed save holds back every source this run
+            if summary["failed_batches"]:
+                logger.warning(
+                    f"[run_id={self.run_id}] {summary['failed_batches']} batches failed to save; "
+                    "keeping the previous watermarks"
+                )
+            else:
+                self.watermarks.commit(
                     {
-                        "name": record["location_name"],
-                        "latitude": record["latitude"],
-                        "longitude": record["longitude"],
+                        key: watermark
+                        for key, watermark in self.pending_watermarks.items()
+                        if key not in summary["failed_sources"]
                     }
                 )
-                seen.add(key)
+            self.pending_watermarks = {}
+            await asyncio.to_thread(self.deduplicator.save)
+
+            if errors and len(errors) == len(source_keys):
+                raise errors[0]
+
+            if self.use_postgres:
+                await asyncio.to_thread(self.update_source_status)
 
-        # Fetch weather data
-        weather_data = await self.fetch_weather_data(locations)
+            weather_data: List[Dict[str, Any]] = []
+            # A failed weather lookup only costs that lookup; the readings are already saved
+            for result in await asyncio.gather(*weather_tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error(f"[run_id={self.run_id}] Weather lookup failed: {result}")
+                else:
+                    weather_data.extend(result)
+        finally:
+            for task in weather_tasks:
+                task.cancel()
+            await asyncio.gather(*weather_tasks, return_exceptions=True)
+
+        # Postgres runs raise alerts in-process as each batch is inserted; the backend generator
+        # is kept for SQLite runs and for DATA_PIPELINE_ALERTS=backend
+        if self.alert_mode == "backend" or (self.alert_mode == "python" and not self.use_postgres):
+            with self.metrics.stage("alerts"):
+                await self._run_backend_alert_generator()
+        elif self.alert_engine is not None:
+            summary["alerts"] = dict(self.alert_engine.counts)
 
-        # Save all data
-        self.save_to_database(all_data)
+        # Save weather data separately (would need weather table)
+        logger.info(
+            f"[run_id={self.run_id}] Fetched {summary['records']} water quality records "
+            f"in {summary['batches']} batches"
+        )
+        logger.info(f"[run_id={self.run_id}] Fetched {len(weather_data)} weather records")
+
+        return summary, weather_data
 
-        # Trigger alert generation in the backend
+    async def _run_backend_alert_generator(self) -> None:
+        """Regenerate alerts over the whole readings table with `npm run alerts:generate`"""
         try:
             logger.info(f"[run_id={self.run_id}] Triggering backend alert generation...")
             # Run the backend npm script asynchronously
@@ -1131,30 +1457,124 @@ class WaterQualityDataFetcher:
         except Exception as e:
             logger.warning(f"[run_id={self.run_id}] Failed to trigger alert generation: {e}")
 
-        # Save weather data separately (would need weather table)
-        logger.info(f"[run_id={self.run_id}] Fetched {len(all_data)} water quality records")
-        logger.info(f"[run_id={self.run_id}] Fetched {len(weather_data)} weather records")
+    async def replay_archive(
+        self, resources: Optional[List[str]] = None, source_run_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Rebuild readings from archived raw pages without any network access.
 
-        return all_data, weather_data
+        Pages are parsed on `parse_executor`, or on a process pool with one worker per CPU when
+        none is configured, and saved in DATA_PIPELINE_BATCH_SIZE batches in archive order.
+        Readings already in the database are skipped by the usual conflict handling, so a replay
+        after a mapping change only adds what the new mapping produces.
 
+        Returns:
+            dict: `pages` replayed and `records` and `batches` saved.
+        """
+        if self.landing_zone is None:
+            raise RuntimeError("DATA_PIPELINE_LANDING_ZONE must be set to replay archived pages")
+        zone = self.landing_zone
+        entries = await asyncio.to_thread(zone.entries, resources, source_run_id)
+        logger.info(
+            f"[run_id={self.run_id}] Replaying {len(entries)} archived pages from {zone.root}"
+        )
 
-async def main():
+        executor = self.parse_executor
+        own_executor = executor is None
+        workers = os.cpu_count() or 1
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        batch_size = max(1, int(os.getenv("DATA_PIPELINE_BATCH_SIZE", "5000")))
+        summary: Dict[str, Any] = {"pages": 0, "records": 0, "batches": 0}
+
+        loop = asyncio.get_running_loop()
+        paths = iter([str(zone.blob_path(entry.sha256)) for entry in entries])
+        pending: Deque[asyncio.Future] = deque()
+
+        def submit(path: str) -> asyncio.Future:
+            return loop.run_in_executor(executor, parse_archived_page, path, self.run_id)
+
+        # Pages are kept as batches and only concatenated once a full batch can be saved
+        buffer: List[ReadingsBatch] = []
+        buffered = 0
+        try:
+            # Keep every worker busy while pages are saved in order
+            for path in islice(paths, 2 * workers):
+                pending.append(submit(path))
+            while pending:
+                page = await pending.popleft()
+                for path in islice(paths, 1):
+                    pending.append(submit(path))
+                summary["pages"] += 1
+                summary["records"] += len(page)
+                self.metrics.count("records", len(page))
+                buffer.append(page)
+                buffered += len(page)
+                if buffered >= batch_size:
+                    merged = ReadingsBatch.concat(buffer)
+                    start = 0
+                    while len(merged) - start >= batch_size:
+                        await asyncio.to_thread(
+                            self.save_to_database, merged[start : start + batch_size]
+                        )
+                        summary["batches"] += 1
+                        start += batch_size
+                    buffer = [merged[start:]] if start < len(merged) else []
+                    buffered = len(merged) - start
+            if buffered:
+                await asyncio.to_thread(self.save_to_database, ReadingsBatch.concat(buffer))
+                summary["batches"] += 1
+        finally:
+            for future in pending:
+                future.cancel()
+            if own_executor:
+                executor.shutdown(cancel_futures=True)
+        await asyncio.to_thread(self.deduplicator.save)
+
+        logger.info(
+            f"[run_id={self.run_id}] Replay finished: {summary['pages']} pages, "
+            f"{summary['records']} records"
+        )
+        return summary
+
+
+async def main(argv: Optional[List[str]] = None):
     """Main function to run data fetching"""
+    parser = argparse.ArgumentParser(description="Fetch water quality data into the database")
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="rebuild readings from the landing zone (DATA_PIPELINE_LANDING_ZONE) offline",
+    )
+    parser.add_argument(
+        "--resource", action="append", help="replay only this source (repeatable)"
+    )
+    parser.add_argument("--run-id", help="replay only the pages archived by this run")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        async with WaterQualityDataFetcher() as fetcher:
+            summary = await fetcher.replay_archive(args.resource, args.run_id)
+            print("\nReplay Summary:")
+            print(f"Archived Pages: {summary['pages']}")
+            print(f"Water Quality Records: {summary['records']}")
+        return
+
     async with WaterQualityDataFetcher() as fetcher:
-        water_data, weather_data = await fetcher.fetch_all_data()
+        summary, weather_data = await fetcher.fetch_all_data()
 
         # Print summary
         print("\nData Fetch Summary:")
-        print(f"Water Quality Records: {len(water_data)}")
+        print(f"Water Quality Records: {summary['records']}")
         print(f"Weather Records: {len(weather_data)}")
         print(
             f"Database: {'PostgreSQL' if fetcher.use_postgres else 'SQLite (water_quality_data.db)'}"
         )
 
         # Show sample data
-        if water_data:
+        if summary["preview"]:
             print("\nData Preview (First Record):")
-            sample = water_data[0]
+            sample = summary["preview"]
             for key, value in sample.items():
                 print(f"  {key}: {value}")
 
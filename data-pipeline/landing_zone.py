@@ -0,0 +1,118 @@
+"""
+Raw landing zone for data.gov.in responses
+Archives every fetched page as compressed, content-addressed JSON so readings can be
+rebuilt offline (fetch_data.py --replay) after the parameter mapping changes
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from normalize import process_data_gov_in_batch
+from readings_batch import ReadingsBatch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ArchivedPage:
+    """One manifest line: which blob holds the page a run fetched at `offset`"""
+
+    resource: str
+    offset: int
+    run_id: str
+    sha256: str
+    fetched_at: str
+
+
+class LandingZone:
+    """
+    Archive laid out as
+
+        objects/<sha[:2]>/<sha>.json.gz   one gzip blob per distinct page body
+        runs/<run_id>/<resource>.jsonl    one ArchivedPage line per fetched page
+
+    Identical pages fetched by different runs share one blob.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    @classmethod
+    def from_env(cls) -> Optional["LandingZone"]:
+        """Archive under DATA_PIPELINE_LANDING_ZONE when it is set; otherwise do not archive."""
+        root = os.getenv("DATA_PIPELINE_LANDING_ZONE")
+        return cls(root) if root else None
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[0:2] / f"{sha256}.json.gz"
+
+    def write(self, resource: str, offset: int, run_id: str, payload: Dict[str, Any]) -> Path:
+        """Store a raw page (once per distinct body) and record it in the run's manifest."""
+        body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        sha256 = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(sha256)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+
+        entry = ArchivedPage(resource, offset, run_id, sha256, datetime.now().isoformat())
+        manifest = self.root / "runs" / run_id / f"{resource}.jsonl"
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(entry)) + "\n")
+        return path
+
+    def entries(
+        self, resources: Optional[Iterable[str]] = None, run_id: Optional[str] = None
+    ) -> List[ArchivedPage]:
+        """
+        Archived pages in fetch order, each distinct body once.
+
+        Optionally limited to some resources and/or a single run.
+        """
+        wanted = set(resources) if resources else None
+        runs_dir = self.root / "runs"
+        pattern = f"{run_id}/*.jsonl" if run_id else "*/*.jsonl"
+        found: List[ArchivedPage] = []
+        for manifest in runs_dir.glob(pattern):
+            if wanted is not None and manifest.stem not in wanted:
+                continue
+            with open(manifest, encoding="utf-8") as f:
+                found.extend(ArchivedPage(**json.loads(line)) for line in f if line.strip())
+
+        found.sort(key=lambda e: (e.fetched_at, e.resource, e.offset))
+        seen = set()
+        unique = []
+        for entry in found:
+            if entry.sha256 not in seen:
+                seen.add(entry.sha256)
+                unique.append(entry)
+        return unique
+
+    def load(self, entry: ArchivedPage) -> Dict[str, Any]:
+        return load_blob(str(self.blob_path(entry.sha256)))
+
+
+def load_blob(path: str) -> Dict[str, Any]:
+    with gzip.open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def process_archived_page(path: str, run_id: str = "-") -> ReadingsBatch:
+    """
+    Rebuild readings from one archived page.
+
+    Module-level so replay can run it on a process pool: workers read and parse the blob
+    themselves instead of receiving the decoded page from the parent.
+    """
+    return process_data_gov_in_batch(load_blob(path), run_id)
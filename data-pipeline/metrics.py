@@ -0,0 +1,257 @@
+"""
+Per-run pipeline metrics
+Times each stage, keeps a page-latency histogram and counters, and writes a JSON report and a
+Prometheus textfile (node_exporter textfile collector format) for every run_id
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the page latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_FILE = "aqua_pipeline.prom"
+
+# JSON reports kept per directory unless DATA_PIPELINE_METRICS_KEEP says otherwise
+DEFAULT_KEEP_REPORTS = 30
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None where getrusage is unavailable."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as Prometheus exposes them"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": {str(bound): n for bound, n in zip(self.buckets, self.counts)},
+        }
+
+
+class RunMetrics:
+    """
+    Stage timings, histograms and counters for one pipeline run.
+
+    Stages are timed with `stage()` from the event loop and from the worker threads that save
+    batches, so every update takes a lock. Only the newest `keep` JSON reports are left in
+    `report_dir` (0 keeps them all).
+    """
+
+    def __init__(self, run_id: str, report_dir: Optional[str] = None, keep: int = 0):
+        self.run_id = run_id
+        self.report_dir = Path(report_dir) if report_dir else None
+        self.keep = keep
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls, run_id: str, default_dir: Path) -> "RunMetrics":
+        """
+        DATA_PIPELINE_METRICS_DIR sets where reports go ("off" records without writing) and
+        DATA_PIPELINE_METRICS_KEEP how many JSON reports stay there.
+        """
+        report_dir = os.getenv("DATA_PIPELINE_METRICS_DIR") or str(default_dir / "metrics")
+        keep = max(0, int(os.getenv("DATA_PIPELINE_METRICS_KEEP", str(DEFAULT_KEEP_REPORTS))))
+        return cls(run_id, None if report_dir.lower() == "off" else report_dir, keep)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the wall time of the block to stage `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - started)
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).observe(seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """aiohttp tracing that counts response body bytes as they arrive."""
+
+        async def on_chunk(session, context, params) -> None:
+            self.count("bytes_downloaded", len(params.chunk))
+
+        config = aiohttp.TraceConfig()
+        config.on_response_chunk_received.append(on_chunk)
+        return config
+
+    def report(self, status: str = "success") -> Dict[str, Any]:
+        """Machine-readable summary of the run so far."""
+        duration = time.perf_counter() - self._started
+        with self._lock:
+            records = self.counters.get("records", 0)
+            return {
+                "run_id": self.run_id,
+                "status": status,
+                "started_at": self.started_at.isoformat(),
+                "duration_seconds": round(duration, 6),
+                "records_per_second": round(records / duration, 3) if duration > 0 else None,
+                "peak_rss_bytes": peak_rss_bytes(),
+                "counters": dict(self.counters),
+                "stages": {
+                    name: {key: round(value, 6) for key, value in stats.items()}
+                    for name, stats in self.stages.items()
+                },
+                "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+            }
+
+    def write(self, status: str = "success") -> Dict[str, Any]:
+        """
+        Write run-<run_id>.json, drop reports beyond `keep` and refresh the Prometheus textfile.
+
+        Returns the report.
+        """
+        report = self.report(status)
+        if self.report_dir is None:
+            return report
+        try:
+            self.report_dir.mkdir(parents=True, exist_ok=True)
+            _write_atomic(
+                self.report_dir / f"run-{self.run_id}.json", json.dumps(report, indent=2) + "\n"
+            )
+            _write_atomic(self.report_dir / PROMETHEUS_FILE, prometheus_text(report))
+            if self.keep:
+                self._prune_reports()
+        except OSError as e:
+            logger.warning(
+                f"[run_id={self.run_id}] Could not write metrics to {self.report_dir}: {e}"
+            )
+        return report
+
+    def _prune_reports(self) -> None:
+        """Delete all but the `keep` most recently written JSON reports."""
+        reports = sorted(
+            self.report_dir.glob("run-*.json"),  # type: ignore[union-attr]
+            key=lambda path: (path.stat().st_mtime_ns, path.name),
+        )
+        for path in reports[: -self.keep]:
+            path.unlink(missing_ok=True)
+
+
+def prometheus_text(report: Dict[str, Any]) -> str:
+    """Render a run report in the Prometheus text exposition format."""
+    lines: List[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples: List[tuple]) -> None:
+        lines.append(f"# HELP aqua_pipeline_{name} {help_text}")
+        lines.append(f"# TYPE aqua_pipeline_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            suffix = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"aqua_pipeline_{name}{suffix} {value}")
+
+    metric(
+        "last_run_info",
+        "gauge",
+        "Run id and status of the last pipeline run.",
+        [({"run_id": report["run_id"], "status": report["status"]}, 1)],
+    )
+    metric(
+        "last_run_timestamp_seconds",
+        "gauge",
+        "Start time of the last run.",
+        [({}, datetime.fromisoformat(report["started_at"]).timestamp())],
+    )
+    metric(
+        "run_duration_seconds",
+        "gauge",
+        "Wall time of the last run.",
+        [({}, report["duration_seconds"])],
+    )
+    metric(
+        "records_per_second",
+        "gauge",
+        "Records fetched per second of the last run.",
+        [({}, report["records_per_second"] or 0)],
+    )
+    if report["peak_rss_bytes"] is not None:
+        metric(
+            "peak_rss_bytes", "gauge", "Peak resident set size.", [({}, report["peak_rss_bytes"])]
+        )
+    for name, value in sorted(report["counters"].items()):
+        metric(
+            name,
+            "gauge",
+            f"{name.replace('_', ' ').capitalize()} in the last run.",
+            [({}, value)],
+        )
+    stages = sorted(report["stages"].items())
+    metric(
+        "stage_seconds",
+        "gauge",
+        "Wall time spent in each stage in the last run.",
+        [({"stage": name}, stats["seconds"]) for name, stats in stages],
+    )
+    metric(
+        "stage_calls",
+        "gauge",
+        "Times each stage ran in the last run.",
+        [({"stage": name}, int(stats["calls"])) for name, stats in stages],
+    )
+    for name, histogram in sorted(report["histograms"].items()):
+        lines.append(f"# HELP aqua_pipeline_{name} Latency distribution in the last run.")
+        lines.append(f"# TYPE aqua_pipeline_{name} histogram")
+        for bound, count in histogram["buckets"].items():
+            lines.append(f'aqua_pipeline_{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f'aqua_pipeline_{name}_bucket{{le="+Inf"}} {histogram["count"]}')
+        lines.append(f"aqua_pipeline_{name}_sum {histogram['sum']}")
+        lines.append(f"aqua_pipeline_{name}_count {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,670 @@
+"""
+Normalization of raw data.gov.in payloads into canonical water quality readings
+Field resolution is planned once per record schema and reused for every record
+"""
+
+import calendar
+import logging
+import os
+import random
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, cast
+
+import numpy as np
+import pandas as pd
+from dateutil import parser as date_parser
+
+from config import INDIAN_WATER_BODIES, WATER_QUALITY_PARAMETERS
+from readings_batch import ReadingsBatch, Station, day_code
+
+logger = logging.getLogger(__name__)
+
+# Mapping for fuzzy matching of fields
+# Key: Standardized field name
+# Value: List of potential field names in API response
+FIELD_MAPPING: Dict[str, List[str]] = {
+    "state": ["state", "state_name", "state name"],
+    "district": ["district", "district_name", "city"],
+    "location": [
+        "location",
+        "location_name",
+        "locations",
+        "station_name",
+        "station",
+        "station_code",
+        "water quality locations",
+        "water_quality_locations",
+    ],
+    "latitude": ["latitude", "lat"],
+    "longitude": ["longitude", "long", "lon"],
+}
+
+# Parameter mapping
+# Key: Parameter name in WATER_QUALITY_PARAMETERS
+# Value: List of potential field names in API response
+PARAM_MAPPING: Dict[str, List[str]] = {
+    "BOD": [
+        "biochemical oxygen demand-mean",
+        "biochemical_oxygen_demand-mean",
+        "biochemical_oxygen_demand_b_o_d_mg_l__mean",
+        "bod",
+        "b.o.d",
+        "biochemical_oxygen_demand",
+        "bod_mg_l",
+        "biochemical_oxygen_demand_mg_l",
+        "biochemical_oxygen_demand_b_o_d_mg_l",
+    ],
+    "TDS": [
+        "conductivity-mean",
+        "conductivity_mhos_cm__mean",
+        "tds",
+        "total_dissolved_solids",
+        "total_dissolved_solids_mg_l",
+        "conductivity_mhos_cm",
+        "total_dissolved_solid_mg_l",
+    ],
+    "pH": ["ph-mean", "ph_mean", "ph", "p_h", "ph_level", "p_h_level"],
+    "DO": [
+        "dissolved oxygen-mean",
+        "dissolved_oxygen-mean",
+        "dissolved_oxygen_d_o_mg_l__mean",
+        "do",
+        "d.o",
+        "dissolved_oxygen",
+        "dissolved_oxygen_mg_l",
+        "dissolved_oxygen_d_o_mg_l",
+    ],
+    "Lead": ["lead", "pb", "lead_pb", "lead_mg_l"],
+    "Mercury": ["mercury", "hg", "mercury_hg", "mercury_mg_l"],
+    "Coliform": [
+        "fecal coliform-mean",
+        "fecal_coliform-mean",
+        "fecal_coliform_mpn_100ml__mean",
+        "total_coliform_mpn_100ml__mean",
+        "coliform",
+        "total_coliform",
+        "fecal_coliform",
+        "fecal_coliform_mpn_100ml",
+        "total_coliform_mpn_100ml",
+    ],
+    "Nitrates": [
+        "nitrate-mean",
+        "nitrate__n_nitrite_n_mg_l__mean",
+        "nitrate",
+        "nitrates",
+        "no3",
+        "nitrate_n_nitrite_n_mg_l",
+        "nitrate_mg_l",
+    ],
+}
+
+DATE_KEYS = ["date", "created_date", "updated_date", "timestamp", "measurement_date", "year"]
+
+# Keys used by "long" resources that carry one parameter/value pair per record
+PARAMETER_NAME_KEYS = [
+    "parameter",
+    "param",
+    "parameter_name",
+    "parameter code",
+    "parameter_code",
+    "indicator",
+    "variable",
+]
+PARAMETER_VALUE_KEYS = ["value", "val", "result", "reading", "measurement", "measured_value"]
+
+_STATE_KEY_BY_NORMALIZED = {k.lower().strip(): k for k in INDIAN_WATER_BODIES.keys()}
+_TITLE_YEAR = re.compile(r"(?:19|20)\d{2}")
+
+# Date layouts parsed without dateutil
+DATE_CACHE_SIZE = 4096
+_ISO_DATE = re.compile(
+    r"(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.\d{1,6})?)?Z?)?"
+)
+_NUMERIC_DATE = re.compile(r"(\d{1,2})[-/](\d{1,2})[-/](\d{4})")
+_BARE_YEAR = re.compile(r"\d{4}")
+
+
+class FieldPlan(NamedTuple):
+    """Source keys resolved for one record schema, in the priority order of the mappings"""
+
+    first_record_keys: List[str]
+    state: Optional[Any]
+    district: Optional[Any]
+    location: Optional[Any]
+    latitude: Optional[Any]
+    longitude: Optional[Any]
+    date_keys: Tuple[Any, ...]
+    params: Tuple[Tuple[str, Tuple[Any, ...]], ...]
+    parameter_name_keys: Tuple[Any, ...]
+    parameter_value_keys: Tuple[Any, ...]
+
+
+@lru_cache(maxsize=256)
+def resolve_field_plan(keys: Tuple[Any, ...]) -> FieldPlan:
+    """
+    Build the field-resolution plan for records whose keys are exactly `keys` (in order).
+
+    Matching is case-insensitive; when two source keys differ only in case the later one wins,
+    as it would when lowercasing the record into a dict. The plan is cached per key tuple, so a
+    resource with a fixed schema pays for candidate matching once per process rather than once
+    per record.
+    """
+    source_key_by_lower: Dict[str, Any] = {}
+    for key in keys:
+        source_key_by_lower[str(key).lower()] = key
+
+    def present(candidates: List[str]) -> Tuple[Any, ...]:
+        return tuple(source_key_by_lower[c] for c in candidates if c in source_key_by_lower)
+
+    def first(candidates: List[str]) -> Optional[Any]:
+        found = present(candidates)
+        return found[0] if found else None
+
+    params = tuple(
+        (param, present(candidates))
+        for param, candidates in PARAM_MAPPING.items()
+        if present(candidates)
+    )
+
+    return FieldPlan(
+        first_record_keys=sorted(source_key_by_lower.keys()),
+        state=first(FIELD_MAPPING["state"]),
+        district=first(FIELD_MAPPING["district"]),
+        location=first(FIELD_MAPPING["location"]),
+        latitude=first(FIELD_MAPPING["latitude"]),
+        longitude=first(FIELD_MAPPING["longitude"]),
+        date_keys=present(DATE_KEYS),
+        params=params,
+        parameter_name_keys=present(PARAMETER_NAME_KEYS),
+        parameter_value_keys=present(PARAMETER_VALUE_KEYS),
+    )
+
+
+def _clean_label(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip().replace('"', "").replace("'", "")
+        value = " ".join(value.split())
+    return value
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _parse_reading(value: Any) -> Optional[float]:
+    """Parse a reading cell, treating blanks and NA/NaN markers as missing."""
+    try:
+        val_str = str(value).strip()
+        if val_str and val_str.lower() != "na" and val_str.lower() != "nan":
+            return float(val_str)
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def _fast_parse_date(text: str, today: date) -> Optional[datetime]:
+    """
+    Parse the date layouts data.gov.in actually uses without going through dateutil.
+
+    Results match `dateutil.parser.parse` exactly: numeric dd-mm-yyyy style dates are read
+    month-first unless the first number cannot be a month, and a bare year takes today's month
+    and day. Returns None for anything else (or any invalid date) so the caller falls back;
+    that includes years below 1000, which dateutil may read as two-digit years ("0099" is 1999).
+    """
+    try:
+        match = _ISO_DATE.fullmatch(text)
+        if match:
+            year, month, day, hour, minute, second = (int(g or 0) for g in match.groups())
+            if year < 1000:
+                return None
+            return datetime(year, month, day, hour, minute, second)
+        match = _NUMERIC_DATE.fullmatch(text)
+        if match:
+            first, second_number, year = (int(g) for g in match.groups())
+            if first <= 12:
+                return datetime(year, first, second_number)
+            return datetime(year, second_number, first)
+        if _BARE_YEAR.fullmatch(text):
+            year = int(text)
+            if year < 1000:
+                return None
+            day = min(today.day, calendar.monthrange(year, today.month)[1])
+            return datetime(year, today.month, day)
+    except ValueError:
+        pass
+    return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_text(text: str, today: date) -> Optional[str]:
+    dt = _fast_parse_date(text, today)
+    if dt is None:
+        try:
+            # Parse date using dateutil which is robust
+            dt = date_parser.parse(text)
+        except (ValueError, TypeError):
+            return None
+    # isoformat zero-pads years below 1000, which strftime("%Y") does not
+    return dt.date().isoformat()
+
+
+def _parse_date(value: Any) -> Optional[str]:
+    """
+    Parse a date cell to YYYY-MM-DD, or None when it is not a date.
+
+    Known layouts are parsed with precompiled patterns and only unusual strings reach dateutil.
+    Results are memoized in a bounded LRU keyed on the text and today's date, since dateutil
+    fills missing parts from today.
+    """
+    return _parse_date_text(str(value), date.today())
+
+
+def _map_cached(values: List[Any], func: Any) -> List[Any]:
+    """Apply `func` to every value, computing it once per distinct string."""
+    cache: Dict[str, Any] = {}
+    out = []
+    for value in values:
+        if isinstance(value, str):
+            if value not in cache:
+                cache[value] = func(value)
+            out.append(cache[value])
+        else:
+            out.append(func(value))
+    return out
+
+
+def _map_parameter_name(candidate_param: str) -> Optional[str]:
+    normalized_param = candidate_param.lower().replace("_", " ").replace("-", " ").replace(".", " ")
+    normalized_param = " ".join(normalized_param.split())
+
+    if normalized_param in ["bod", "b o d", "biochemical oxygen demand"]:
+        return "BOD"
+    elif normalized_param in ["tds", "total dissolved solids", "conductivity"]:
+        return "TDS"
+    elif normalized_param in ["ph", "p h", "ph level"]:
+        return "pH"
+    elif normalized_param in ["do", "d o", "dissolved oxygen"]:
+        return "DO"
+    elif "coliform" in normalized_param:
+        return "Coliform"
+    elif "nitrate" in normalized_param or normalized_param == "no3":
+        return "Nitrates"
+    elif normalized_param in ["lead", "pb"]:
+        return "Lead"
+    elif normalized_param in ["mercury", "hg"]:
+        return "Mercury"
+    return None
+
+
+def _estimate_coordinates(state: Any) -> Tuple[float, float]:
+    """Very rough coordinates for a record without latitude/longitude, from its state."""
+    normalized_state = state.lower().strip() if isinstance(state, str) else None
+    if normalized_state and normalized_state in _STATE_KEY_BY_NORMALIZED:
+        state_key = _STATE_KEY_BY_NORMALIZED[normalized_state]
+        base_lat, base_lon = (
+            cast(dict, INDIAN_WATER_BODIES).get(state_key, {}).get("coordinates", (0.0, 0.0))
+        )
+        return base_lat + random.uniform(-0.15, 0.15), base_lon + random.uniform(-0.15, 0.15)
+    base_lat, base_lon = 22.9734, 78.6569
+    return base_lat + random.uniform(-2.0, 2.0), base_lon + random.uniform(-2.0, 2.0)
+
+
+def default_measurement_date(raw_data: Dict[str, Any]) -> str:
+    """Measurement date for records without one: the resource title's year, else today."""
+    title = str(raw_data.get("title") or "")
+    year_match = _TITLE_YEAR.search(title)
+    if year_match:
+        return f"{year_match.group(0)}-01-01"
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def _process_record(
+    record: Dict[str, Any], plan: FieldPlan, default_date: str
+) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+
+    # Extract location info
+    state = _clean_label(record[plan.state]) if plan.state is not None else None
+    district = _clean_label(record[plan.district]) if plan.district is not None else None
+    location_name = _clean_label(record[plan.location]) if plan.location is not None else None
+
+    # Default location name if missing
+    if not location_name:
+        if district and state:
+            location_name = f"Station in {district}, {state}"
+        elif state:
+            location_name = f"Station in {state}"
+        else:
+            location_name = "Unknown Location"
+
+    latitude = _to_float(record[plan.latitude]) if plan.latitude is not None else None
+    longitude = _to_float(record[plan.longitude]) if plan.longitude is not None else None
+
+    # If lat/long missing, try to estimate from state (very rough fallback)
+    if latitude is None or longitude is None:
+        latitude, longitude = _estimate_coordinates(state)
+
+    # measurement date
+    measurement_date = default_date
+    for date_key in plan.date_keys:
+        parsed_date = _parse_date(record[date_key])
+        if parsed_date is not None:
+            measurement_date = parsed_date
+            break
+
+    # Extract parameters
+    for param, source_keys in plan.params:
+        value = None
+        for key in source_keys:
+            value = _parse_reading(record[key])
+            if value is not None:
+                break
+
+        if value is not None:
+            rows.append(
+                {
+                    "location_name": location_name,
+                    "state": state or "Unknown State",
+                    "district": district,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "parameter": param,
+                    "value": value,
+                    "unit": WATER_QUALITY_PARAMETERS[param]["unit"],
+                    "measurement_date": measurement_date,
+                    "source": "government",  # Mapped to schema enum
+                }
+            )
+
+    if rows:
+        return rows
+
+    candidate_param = None
+    for key in plan.parameter_name_keys:
+        if record[key]:
+            candidate_param = str(record[key]).strip()
+            break
+
+    candidate_value = None
+    for key in plan.parameter_value_keys:
+        if record[key] is not None:
+            candidate_value = record[key]
+            break
+
+    if candidate_param is not None and candidate_value is not None:
+        mapped_param = _map_parameter_name(candidate_param)
+        if mapped_param:
+            try:
+                val_str = str(candidate_value).strip()
+                if val_str and val_str.lower() not in ["na", "nan", "null", "none", ""]:
+                    rows.append(
+                        {
+                            "location_name": location_name,
+                            "state": state or "Unknown State",
+                            "district": district,
+                            "latitude": latitude,
+                            "longitude": longitude,
+                            "parameter": mapped_param,
+                            "value": float(val_str),
+                            "unit": WATER_QUALITY_PARAMETERS[mapped_param]["unit"],
+                            "measurement_date": measurement_date,
+                            "source": "government",
+                        }
+                    )
+            except (ValueError, TypeError):
+                pass
+
+    return rows
+
+
+def _columnar_plan(records: List[Any]) -> Optional[FieldPlan]:
+    """Plan for the columnar path, or None when the page needs record-by-record handling."""
+    first = records[0]
+    if type(first) is not dict:
+        return None
+    keys = tuple(first.keys())
+    for record in records:
+        if type(record) is not dict or tuple(record.keys()) != keys:
+            return None
+    plan = resolve_field_plan(keys)
+    if plan.parameter_name_keys and plan.parameter_value_keys:
+        # Records without parameter columns fall back to parameter/value pairs one at a time
+        return None
+    return plan
+
+
+def _parse_readings_column(values: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Column-wise `_parse_reading`: float64 values and a mask of the cells that hold a reading."""
+    text = pd.Series(values, dtype=object).map(str).str.strip()
+    present = ((text != "") & ~text.str.lower().isin(["na", "nan"])).to_numpy()
+    parsed = np.full(len(values), np.nan)
+    cells = text.to_numpy(dtype=object)[present]
+    try:
+        # Casting str objects to float64 goes through float() itself, unlike pd.to_numeric,
+        # whose fast parser can land one ULP away from what the record path stores.
+        parsed[present] = cells.astype(np.float64)
+    except ValueError:
+        floats = [_to_float(cell) for cell in cells]
+        parsed[present] = [np.nan if f is None else f for f in floats]
+        present[np.flatnonzero(present)[[f is None for f in floats]]] = False
+    return parsed, present
+
+
+class _PageReadings(NamedTuple):
+    """Readings of a columnar page: per-record fields plus one (record, parameter) pair each"""
+
+    location_names: List[Any]
+    states: List[Any]
+    districts: List[Any]
+    latitudes: List[Any]
+    longitudes: List[Any]
+    measurement_dates: List[str]
+    params: List[str]
+    record_idx: np.ndarray
+    param_idx: np.ndarray
+    values: np.ndarray
+
+    def records(self) -> List[Dict[str, Any]]:
+        units = [WATER_QUALITY_PARAMETERS[param]["unit"] for param in self.params]
+        return [
+            {
+                "location_name": self.location_names[i],
+                "state": self.states[i],
+                "district": self.districts[i],
+                "latitude": self.latitudes[i],
+                "longitude": self.longitudes[i],
+                "parameter": self.params[j],
+                "value": value,
+                "unit": units[j],
+                "measurement_date": self.measurement_dates[i],
+                "source": "government",  # Mapped to schema enum
+            }
+            for i, j, value in zip(
+                self.record_idx.tolist(), self.param_idx.tolist(), self.values.tolist()
+            )
+        ]
+
+    def batch(self) -> ReadingsBatch:
+        """The readings as a ReadingsBatch, without building a dict per reading."""
+        stations: Dict[Station, int] = {}
+        days: Dict[str, int] = {}
+        record_station = np.empty(len(self.states), dtype=np.int32)
+        record_date = np.empty(len(self.states), dtype=np.int32)
+        for i, station in enumerate(
+            zip(self.location_names, self.states, self.districts, self.latitudes, self.longitudes)
+        ):
+            record_station[i] = stations.setdefault(Station(*station), len(stations))
+            text = self.measurement_dates[i]
+            if text not in days:
+                days[text] = day_code(text)
+            record_date[i] = days[text]
+        return ReadingsBatch(
+            station=record_station[self.record_idx],
+            parameter=self.param_idx.astype(np.int16),
+            value=self.values,
+            date=record_date[self.record_idx],
+            source=np.zeros(len(self.values), dtype=np.int8),
+            stations=list(stations),
+            parameters=list(self.params),
+            units=[WATER_QUALITY_PARAMETERS[param]["unit"] for param in self.params],
+            sources=["government"],  # Mapped to schema enum
+        )
+
+
+def _process_columnar(
+    records: List[Dict[str, Any]], plan: FieldPlan, default_date: str
+) -> _PageReadings:
+    """
+    Columnar equivalent of running `_process_record` over a page with a single schema.
+
+    Parameter columns are coerced to float64 and melted into (record, parameter) pairs in one
+    pass; labels, coordinates and dates are computed once per distinct value. Everything that can
+    raise runs before the random coordinate fallback, so the caller can retry record by record
+    without shifting the random sequence.
+    """
+    n = len(records)
+
+    def column(key: Any) -> List[Any]:
+        return [record[key] for record in records]
+
+    def labels(key: Any) -> List[Any]:
+        return _map_cached(column(key), _clean_label) if key is not None else [None] * n
+
+    states = labels(plan.state)
+    districts = labels(plan.district)
+    location_names = labels(plan.location)
+    latitudes = [None] * n
+    if plan.latitude is not None:
+        latitudes = _map_cached(column(plan.latitude), _to_float)
+    longitudes = [None] * n
+    if plan.longitude is not None:
+        longitudes = _map_cached(column(plan.longitude), _to_float)
+
+    measurement_dates: List[Optional[str]] = [None] * n
+    for date_key in plan.date_keys:
+        parsed_dates = _map_cached(column(date_key), _parse_date)
+        measurement_dates = [
+            current if current is not None else parsed
+            for current, parsed in zip(measurement_dates, parsed_dates)
+        ]
+
+    params = [param for param, _ in plan.params]
+    values = np.full((n, len(params)), np.nan)
+    found = np.zeros((n, len(params)), dtype=bool)
+    for j, (_, source_keys) in enumerate(plan.params):
+        for key in source_keys:
+            parsed, present = _parse_readings_column(column(key))
+            take = present & ~found[:, j]
+            values[take, j] = parsed[take]
+            found[:, j] |= present
+
+    # Row-major nonzero keeps record order, then parameter order within a record
+    record_idx, param_idx = np.nonzero(found)
+
+    for i in range(n):
+        location_name = location_names[i]
+        if not location_name:
+            if districts[i] and states[i]:
+                location_names[i] = f"Station in {districts[i]}, {states[i]}"
+            elif states[i]:
+                location_names[i] = f"Station in {states[i]}"
+            else:
+                location_names[i] = "Unknown Location"
+        # If lat/long missing, try to estimate from state (very rough fallback)
+        if latitudes[i] is None or longitudes[i] is None:
+            latitudes[i], longitudes[i] = _estimate_coordinates(states[i])
+
+    return _PageReadings(
+        location_names=location_names,
+        states=[state or "Unknown State" for state in states],
+        districts=districts,
+        latitudes=latitudes,
+        longitudes=longitudes,
+        measurement_dates=[d or default_date for d in measurement_dates],
+        params=params,
+        record_idx=record_idx,
+        param_idx=param_idx,
+        values=values[record_idx, param_idx],
+    )
+
+
+def _process_records(
+    records: Any, default_date: str
+) -> Tuple[List[Dict[str, Any]], Optional[List[str]]]:
+    """Run `_process_record` over every record, skipping the ones that fail."""
+    processed_data: List[Dict[str, Any]] = []
+    first_record_keys = None
+    for record in records:
+        try:
+            plan = resolve_field_plan(tuple(record.keys()))
+            if first_record_keys is None:
+                first_record_keys = plan.first_record_keys
+            processed_data.extend(_process_record(record, plan, default_date))
+        except Exception as e:
+            logger.warning(f"Error processing record: {str(e)}")
+            continue
+    return processed_data, first_record_keys
+
+
+def _process_page(raw_data: Dict, run_id: str, as_batch: bool) -> Any:
+    logger.info(f"[run_id={run_id}] Processing data from data.gov.in")
+
+    if not raw_data or "records" not in raw_data:
+        logger.warning(f"[run_id={run_id}] No records found in data.gov.in response")
+        return ReadingsBatch.empty() if as_batch else []
+
+    default_date = default_measurement_date(raw_data)
+    records = raw_data["records"]
+
+    columnar_min_rows = int(os.getenv("DATA_GOV_IN_COLUMNAR_MIN_ROWS", "1000"))
+    if isinstance(records, list) and 0 < columnar_min_rows <= len(records):
+        plan = _columnar_plan(records)
+        if plan is not None:
+            try:
+                page = _process_columnar(records, plan, default_date)
+            except Exception as e:
+                logger.warning(
+                    f"[run_id={run_id}] Columnar parsing failed ({e}); "
+                    "processing records one by one"
+                )
+            else:
+                if not len(page.values):
+                    logger.warning(
+                        f"[run_id={run_id}] Parsed 0 readings from data.gov.in; "
+                        f"first record keys: {plan.first_record_keys}"
+                    )
+                return page.batch() if as_batch else page.records()
+
+    processed_data, first_record_keys = _process_records(records, default_date)
+
+    if not processed_data:
+        logger.warning(
+            f"[run_id={run_id}] Parsed 0 readings from data.gov.in; "
+            f"first record keys: {first_record_keys}"
+        )
+
+    return ReadingsBatch.from_records(processed_data) if as_batch else processed_data
+
+
+def process_data_gov_in(raw_data: Dict, run_id: str = "-") -> List[Dict[str, Any]]:
+    """
+    Normalize a raw data.gov.in response into canonical reading dicts.
+
+    See `WaterQualityDataFetcher._process_data_gov_in` for the output format.
+    """
+    return _process_page(raw_data, run_id, as_batch=False)
+
+
+def process_data_gov_in_batch(raw_data: Dict, run_id: str = "-") -> ReadingsBatch:
+    """
+    Normalize a raw data.gov.in response into a ReadingsBatch.
+
+    Same readings, in the same order, as `process_data_gov_in`; a page parsed column-wise goes
+    straight into the batch's arrays without a dict per reading.
+    """
+    return _process_page(raw_data, run_id, as_batch=True)
@@ -0,0 +1,178 @@
+"""
+Rate limiting and retry helpers for upstream HTTP APIs
+Shares one token bucket per host across every source configured for it
+"""
+
+import asyncio
+import logging
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from config import APIConfig
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: throttling and transient upstream failures
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+
+class APIRequestError(RuntimeError):
+    """Raised when an upstream API answers with a non-success status"""
+
+    def __init__(self, label: str, status: int, body: str):
+        super().__init__(f"{label} request failed with status {status}: {body}")
+        self.status = status
+        self.body = body
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute: int, capacity: Optional[int] = None):
+        self.rate_per_second = max(1, rate_per_minute) / 60.0
+        self.capacity = float(capacity or max(1, rate_per_minute // 10))
+        self._tokens = self.capacity
+        self._updated_at: Optional[float] = None
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self._updated_at is not None:
+            elapsed = now - self._updated_at
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available (and any pause has expired), then take it."""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while True:
+                now = loop.time()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate_per_second
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller of this bucket for `seconds` (e.g. after a Retry-After)."""
+        until = asyncio.get_running_loop().time() + max(0.0, seconds)
+        self._paused_until = max(self._paused_until, until)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as delta-seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given 1-based attempt number."""
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+
+class RateLimiter:
+    """Per-host token buckets plus retrying JSON requests driven by APIConfig"""
+
+    def __init__(self, apis: Dict[str, APIConfig]):
+        # Sources on the same host draw from one bucket; it refills at the
+        # lowest rate_limit declared for that host, so no source exceeds its
+        # own limit and together they never exceed the host quota.
+        self._host_rates: Dict[str, int] = {}
+        for api in apis.values():
+            host = self.host_for(api)
+            self._host_rates[host] = min(self._host_rates.get(host, api.rate_limit), api.rate_limit)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def host_for(api: APIConfig) -> str:
+        return urlparse(api.base_url).netloc.lower()
+
+    def bucket_for(self, api: APIConfig) -> TokenBucket:
+        host = self.host_for(api)
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self._host_rates.get(host, api.rate_limit))
+            self._buckets[host] = bucket
+        return bucket
+
+    async def request_json(
+        self,
+        session: aiohttp.ClientSession,
+        api: APIConfig,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        label: str = "",
+    ) -> Any:
+        """
+        GET `url` and return its JSON body, respecting the host bucket.
+
+        Retries 429/5xx responses, timeouts and connection errors up to
+        `api.retry_attempts` times with jittered exponential backoff, waiting
+        for Retry-After instead when the server sends one. Each attempt is
+        bounded by `api.timeout` seconds.
+
+        Raises:
+            APIRequestError: On a non-retryable status, or a retryable one on the last attempt.
+            aiohttp.ClientError / asyncio.TimeoutError: When the last attempt fails to connect.
+        """
+        label = label or self.host_for(api)
+        bucket = self.bucket_for(api)
+        timeout = aiohttp.ClientTimeout(total=api.timeout)
+        attempts = max(1, api.retry_attempts)
+
+        for attempt in range(1, attempts + 1):
+            await bucket.acquire()
+            retry_after = None
+            try:
+                async with session.get(
+                    url, params=params, headers=headers, timeout=timeout
+                ) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    body = (await response.text())[:500]
+                    error: Exception = APIRequestError(label, response.status, body)
+                    if response.status not in RETRYABLE_STATUSES:
+                        raise error
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+
+            if attempt == attempts:
+                raise error
+
+            if retry_after is not None:
+                bucket.pause(retry_after)
+                delay = retry_after
+            else:
+                delay = backoff_delay(attempt)
+            logger.warning(
+                f"{label} attempt {attempt}/{attempts} failed ({error!r}); retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")
@@ -0,0 +1,398 @@
+"""
+Columnar batches of water-quality readings
+Holds a batch as dictionary-encoded stations, parameters and sources, float64 values and
+integer day codes, instead of one ten-key dict per reading
+"""
+
+import logging
+from array import array
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from dateutil import parser as date_parser
+
+logger = logging.getLogger(__name__)
+
+STATION_FIELDS = ("location_name", "state", "district", "latitude", "longitude")
+READING_FIELDS = STATION_FIELDS + ("parameter", "value", "unit", "measurement_date", "source")
+
+# Day code of a reading without a measurement date
+NO_DATE = int(np.iinfo(np.int32).min)
+
+_EPOCH = date(1970, 1, 1)
+
+
+class Station(NamedTuple):
+    """Where a reading was taken; shared by every reading of the station in a batch"""
+
+    location_name: Any
+    state: Any
+    district: Any
+    latitude: Any
+    longitude: Any
+
+
+def day_code(value: Any) -> int:
+    """
+    Days since 1970-01-01 of a date, datetime or date string (NO_DATE for None).
+
+    Strings other than "YYYY-MM-DD..." go through dateutil, which reads them the way
+    normalize parses date cells (e.g. "05-01-2023" month-first). Raises ValueError for text
+    that is not a date.
+    """
+    if value is None or value == "":
+        return NO_DATE
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return (value - _EPOCH).days
+    text = str(value)
+    try:
+        return int(np.datetime64(text, "D").astype(np.int64))
+    except ValueError:
+        pass
+    try:
+        return (date_parser.parse(text).date() - _EPOCH).days
+    except (ValueError, OverflowError) as e:
+        raise ValueError(f"Not a date: {text!r}") from e
+
+
+def day_text(code: int) -> Optional[str]:
+    return None if code == NO_DATE else str(np.datetime64(int(code), "D"))
+
+
+def first_appearance(codes: np.ndarray) -> List[int]:
+    """Distinct codes in the order they first occur."""
+    unique, first = np.unique(codes, return_index=True)
+    return unique[np.argsort(first, kind="stable")].tolist()
+
+
+class ReadingsBatchBuilder:
+    """Accumulates readings one at a time into compact arrays, interning every label"""
+
+    def __init__(self) -> None:
+        self._stations: Dict[tuple, int] = {}
+        self._parameters: Dict[Any, int] = {}
+        self._units: List[Optional[str]] = []
+        self._sources: Dict[Any, int] = {}
+        self._days: Dict[Any, int] = {}
+        self.station = array("i")
+        self.parameter = array("h")
+        self.value = array("d")
+        self.date = array("i")
+        self.source = array("b")
+
+    def add(
+        self,
+        location_name: Any,
+        state: Any,
+        district: Any,
+        latitude: Any,
+        longitude: Any,
+        parameter: Any,
+        value: Any,
+        unit: Any,
+        measurement_date: Any,
+        source: Any,
+    ) -> None:
+        day = self._days.get(measurement_date)
+        if day is None:
+            try:
+                day = day_code(measurement_date)
+            except ValueError:
+                logger.warning(f"Skipping reading with unparseable date {measurement_date!r}")
+                return
+            if isinstance(measurement_date, (str, date)):
+                self._days[measurement_date] = day
+
+        key = (location_name, state, district, latitude, longitude)
+        code = self._stations.get(key)
+        if code is None:
+            code = self._stations[key] = len(self._stations)
+        self.station.append(code)
+
+        code = self._parameters.get(parameter)
+        if code is None:
+            code = self._parameters[parameter] = len(self._parameters)
+            self._units.append(unit)
+        self.parameter.append(code)
+
+        self.value.append(np.nan if value is None else float(value))
+        self.date.append(day)
+
+        code = self._sources.get(source)
+        if code is None:
+            code = self._sources[source] = len(self._sources)
+        self.source.append(code)
+
+    def add_record(self, record: Dict[str, Any]) -> None:
+        self.add(*(record.get(field) for field in READING_FIELDS))
+
+    def build(self) -> "ReadingsBatch":
+        return ReadingsBatch(
+            station=np.frombuffer(self.station, dtype=np.int32).copy(),
+            parameter=np.frombuffer(self.parameter, dtype=np.int16).copy(),
+            value=np.frombuffer(self.value, dtype=np.float64).copy(),
+            date=np.frombuffer(self.date, dtype=np.int32).copy(),
+            source=np.frombuffer(self.source, dtype=np.int8).copy(),
+            stations=[Station(*key) for key in self._stations],
+            parameters=list(self._parameters),
+            units=list(self._units),
+            sources=list(self._sources),
+        )
+
+
+@dataclass(eq=False)
+class ReadingsBatch:
+    """
+    Readings as parallel arrays plus the dictionaries their codes index into.
+
+    A station's name, state, district and coordinates are stored once per batch however many
+    readings it has, parameters and sources are small code tables, values are float64 (NaN when
+    missing) and dates are days since 1970-01-01. Dates are therefore kept to the day, which is
+    what the pipeline stores. Slicing and `take` share the dictionaries, so they may list
+    entries no reading uses any more.
+
+    Iterating a batch yields the same reading dicts the pipeline has always passed around, for
+    code that still wants them.
+    """
+
+    station: np.ndarray  # int32 index into `stations`
+    parameter: np.ndarray  # int16 index into `parameters` and `units`
+    value: np.ndarray  # float64
+    date: np.ndarray  # int32 day code, NO_DATE when missing
+    source: np.ndarray  # int8 index into `sources`
+    stations: List[Station]
+    parameters: List[Any]
+    units: List[Optional[str]]
+    sources: List[Any]
+    # Station text has already been through the pipeline's sanitizer
+    text_clean: bool = False
+
+    @classmethod
+    def empty(cls) -> "ReadingsBatch":
+        return ReadingsBatchBuilder().build()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "ReadingsBatch":
+        """Encode reading dicts; missing keys are read as None."""
+        builder = ReadingsBatchBuilder()
+        for record in records:
+            builder.add_record(record)
+        return builder.build()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> "ReadingsBatch":
+        """Encode tuples in READING_FIELDS order, e.g. straight from a database cursor."""
+        builder = ReadingsBatchBuilder()
+        for row in rows:
+            builder.add(*row)
+        return builder.build()
+
+    @classmethod
+    def coerce(cls, data: Union["ReadingsBatch", Iterable[Dict[str, Any]]]) -> "ReadingsBatch":
+        return data if isinstance(data, ReadingsBatch) else cls.from_records(data)
+
+    @classmethod
+    def concat(cls, batches: Sequence["ReadingsBatch"]) -> "ReadingsBatch":
+        """
+        One batch holding every reading of `batches`, in order.
+
+        The merged dictionaries only keep entries some reading uses, so batches that were sliced
+        off a larger one do not drag its other stations along.
+        """
+        if len(batches) == 1:
+            return batches[0]
+        stations: Dict[Station, int] = {}
+        parameters: Dict[Any, int] = {}
+        units: List[Optional[str]] = []
+        sources: Dict[Any, int] = {}
+
+        def intern(
+            table: Dict[Any, int], entries: Sequence[Any], codes: np.ndarray, on_new: Any = None
+        ) -> np.ndarray:
+            mapping = np.zeros(len(entries), dtype=np.int64)
+            for i in first_appearance(codes):
+                code = table.get(entries[i])
+                if code is None:
+                    code = table[entries[i]] = len(table)
+                    if on_new is not None:
+                        on_new(i)
+                mapping[i] = code
+            return mapping
+
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in ("s", "p", "v", "d", "o")}
+        for batch in batches:
+            station_map = intern(stations, batch.stations, batch.station)
+            parameter_map = intern(
+                parameters,
+                batch.parameters,
+                batch.parameter,
+                lambda i, b=batch: units.append(b.units[i]),
+            )
+            source_map = intern(sources, batch.sources, batch.source)
+            parts["s"].append(station_map[batch.station])
+            parts["p"].append(parameter_map[batch.parameter])
+            parts["v"].append(batch.value)
+            parts["d"].append(batch.date)
+            parts["o"].append(source_map[batch.source])
+
+        def joined(name: str, dtype: Any) -> np.ndarray:
+            return np.concatenate(parts[name]).astype(dtype) if parts[name] else np.empty(0, dtype)
+
+        return cls(
+            station=joined("s", np.int32),
+            parameter=joined("p", np.int16),
+            value=joined("v", np.float64),
+            date=joined("d", np.int32),
+            source=joined("o", np.int8),
+            stations=list(stations),
+            parameters=list(parameters),
+            units=units,
+            sources=list(sources),
+            text_clean=all(batch.text_clean for batch in batches),
+        )
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def __getitem__(self, rows: slice) -> "ReadingsBatch":
+        return self.take(rows)
+
+    def take(self, rows: Any) -> "ReadingsBatch":
+        """Readings selected by a slice, an index array or a boolean mask."""
+        return ReadingsBatch(
+            station=self.station[rows],
+            parameter=self.parameter[rows],
+            value=self.value[rows],
+            date=self.date[rows],
+            source=self.source[rows],
+            stations=self.stations,
+            parameters=self.parameters,
+            units=self.units,
+            sources=self.sources,
+            text_clean=self.text_clean,
+        )
+
+    def station_order(self) -> List[int]:
+        """Codes of the stations readings use, in order of their first reading."""
+        return first_appearance(self.station)
+
+    def parameter_order(self) -> List[int]:
+        """Codes of the parameters readings use, in order of their first reading."""
+        return first_appearance(self.parameter)
+
+    def map_station_text(self, func: Any, fields: Iterable[str]) -> "ReadingsBatch":
+        """Apply `func` to the non-None station `fields`, once per station."""
+        wanted = [i for i, field in enumerate(STATION_FIELDS) if field in set(fields)]
+        if not wanted:
+            return self
+        interned: Dict[Station, int] = {}
+        mapping = np.empty(len(self.stations), dtype=np.int32)
+        for code, station in enumerate(self.stations):
+            values = list(station)
+            for i in wanted:
+                if values[i] is not None:
+                    values[i] = func(values[i])
+            mapping[code] = interned.setdefault(Station(*values), len(interned))
+        batch = self.take(slice(None))
+        batch.station = mapping[self.station] if len(self.station) else self.station
+        batch.stations = list(interned)
+        return batch
+
+    def date_texts(self) -> np.ndarray:
+        """Per reading, the measurement date as "YYYY-MM-DD" (or None), as an object array."""
+        codes, inverse = np.unique(self.date, return_inverse=True)
+        texts = np.array([day_text(code) for code in codes.tolist()], dtype=object)
+        return texts[inverse.reshape(-1)] if len(codes) else np.empty(0, dtype=object)
+
+    def value_list(self, rows: Any = slice(None)) -> List[Optional[float]]:
+        """Values as Python floats, None where missing."""
+        values = self.value[rows]
+        listed = values.tolist()
+        if np.isnan(values).any():
+            listed = [None if value != value else value for value in listed]
+        return listed
+
+    def newest_date(self) -> Optional[str]:
+        dated = self.date[self.date != NO_DATE]
+        return day_text(int(dated.max())) if len(dated) else None
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """The reading dict for row `i`."""
+        parameter = int(self.parameter[i])
+        value = float(self.value[i])
+        return dict(
+            zip(STATION_FIELDS, self.stations[int(self.station[i])]),
+            parameter=self.parameters[parameter],
+            value=None if value != value else value,
+            unit=self.units[parameter],
+            measurement_date=day_text(int(self.date[i])),
+            source=self.sources[int(self.source[i])],
+        )
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Every reading as a dict, in READING_FIELDS order."""
+        stations = self.stations
+        parameters, units, sources = self.parameters, self.units, self.sources
+        return [
+            {
+                "location_name": station.location_name,
+                "state": station.state,
+                "district": station.district,
+                "latitude": station.latitude,
+                "longitude": station.longitude,
+                "parameter": parameters[p],
+                "value": value,
+                "unit": units[p],
+                "measurement_date": day,
+                "source": sources[o],
+            }
+            for station, p, value, day, o in zip(
+                (stations[s] for s in self.station.tolist()),
+                self.parameter.tolist(),
+                self.value_list(),
+                self.date_texts().tolist(),
+                self.source.tolist(),
+            )
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        """A DataFrame with READING_FIELDS columns; labels stay dictionary-encoded (categorical)."""
+
+        def labels(entries: Sequence[Any], codes: np.ndarray) -> pd.Categorical:
+            entry_codes, uniques = pd.factorize(pd.Series(list(entries), dtype=object))
+            return pd.Categorical.from_codes(
+                entry_codes[codes] if len(entries) else codes, categories=uniques
+            )
+
+        def coordinates(field: int) -> np.ndarray:
+            column = np.array(
+                [np.nan if s[field] is None else float(s[field]) for s in self.stations],
+                dtype=np.float64,
+            )
+            return column[self.station] if len(column) else np.empty(0)
+
+        days = self.date.astype(np.int64)
+        days[self.date == NO_DATE] = np.iinfo(np.int64).min  # NaT
+        return pd.DataFrame(
+            {
+                "location_name": labels([s.location_name for s in self.stations], self.station),
+                "state": labels([s.state for s in self.stations], self.station),
+                "district": labels([s.district for s in self.stations], self.station),
+                "latitude": coordinates(3),
+                "longitude": coordinates(4),
+                "parameter": labels(self.parameters, self.parameter),
+                "value": self.value,
+                "unit": labels(self.units, self.parameter),
+                "measurement_date": days.view("datetime64[D]").astype("datetime64[ns]"),
+                "source": labels(self.sources, self.source),
+            }
+        )
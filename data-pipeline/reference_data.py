@@ -0,0 +1,104 @@
+"""
+Reference tables for the data pipeline
+Water quality parameters and Indian water bodies, importable without any database settings
+"""
+
+# Water quality parameters and their thresholds
+WATER_QUALITY_PARAMETERS = {
+    "BOD": {
+        "name": "Biochemical Oxygen Demand",
+        "unit": "mg/L",
+        "safe_limit": 3.0,
+        "moderate_limit": 6.0,
+        "high_limit": 10.0,
+        "critical_limit": 15.0,
+    },
+    "TDS": {
+        "name": "Total Dissolved Solids",
+        "unit": "mg/L",
+        "safe_limit": 500,
+        "moderate_limit": 1000,
+        "high_limit": 1500,
+        "critical_limit": 2000,
+    },
+    "pH": {
+        "name": "pH Level",
+        "unit": "",
+        "safe_min": 6.5,
+        "safe_max": 8.5,
+        "moderate_range": 1.0,
+        "critical_range": 2.0,
+    },
+    "DO": {
+        "name": "Dissolved Oxygen",
+        "unit": "mg/L",
+        "safe_limit": 6.0,
+        "moderate_limit": 4.0,
+        "high_limit": 2.0,
+        "critical_limit": 1.0,
+    },
+    "Lead": {
+        "name": "Lead",
+        "unit": "mg/L",
+        "safe_limit": 0.01,
+        "moderate_limit": 0.05,
+        "high_limit": 0.1,
+        "critical_limit": 0.2,
+    },
+    "Mercury": {
+        "name": "Mercury",
+        "unit": "mg/L",
+        "safe_limit": 0.001,
+        "moderate_limit": 0.005,
+        "high_limit": 0.01,
+        "critical_limit": 0.02,
+    },
+    "Coliform": {
+        "name": "Coliform Count",
+        "unit": "MPN/100ml",
+        "safe_limit": 2.2,
+        "moderate_limit": 10,
+        "high_limit": 50,
+        "critical_limit": 100,
+    },
+    "Nitrates": {
+        "name": "Nitrates",
+        "unit": "mg/L",
+        "safe_limit": 45,
+        "moderate_limit": 100,
+        "high_limit": 200,
+        "critical_limit": 300,
+    },
+}
+
+# Indian states and their major water bodies
+INDIAN_WATER_BODIES = {
+    "Uttar Pradesh": {
+        "rivers": ["Ganga", "Yamuna", "Gomti", "Ghaghara"],
+        "coordinates": [26.8467, 80.9462],
+    },
+    "Delhi": {"rivers": ["Yamuna"], "coordinates": [28.7041, 77.1025]},
+    "Maharashtra": {
+        "rivers": ["Godavari", "Krishna", "Tapi", "Narmada"],
+        "coordinates": [19.7515, 75.7139],
+    },
+    "Karnataka": {
+        "rivers": ["Krishna", "Cauvery", "Tungabhadra"],
+        "coordinates": [15.3173, 75.7139],
+    },
+    "Tamil Nadu": {
+        "rivers": ["Cauvery", "Vaigai", "Thamirabarani"],
+        "coordinates": [11.1271, 78.6569],
+    },
+    "West Bengal": {"rivers": ["Ganga", "Hooghly", "Damodar"], "coordinates": [22.9868, 87.8550]},
+    "Gujarat": {"rivers": ["Narmada", "Tapi", "Sabarmati"], "coordinates": [23.0225, 72.5714]},
+    "Rajasthan": {"rivers": ["Chambal", "Luni", "Banas"], "coordinates": [27.0238, 74.2179]},
+    "Madhya Pradesh": {
+        "rivers": ["Narmada", "Chambal", "Betwa", "Sone"],
+        "coordinates": [22.9734, 78.6569],
+    },
+    "Andhra Pradesh": {
+        "rivers": ["Godavari", "Krishna", "Penna"],
+        "coordinates": [15.9129, 79.7400],
+    },
+}
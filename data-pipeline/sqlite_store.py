@@ -0,0 +1,188 @@
+"""
+SQLite connection settings and schema layouts for the local/edge storage mode
+Shared by the data pipeline writer and the model trainer's reader
+"""
+
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# water_quality_readings layouts: "flat" repeats location and parameter text on every row;
+# "normalized" mirrors the Postgres star layout with integer location_id/parameter_id keys.
+FLAT = "flat"
+NORMALIZED = "normalized"
+
+# Indexes for the reads the trainer and the dashboard export do: newest readings first,
+# optionally for one parameter.
+READING_INDEXES = {
+    FLAT: {
+        "idx_wqr_measurement_date": "water_quality_readings(measurement_date)",
+        "idx_wqr_parameter_date": "water_quality_readings(parameter, measurement_date)",
+    },
+    NORMALIZED: {
+        "idx_wqr_measurement_date": "water_quality_readings(measurement_date)",
+        "idx_wqr_parameter_date": "water_quality_readings(parameter_id, measurement_date)",
+    },
+}
+
+# Same columns for both layouts, newest first
+READINGS_QUERY = {
+    FLAT: """
+        SELECT
+            location_name,
+            state,
+            district,
+            latitude,
+            longitude,
+            parameter,
+            value,
+            unit,
+            measurement_date,
+            source
+        FROM water_quality_readings
+        WHERE value IS NOT NULL
+        ORDER BY measurement_date DESC
+    """,
+    NORMALIZED: """
+        SELECT
+            l.name AS location_name,
+            l.state,
+            l.district,
+            l.latitude,
+            l.longitude,
+            p.parameter_code AS parameter,
+            r.value,
+            p.unit,
+            r.measurement_date,
+            r.source
+        FROM water_quality_readings r
+        JOIN locations l ON r.location_id = l.id
+        JOIN water_quality_parameters p ON r.parameter_id = p.id
+        WHERE r.value IS NOT NULL
+        ORDER BY r.measurement_date DESC
+    """,
+}
+
+
+def connect(db_path: str, readonly: bool = False) -> sqlite3.Connection:
+    """
+    Open `db_path` with the pragmas tuned for bulk ingestion and large scans.
+
+    Writers switch the file to WAL with synchronous=NORMAL, so readers do not block the writer
+    and each commit costs one fsync of the log, not of the database. Both sides get a memory
+    map (SQLITE_MMAP_SIZE bytes, default 256 MiB) and a page cache of SQLITE_CACHE_SIZE_KB
+    (default 64 MiB). Readers open the file read-only and leave the journal mode alone; WAL is
+    a property of the file.
+    """
+    if readonly:
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, timeout=30, uri=True)
+    else:
+        conn = sqlite3.connect(db_path, timeout=30)
+    if not readonly:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}")
+    conn.execute(f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_SIZE_KB', str(64 * 1024)))}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def requested_layout() -> str:
+    """The layout new databases get, from SQLITE_SCHEMA ("flat" by default or "normalized")."""
+    layout = os.getenv("SQLITE_SCHEMA", FLAT).strip().lower()
+    return NORMALIZED if layout == NORMALIZED else FLAT
+
+
+def reading_layout(conn: sqlite3.Connection) -> Optional[str]:
+    """Detect the layout of an existing water_quality_readings table, or None if there is none."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(water_quality_readings)")}
+    if not columns:
+        return None
+    return NORMALIZED if "location_id" in columns else FLAT
+
+
+def create_reading_indexes(cursor: sqlite3.Cursor, layout: str = FLAT) -> None:
+    """Create the secondary indexes on water_quality_readings if they are missing."""
+    for name, target in READING_INDEXES[layout].items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def create_normalized_schema(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the parameter dictionary and the normalized readings table.
+
+    Readings are keyed by (location_id, parameter_id, measurement_date) in a WITHOUT ROWID
+    table, so the natural key is the table itself rather than a second unique index. The
+    `locations` table is shared with the flat layout and must already exist.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS water_quality_parameters (
+            id INTEGER PRIMARY KEY,
+            parameter_code TEXT UNIQUE NOT NULL,
+            unit TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS water_quality_readings (
+            location_id INTEGER NOT NULL REFERENCES locations(id),
+            parameter_id INTEGER NOT NULL REFERENCES water_quality_parameters(id),
+            measurement_date DATE NOT NULL,
+            value REAL NOT NULL,
+            source TEXT NOT NULL,
+            PRIMARY KEY (location_id, parameter_id, measurement_date)
+        ) WITHOUT ROWID
+    """)
+    create_reading_indexes(cursor, NORMALIZED)
+
+
+def migrate_to_normalized(conn: sqlite3.Connection) -> None:
+    """
+    Convert a flat water_quality_readings table to the normalized layout in one transaction.
+
+    Stations and parameters are folded into their dictionary tables (the first row seen for a
+    station or parameter wins, as with INSERT OR IGNORE on save), readings are copied across
+    and the flat table is dropped. The file is vacuumed afterwards to give the space back.
+    """
+    conn.commit()
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN")
+        conn.execute("ALTER TABLE water_quality_readings RENAME TO water_quality_readings_flat")
+        for name in READING_INDEXES[FLAT]:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        create_normalized_schema(conn.cursor())
+        conn.execute("""
+            INSERT OR IGNORE INTO locations
+            (name, state, district, latitude, longitude, water_body_type)
+            SELECT location_name, state, district, latitude, longitude, 'river'
+            FROM water_quality_readings_flat ORDER BY id
+        """)
+        conn.execute("""
+            INSERT OR IGNORE INTO water_quality_parameters (parameter_code, unit)
+            SELECT parameter, unit FROM water_quality_readings_flat ORDER BY id
+        """)
+        migrated = conn.execute("""
+            INSERT OR IGNORE INTO water_quality_readings
+            (location_id, parameter_id, measurement_date, value, source)
+            SELECT l.id, p.id, f.measurement_date, f.value, f.source
+            FROM water_quality_readings_flat f
+            JOIN locations l ON l.name = f.location_name
+            JOIN water_quality_parameters p ON p.parameter_code = f.parameter
+            ORDER BY f.id
+        """).rowcount
+        conn.execute("DROP TABLE water_quality_readings_flat")
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.isolation_level = isolation_level
+    conn.execute("VACUUM")
+    logger.info(f"Migrated {migrated} SQLite readings to the normalized layout")
@@ -0,0 +1,175 @@
+"""
+Vectorized synthetic water-quality readings
+Builds whole columns of station, parameter, date and value at once from a seeded
+numpy Generator, for sample data, load tests and model training
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from reference_data import INDIAN_WATER_BODIES, WATER_QUALITY_PARAMETERS
+
+# Value distribution per parameter as (lognormal, mean, sigma); for lognormal ones the mean and
+# sigma are of log(value)
+VALUE_MODELS = {
+    "BOD": (False, 4.5, 2.0),
+    "TDS": (False, 400.0, 150.0),
+    "pH": (False, 7.5, 1.0),
+    "DO": (False, 5.5, 1.5),
+    "Lead": (True, -4.0, 1.0),
+    "Mercury": (True, -6.0, 0.5),
+    "Coliform": (True, 2.0, 1.0),
+    "Nitrates": (False, 25.0, 10.0),
+}
+
+# Yearly swing of every parameter but pH, peaking in spring
+SEASONAL_AMPLITUDE = 0.3
+MIN_VALUE = 0.001
+
+SeedLike = Union[None, int, np.random.Generator]
+
+
+class ReadingGenerator:
+    """
+    Draws synthetic readings as DataFrames with the pipeline's reading columns.
+
+    Stations are the rivers of INDIAN_WATER_BODIES (`sites_per_river` sampling sites each),
+    scattered around their state's coordinates, each with a pollution factor that raises its
+    pollutant levels and lowers its dissolved oxygen. Like a field visit, every sampled
+    station-day reports each parameter once, and no station-day is drawn twice within one
+    `sample` or `chunks` call, so (location, state, parameter, date) never repeats. Values
+    follow VALUE_MODELS (lognormal for metals and coliform) with a yearly seasonal cycle. Text
+    columns are categoricals, so a 10M-row frame costs a few integer arrays rather than
+    millions of strings.
+
+    Output is fully determined by the seed and the sequence of sample sizes drawn.
+    """
+
+    def __init__(
+        self,
+        seed: SeedLike = None,
+        start: Union[str, date] = "2020-01-01",
+        days: int = 1460,
+        sites_per_river: int = 1,
+        parameters: Optional[Sequence[str]] = None,
+        source: str = "sample_data",
+    ):
+        self.rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        self.start = np.datetime64(start, "D")
+        self.days = max(1, days)
+        self.source = source
+        self.parameters = list(parameters or VALUE_MODELS)
+        rng = self.rng
+
+        names, states, coords = [], [], []
+        for state, info in INDIAN_WATER_BODIES.items():
+            for river in info.get("rivers", []):  # type: ignore
+                for site in range(max(1, sites_per_river)):
+                    names.append(f"{river} at {state}" + (f" #{site + 1}" if site else ""))
+                    states.append(state)
+                    coords.append(info["coordinates"])  # type: ignore
+        n_stations = len(names)
+        self.station_names = pd.Index(names)
+        self.state_names, self.station_state = np.unique(states, return_inverse=True)
+        districts = rng.integers(1, 10, size=n_stations)
+        self.district_names, self.station_district = np.unique(
+            [f"District {d}" for d in districts], return_inverse=True
+        )
+        located = np.asarray(coords, dtype=float) + rng.uniform(-0.5, 0.5, size=(n_stations, 2))
+        self.latitude, self.longitude = located[:, 0], located[:, 1]
+        self.pollution = rng.lognormal(0.0, 0.3, size=n_stations)
+
+        models = [VALUE_MODELS[p] for p in self.parameters]
+        self.lognormal = np.array([m[0] for m in models])
+        self.mean = np.array([m[1] for m in models])
+        self.sigma = np.array([m[2] for m in models])
+        self.amplitude = np.array(
+            [0.0 if p == "pH" else SEASONAL_AMPLITUDE for p in self.parameters]
+        )
+        # pH ignores station pollution, dissolved oxygen falls with it, the rest rise with it
+        self.direction = np.array(
+            [0.0 if p == "pH" else -1.0 if p == "DO" else 1.0 for p in self.parameters]
+        )
+        units = [WATER_QUALITY_PARAMETERS.get(p, {}).get("unit") or "" for p in self.parameters]
+        self.unit_names, self.parameter_unit = np.unique(units, return_inverse=True)
+
+        dates = pd.DatetimeIndex(self.start + np.arange(self.days))
+        self.season = np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365)
+
+    def _station_days(self, n_rows: int) -> np.ndarray:
+        """Distinct station-day cells (station * days + day) enough for `n_rows` readings."""
+        n_cells = -(-n_rows // len(self.parameters))
+        grid = len(self.station_names) * self.days
+        if n_cells > grid:
+            raise ValueError(
+                f"{n_rows} readings need {n_cells} station-days but only {grid} exist; "
+                "raise `days` or `sites_per_river`"
+            )
+        return self.rng.choice(grid, size=n_cells, replace=False)
+
+    def _frame(self, cells: np.ndarray, rows: np.ndarray) -> pd.DataFrame:
+        """Readings `rows` of `cells`, where row r is parameter r % P of station-day r // P."""
+        rng = self.rng
+        n_rows = len(rows)
+        n_params = len(self.parameters)
+        station, day = np.divmod(cells[rows // n_params], self.days)
+        param = rows % n_params
+
+        value = self.mean[param] + self.sigma[param] * rng.standard_normal(n_rows)
+        lognormal = self.lognormal[param]
+        value[lognormal] = np.exp(value[lognormal])
+        value *= 1 + self.amplitude[param] * self.season[day]
+        value *= self.pollution[station] ** self.direction[param]
+        np.maximum(value, MIN_VALUE, out=value)
+
+        return pd.DataFrame(
+            {
+                "location_name": pd.Categorical.from_codes(station, self.station_names),
+                "state": pd.Categorical.from_codes(self.station_state[station], self.state_names),
+                "district": pd.Categorical.from_codes(
+                    self.station_district[station], self.district_names
+                ),
+                "latitude": self.latitude[station],
+                "longitude": self.longitude[station],
+                "parameter": pd.Categorical.from_codes(param, self.parameters),
+                "value": value,
+                "unit": pd.Categorical.from_codes(self.parameter_unit[param], self.unit_names),
+                "measurement_date": (self.start + day).astype("datetime64[ns]"),
+                "source": pd.Categorical.from_codes(np.zeros(n_rows, dtype=np.int8), [self.source]),
+            }
+        )
+
+    def sample(self, n_rows: int) -> pd.DataFrame:
+        """Draw `n_rows` readings; only the last station-day may lack some parameters."""
+        n_rows = max(0, n_rows)
+        return self._frame(self._station_days(n_rows), np.arange(n_rows))
+
+    def chunks(self, n_rows: int, chunk_size: int = 1_000_000) -> Iterator[pd.DataFrame]:
+        """Yield `n_rows` readings as frames of at most `chunk_size` rows."""
+        n_rows = max(0, n_rows)
+        chunk_size = max(1, chunk_size)
+        cells = self._station_days(n_rows)
+        for offset in range(0, n_rows, chunk_size):
+            yield self._frame(cells, np.arange(offset, min(offset + chunk_size, n_rows)))
+
+
+def generate_readings(n_rows: int, seed: SeedLike = None, **options: Any) -> pd.DataFrame:
+    """`n_rows` synthetic readings in one frame; `options` go to ReadingGenerator."""
+    return ReadingGenerator(seed, **options).sample(n_rows)
+
+
+def to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Reading dicts in the shape the fetcher saves (string dates, values to 3 places)."""
+    records = frame.astype(
+        {
+            column: object
+            for column in frame.columns
+            if isinstance(frame[column].dtype, pd.CategoricalDtype)
+        }
+    )
+    records["measurement_date"] = frame["measurement_date"].dt.strftime("%Y-%m-%d")
+    records["value"] = frame["value"].round(3)
+    return records.to_dict("records")
@@ -0,0 +1,115 @@
+"""Tests for in-process alert evaluation of newly inserted readings."""
+
+from datetime import datetime
+
+import psycopg2.extras
+import pytest
+
+from alert_engine import AlertEngine, alert_mode, risk_level
+
+BOD, PH = 1, 2
+CODES = {BOD: "BOD", PH: "pH", 9: "Turbidity"}
+NAMES = {10: "Okhla", 11: "Varanasi"}
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Answer the engine's lookups from `stored`/`active` and capture its writes."""
+    state = {"stored": [], "active": [], "writes": [], "lookups": 0}
+
+    def fake_execute_values(cursor, sql, rows, template=None, page_size=100, fetch=False):
+        sql = " ".join(sql.split())
+        if sql.startswith("SELECT r.location_id"):
+            state["lookups"] += 1
+            return [row for row in state["stored"] if (row[0], row[1]) in set(rows)]
+        if sql.startswith("SELECT id"):
+            state["lookups"] += 1
+            return [row for row in state["active"] if (row[1], row[2]) in set(rows)]
+        state["writes"].append((sql.split(" ")[0], list(rows), page_size))
+        return None
+
+    monkeypatch.setattr(psycopg2.extras, "execute_values", fake_execute_values)
+    return state
+
+
+def _reading(location_id, parameter_id, value, day):
+    return (location_id, parameter_id, value, datetime(2024, 1, day))
+
+
+class TestRiskLevel:
+    """Tests for parity with the calculate_risk_level() trigger."""
+
+    @pytest.mark.parametrize(
+        "parameter, value, expected",
+        [
+            ("BOD", 3.0, "low"),
+            ("BOD", 6.0, "medium"),
+            ("BOD", 9.9, "high"),
+            ("BOD", 15.1, "critical"),
+            ("DO", 7.0, "low"),
+            ("DO", 4.5, "medium"),
+            ("DO", 2.5, "high"),
+            ("DO", 0.5, "critical"),
+            ("pH", 7.0, "low"),
+            ("pH", 5.8, "medium"),
+            ("pH", 9.4, "medium"),
+            ("pH", 11.0, "high"),
+            ("Turbidity", 5.0, None),
+        ],
+    )
+    def test_matches_the_database_rules(self, parameter, value, expected):
+        assert risk_level(parameter, value) == expected
+
+    def test_unknown_mode_falls_back_to_python(self, monkeypatch):
+        """Treat an unrecognised DATA_PIPELINE_ALERTS value as the default."""
+        monkeypatch.setenv("DATA_PIPELINE_ALERTS", "sometimes")
+        assert alert_mode() == "python"
+
+
+class TestAlertEngine:
+    """Tests for creating, escalating and resolving alerts in bulk."""
+
+    def test_creates_one_alert_per_station_and_parameter(self, database):
+        """Open one alert from the newest risky reading of each pair, in one statement."""
+        readings = [
+            _reading(10, BOD, 8.0, 1),
+            _reading(10, BOD, 12.0, 2),
+            _reading(11, PH, 7.1, 2),
+            _reading(11, 9, 500.0, 2),
+        ]
+        changes = AlertEngine().evaluate(None, readings, CODES, NAMES)
+        assert changes == {"evaluated": 2, "created": 1, "updated": 0, "resolved": 0}
+        assert database["lookups"] == 2
+        [(verb, rows, page_size)] = database["writes"]
+        assert verb == "INSERT" and page_size == 1
+        assert rows[0][0:3] == (10, BOD, "critical")
+        assert rows[0][3].startswith(
+            "Biochemical Oxygen Demand at Okhla is at critical level (12.0"
+        )
+        assert rows[0][4:] == (15.0, 12.0, datetime(2024, 1, 2))
+
+    def test_active_alerts_are_escalated_or_resolved(self, database):
+        """Update an active alert whose severity changed and resolve one whose reading is safe."""
+        database["active"] = [(501, 10, BOD, "medium"), (502, 11, PH, "medium")]
+        readings = [_reading(10, BOD, 20.0, 3), _reading(11, PH, 7.0, 3)]
+        changes = AlertEngine().evaluate(None, readings, CODES, NAMES)
+        assert changes == {"evaluated": 2, "created": 0, "updated": 1, "resolved": 1}
+        [(verb, rows, _)] = database["writes"]
+        assert verb == "UPDATE"
+        assert [(row[0], row[1], row[2]) for row in rows] == [
+            (501, "active", "critical"),
+            (502, "resolved", None),
+        ]
+
+    def test_same_severity_is_left_alone(self, database):
+        """Write nothing when the active alert already has the reading's severity."""
+        database["active"] = [(501, 10, BOD, "high")]
+        AlertEngine().evaluate(None, [_reading(10, BOD, 9.0, 3)], CODES, NAMES)
+        assert database["writes"] == []
+
+    def test_backfilled_readings_do_not_change_state(self, database):
+        """Skip pairs whose stored readings include a newer one than the batch inserted."""
+        database["stored"] = [(10, BOD, datetime(2024, 2, 1))]
+        changes = AlertEngine().evaluate(None, [_reading(10, BOD, 50.0, 3)], CODES, NAMES)
+        assert changes == {}
+        assert database["writes"] == []
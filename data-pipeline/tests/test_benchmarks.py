@@ -0,0 +1,82 @@
+"""Tests for the synthetic payloads and the benchmark runner."""
+
+import json
+
+from benchmarks import run as bench
+from benchmarks.payloads import synthetic_pages
+from config import WATER_QUALITY_PARAMETERS
+from normalize import process_data_gov_in
+
+
+class TestSyntheticPages:
+    """Tests for the synthetic data.gov.in payload generator."""
+
+    def test_same_seed_gives_same_pages(self):
+        """Generate identical payloads for a seed and different ones for another."""
+        first = list(synthetic_pages(2500, page_size=1000, seed=7))
+        again = list(synthetic_pages(2500, page_size=1000, seed=7))
+        other = list(synthetic_pages(2500, page_size=1000, seed=8))
+        assert first == again
+        assert first != other
+
+    def test_pages_hold_the_requested_records(self):
+        """Split the records into pages with data.gov.in paging fields."""
+        pages = list(synthetic_pages(2500, page_size=1000))
+        assert [page["count"] for page in pages] == [1000, 1000, 500]
+        assert all(page["total"] == 2500 for page in pages)
+        assert sum(len(page["records"]) for page in pages) == 2500
+
+    def test_every_key_variant_is_normalized(self):
+        """Turn every synthetic layout into readings with known parameters."""
+        pages = list(synthetic_pages(3000, page_size=100, schemas=12, seed=3))
+        readings = [r for page in pages for r in process_data_gov_in(page)]
+        assert len(readings) > 3000
+        assert {r["parameter"] for r in readings} <= set(WATER_QUALITY_PARAMETERS)
+        assert all(r["location_name"] and r["measurement_date"] for r in readings)
+
+
+class TestRunner:
+    """Tests for the benchmark runner and the regression check."""
+
+    def test_compare_flags_cases_past_the_threshold(self):
+        """Report cases slower than baseline by more than the threshold, and only those."""
+        baseline = {
+            "results": {
+                "a/1000": {"median_seconds": 1.0},
+                "b/1000": {"median_seconds": 1.0},
+            }
+        }
+        results = {
+            "a/1000": {"median_seconds": 1.2},
+            "b/1000": {"median_seconds": 1.3},
+            "c/1000": {"median_seconds": 9.0},
+        }
+        regressions = bench.compare(results, baseline, threshold=0.25)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("b/1000")
+
+    def test_suite_runs_and_checks_the_baseline(self, tmp_path, monkeypatch, capsys):
+        """Save a baseline, then report a regression once the baseline is made faster."""
+        monkeypatch.chdir(tmp_path)
+        # main() switches these off for the run; let monkeypatch restore them afterwards
+        monkeypatch.setenv("DATA_PIPELINE_METRICS_DIR", "off")
+        monkeypatch.setenv("DATA_PIPELINE_ALERTS", "off")
+        monkeypatch.delenv("DATA_PIPELINE_BLOOM_FILTER", raising=False)
+        baseline = tmp_path / "baseline.json"
+        args = ["--sizes", "200", "--repeat", "1", "--baseline", str(baseline)]
+
+        assert bench.main(args + ["--save-baseline"]) == 0
+        saved = json.loads(baseline.read_text())
+        assert set(saved["results"]) == {
+            "process_data_gov_in/200",
+            "process_data_gov_in_batch/200",
+            "sanitize_records/200",
+            "save_sqlite/200",
+        }
+        assert saved["results"]["save_sqlite/200"]["records"] > 200
+
+        for result in saved["results"].values():
+            result["median_seconds"] /= 1000
+        baseline.write_text(json.dumps(saved))
+        assert bench.main(args) == 1
+        assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,128 @@
+"""Unit tests for the shared PostgreSQL connection pool."""
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+import db_pool
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute(self, sql):
+        if self._conn.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+        self._conn.status = extensions.TRANSACTION_STATUS_INTRANS
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _FakeConnection:
+    def __init__(self, broken=False):
+        self.closed = 0
+        self.broken = broken
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+
+class _FakePool:
+    """Hand out queued connections and record what comes back."""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.kwargs = kwargs
+        self.closed = False
+        self.idle = []
+        self.returned = []
+
+    def getconn(self):
+        return self.idle.pop(0) if self.idle else _FakeConnection()
+
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+        if not close:
+            self.idle.append(conn)
+
+    def closeall(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    """Swap psycopg2's pool for a fake and reset the module singleton around each test."""
+    monkeypatch.setattr(db_pool.pool, "ThreadedConnectionPool", _FakePool)
+    db_pool.close_pool()
+    yield db_pool.get_pool()
+    db_pool.close_pool()
+
+
+class TestConnectionPool:
+    """Tests for pool configuration and connection checkout/return."""
+
+    def test_reads_size_and_statement_timeout_from_env(self, monkeypatch):
+        """Apply DB_POOL_MAX and DB_STATEMENT_TIMEOUT_MS when the pool is built."""
+        monkeypatch.setattr(db_pool.pool, "ThreadedConnectionPool", _FakePool)
+        monkeypatch.setenv("DB_POOL_MAX", "8")
+        monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "1500")
+        db_pool.close_pool()
+        try:
+            conn_pool = db_pool.get_pool()
+            assert conn_pool.maxconn == 8
+            assert conn_pool.kwargs["options"] == "-c statement_timeout=1500"
+            assert conn_pool.kwargs["sslmode"] == "require"
+            assert db_pool.get_pool() is conn_pool
+        finally:
+            db_pool.close_pool()
+
+    def test_reuses_the_same_connection(self, fake_pool):
+        """Hand the returned connection to the next caller instead of reconnecting."""
+        with db_pool.connection() as first:
+            pass
+        with db_pool.connection() as second:
+            pass
+        assert first is second
+
+    def test_rolls_back_uncommitted_work_on_return(self, fake_pool):
+        """Roll back an open transaction before the connection goes back to the pool."""
+        with pytest.raises(RuntimeError):
+            with db_pool.connection() as conn:
+                conn.cursor().execute("INSERT ...")
+                raise RuntimeError("boom")
+        assert conn.rollbacks == 1
+        assert fake_pool.returned == [(conn, False)]
+
+    def test_discards_stale_connections_on_checkout(self, fake_pool, monkeypatch):
+        """Ping idle connections and replace the ones that no longer answer."""
+        monkeypatch.setenv("DB_POOL_HEALTHCHECK_SECONDS", "0")
+        stale = _FakeConnection(broken=True)
+        fake_pool.idle.append(stale)
+        with db_pool.connection() as conn:
+            assert conn is not stale
+        assert (stale, True) in fake_pool.returned
+
+    def test_check_connection_reports_failures(self, monkeypatch):
+        """Return False instead of raising when no connection can be made."""
+
+        def refuse(*args, **kwargs):
+            raise psycopg2.OperationalError("connection refused")
+
+        monkeypatch.setattr(db_pool.pool, "ThreadedConnectionPool", refuse)
+        db_pool.close_pool()
+        assert db_pool.check_connection() is False
@@ -0,0 +1,126 @@
+"""Tests for pre-insert de-duplication of readings."""
+
+import pytest
+
+import fetch_data
+from dedup import BloomFilter, ReadingDeduplicator, dedupe_batch
+
+
+def _reading(name, parameter="BOD", date="2024-01-01", value=1.0):
+    return {
+        "location_name": name,
+        "state": "Delhi",
+        "district": None,
+        "latitude": 28.6,
+        "longitude": 77.2,
+        "parameter": parameter,
+        "value": value,
+        "unit": "mg/L",
+        "measurement_date": date,
+        "source": "government",
+    }
+
+
+class TestBloomFilter:
+    """Tests for the batch Bloom filter."""
+
+    def test_added_keys_are_always_found(self):
+        """Never report an added key as missing."""
+        bloom = BloomFilter(10_000, 1e-4)
+        keys = [f"key-{i}".encode() for i in range(10_000)]
+        bloom.add(keys)
+        assert bloom.contains(keys).all()
+
+    def test_false_positive_rate_stays_near_the_target(self):
+        """Report few unseen keys as present at capacity."""
+        bloom = BloomFilter(10_000, 1e-3)
+        bloom.add([f"key-{i}".encode() for i in range(10_000)])
+        unseen = bloom.contains([f"other-{i}".encode() for i in range(20_000)])
+        assert unseen.mean() < 5e-3
+
+    def test_round_trips_through_a_file(self, tmp_path):
+        """Reload the same bits, count and identity."""
+        bloom = BloomFilter(1000, 1e-4, "sqlite://a.db")
+        bloom.add([b"a", b"b"])
+        bloom.save(tmp_path / "bloom.bin")
+        loaded = BloomFilter.load(tmp_path / "bloom.bin")
+        assert loaded.identity == "sqlite://a.db"
+        assert loaded.count == 2
+        assert loaded.contains([b"a", b"b"]).all()
+
+
+class TestReadingDeduplicator:
+    """Tests for filtering batches before they are saved."""
+
+    def test_repeats_within_a_batch_keep_the_first(self):
+        """Drop later readings of the same station, parameter and date."""
+        batch = [_reading("A", value=1.0), _reading("A", value=2.0), _reading("A", "pH")]
+        assert [r["value"] for r in dedupe_batch(batch)] == [1.0, 1.0]
+        assert [r["parameter"] for r in dedupe_batch(batch)] == ["BOD", "pH"]
+
+    def test_stored_keys_are_skipped_across_runs(self, tmp_path):
+        """Skip readings an earlier run against the same database stored."""
+        path = str(tmp_path / "bloom.bin")
+        first = ReadingDeduplicator(path, 1000, 1e-6, "db-1")
+        first.mark_stored([_reading("A"), _reading("B")])
+        first.save()
+
+        second = ReadingDeduplicator(path, 1000, 1e-6, "db-1")
+        new, skipped = second.filter_new([_reading("A"), _reading("C"), _reading("C")])
+        assert [r["location_name"] for r in new] == ["C"]
+        assert skipped == 2
+
+    def test_another_database_starts_empty(self, tmp_path):
+        """Ignore a filter built for a different database."""
+        path = str(tmp_path / "bloom.bin")
+        first = ReadingDeduplicator(path, 1000, 1e-6, "db-1")
+        first.mark_stored([_reading("A")])
+        first.save()
+        new, _ = ReadingDeduplicator(path, 1000, 1e-6, "db-2").filter_new([_reading("A")])
+        assert len(new) == 1
+
+    def test_full_filter_starts_over(self):
+        """Reset instead of letting the false-positive rate climb past capacity."""
+        dedup = ReadingDeduplicator("unused.bin", 2, 1e-6)
+        dedup.bloom = BloomFilter(2, 1e-6)
+        dedup.mark_stored([_reading("A"), _reading("B")])
+        dedup.mark_stored([_reading("C")])
+        assert dedup.bloom.count == 1
+
+
+class TestSaveToDatabase:
+    """Tests for de-duplication in front of the writers."""
+
+    @pytest.fixture
+    def fetcher(self, make_fetcher, tmp_path):
+        fetcher = make_fetcher(sqlite=True, DATA_PIPELINE_BLOOM_FILTER=str(tmp_path / "bloom.bin"))
+        fetcher.sent = []
+        original = fetcher._save_to_sqlite
+
+        def save(data):
+            fetcher.sent.append(len(data))
+            return original(data)
+
+        fetcher._save_to_sqlite = save
+        return fetcher
+
+    def test_only_new_readings_are_sent(self, fetcher):
+        """Send each reading once, however often it is fetched."""
+        batch = [_reading(f"S{i % 4}", date=f"2024-01-{i % 3 + 1:02d}") for i in range(24)]
+        fetcher.save_to_database(batch)
+        fetcher.save_to_database(batch + [_reading("S9")])
+        assert fetcher.sent == [12, 1]
+
+    def test_readings_the_writer_skipped_are_sent_again(self, fetcher):
+        """Keep a reading eligible when the database did not take it the first time."""
+        fetcher.save_to_database([_reading("S1", value=None), _reading("S2")])
+        fetcher.save_to_database([_reading("S1", value=2.5), _reading("S2")])
+        assert fetcher.sent == [2, 1]
+        conn = fetch_data.sqlite_store.connect(fetcher.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT location_name, value FROM water_quality_readings ORDER BY location_name"
+            ).fetchall()
+        finally:
+            conn.close()
+        assert rows == [("S1", 2.5), ("S2", 1.0)]
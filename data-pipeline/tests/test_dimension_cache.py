@@ -0,0 +1,76 @@
+"""Unit tests for the dimension-id cache used by the PostgreSQL writer."""
+
+from dimension_cache import DimensionCache
+
+
+class _FingerprintCursor:
+    """Answer the fingerprint and parameter queries; count every statement."""
+
+    def __init__(self, fingerprint=("db", 8, 8, 2, 1, 2), parameters=(("BOD", 1), ("pH", 2))):
+        self.fingerprint = fingerprint
+        self.parameters = list(parameters)
+        self.queries = []
+
+    def execute(self, sql, params=None):
+        self.queries.append(" ".join(sql.split()))
+
+    def fetchone(self):
+        return self.fingerprint
+
+    def fetchall(self):
+        return self.parameters
+
+
+class TestDimensionCache:
+    """Tests for validation, parameter lookups and persistence."""
+
+    def test_parameters_are_read_once(self):
+        """Query water_quality_parameters only on the first lookup."""
+        cache = DimensionCache()
+        cursor = _FingerprintCursor()
+        assert cache.parameter_ids(cursor, {"BOD"}) == {"BOD": 1, "pH": 2}
+        cache.parameter_ids(cursor, {"BOD", "pH"})
+        cache.parameter_ids(cursor, {"UNKNOWN"})
+        assert sum("water_quality_parameters" in q for q in cursor.queries) == 1
+
+    def test_validates_once_per_run(self):
+        """Run the fingerprint query for the first batch only."""
+        cache = DimensionCache()
+        cursor = _FingerprintCursor()
+        cache.validate(cursor)
+        cache.validate(cursor)
+        assert len(cursor.queries) == 1
+
+    def test_persisted_ids_survive_a_restart(self, tmp_path):
+        """Reload cached ids from disk when the fingerprint still matches."""
+        path = tmp_path / "dims.json"
+        cache = DimensionCache(str(path))
+        cursor = _FingerprintCursor()
+        cache.validate(cursor)
+        cache.parameter_ids(cursor, {"BOD"})
+        cache.commit(cursor, {("Ganga", "Bihar"): 2})
+
+        restarted = DimensionCache(str(path))
+        cursor = _FingerprintCursor()
+        restarted.validate(cursor)
+        assert restarted.locations == {("Ganga", "Bihar"): 2}
+        assert restarted.parameter_ids(cursor, {"BOD", "pH"}) == {"BOD": 1, "pH": 2}
+        assert len(cursor.queries) == 1
+
+    def test_changed_tables_invalidate_the_cache(self, tmp_path):
+        """Drop persisted ids when the dimension tables no longer match the fingerprint."""
+        path = tmp_path / "dims.json"
+        cache = DimensionCache(str(path))
+        cursor = _FingerprintCursor()
+        cache.validate(cursor)
+        cache.commit(cursor, {("Ganga", "Bihar"): 2})
+
+        restarted = DimensionCache(str(path))
+        restarted.validate(_FingerprintCursor(fingerprint=("db", 8, 8, 0, 0, 0)))
+        assert restarted.locations == {}
+
+    def test_unreadable_file_starts_empty(self, tmp_path):
+        """Ignore a corrupt cache file instead of failing the run."""
+        path = tmp_path / "dims.json"
+        path.write_text("{not json")
+        assert DimensionCache(str(path)).locations == {}
@@ -0,0 +1,190 @@
+"""Tests for the concurrent, streaming source scheduler in fetch_all_data."""
+
+import asyncio
+
+import pytest
+
+import fetch_data
+from watermarks import Watermark, WatermarkStore
+
+
+def _record(name):
+    return {
+        "location_name": name,
+        "state": "Delhi",
+        "latitude": 28.6,
+        "longitude": 77.2,
+        "parameter": "pH",
+        "value": 7.0,
+    }
+
+
+@pytest.fixture
+def fetcher(make_fetcher, monkeypatch):
+    """Build a fetcher whose sources, storage and alert trigger are all stubbed."""
+
+    async def no_subprocess(*args, **kwargs):
+        raise FileNotFoundError("npm")
+
+    monkeypatch.setattr(fetch_data.asyncio, "create_subprocess_exec", no_subprocess)
+    fetcher = make_fetcher()
+    fetcher.use_postgres = False
+    fetcher.batches = []
+
+    def save(batch):
+        fetcher.batches.append(batch)
+        return True
+
+    fetcher.save_to_database = save
+    return fetcher
+
+
+class TestFetchAllData:
+    """Tests for running sources concurrently and independently."""
+
+    def test_sources_run_concurrently(self, fetcher, monkeypatch):
+        """Take about as long as the slowest source rather than the sum of all of them."""
+        started = []
+
+        async def fake_pages(source_key):
+            started.append(source_key)
+            await asyncio.sleep(0.05)
+            # Every source must have started before the first one finishes
+            assert set(started) == set(fetcher.scheduled_sources())
+            yield [_record(source_key)]
+
+        monkeypatch.setattr(fetcher, "_iter_resource_pages", fake_pages)
+        summary, _ = asyncio.run(fetcher.fetch_all_data())
+        assert summary["records"] == 2
+        assert summary["sources"] == {"data_gov_in": 1, "cpcb": 1}
+        saved = [r["location_name"] for batch in fetcher.batches for r in batch]
+        assert sorted(saved) == sorted(fetcher.scheduled_sources())
+
+    def test_failed_source_does_not_stop_the_others(self, fetcher, monkeypatch):
+        """Keep data from healthy sources when one source raises."""
+
+        async def fake_pages(source_key):
+            if source_key == "cpcb":
+                raise RuntimeError("cpcb down")
+            yield [_record(source_key)]
+
+        monkeypatch.setattr(fetcher, "_iter_resource_pages", fake_pages)
+        summary, _ = asyncio.run(fetcher.fetch_all_data())
+        assert summary["failed_sources"] == ["cpcb"]
+        assert [r["location_name"] for r in fetcher.batches[0]] == ["data_gov_in"]
+
+    def test_all_sources_failing_raises(self, fetcher, monkeypatch):
+        """Fail the run when no source produced any data."""
+
+        async def fake_pages(source_key):
+            raise RuntimeError(f"{source_key} down")
+            yield []
+
+        monkeypatch.setattr(fetcher, "_iter_resource_pages", fake_pages)
+        with pytest.raises(RuntimeError):
+            asyncio.run(fetcher.fetch_all_data())
+
+    def test_failed_weather_lookup_keeps_the_run(self, fetcher, monkeypatch):
+        """Return the saved readings when a weather lookup raises."""
+
+        async def fake_pages(source_key):
+            yield [_record(source_key)]
+
+        async def failing_weather(locations):
+            raise RuntimeError("weather down")
+
+        monkeypatch.setattr(fetcher, "_iter_resource_pages", fake_pages)
+        monkeypatch.setattr(fetcher, "fetch_weather_data", failing_weather)
+        summary, weather = asyncio.run(fetcher.fetch_all_data())
+        assert summary["records"] == 2
+        assert weather == []
+
+    def test_failed_run_cancels_weather_lookups(self, fetcher, monkeypatch):
+        """Cancel weather lookups still in flight when saving a batch fails."""
+        cancelled = []
+
+        async def fake_pages(source_key):
+            yield [_record(source_key)]
+
+        async def slow_weather(locations):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(locations[0]["name"])
+                raise
+
+        def failing_save(batch):
+            raise RuntimeError("database down")
+
+        monkeypatch.setattr(fetcher, "_iter_resource_pages", fake_pages)
+        monkeypatch.setattr(fetcher, "fetch_weather_data", slow_weather)
+        fetcher.save_to_database = failing_save
+        with pytest.raises(RuntimeError, match="database down"):
+            asyncio.run(fetcher.fetch_all_data())
+        assert cancelled
+
+    @pytest.mark.parametrize("saved", [True, False])
+    def test_failed_save_keeps_the_watermarks(self, fetcher, monkeypatch, tmp_path, saved):
+        """Advance watermarks only when every batch of the run was saved."""
+        fetcher.watermarks = WatermarkStore(str(tmp_path / "watermarks.json"))
+        fetcher.watermarks.commit({"cpcb": Watermark(100, 100, "old")})
+        before = fetcher.watermarks.path.read_bytes()
+
+        async def fake_pages(source_key):
+            fetcher.pending_watermarks[source_key] = Watermark(200, 100, "new")
+            yield [_record(source_key)]
+
+        monkeypatch.setattr(fetcher, "_iter_resource_pages", fake_pages)
+        fetcher.save_to_database = lambda batch: saved
+        summary, _ = asyncio.run(fetcher.fetch_all_data())
+        assert summary["failed_batches"] == (0 if saved else 1)
+        assert (fetcher.watermarks.path.read_bytes() == before) is not saved
+        assert fetcher.pending_watermarks == {}
+
+    def test_only_data_gov_in_resources_are_scheduled(self):
+        """Skip registry entries that are not data.gov.in resources."""
+        assert fetch_data.WaterQualityDataFetcher.scheduled_sources() == ["data_gov_in", "cpcb"]
+
+
+class TestStreamingSave:
+    """Tests for batched saving with a bounded page queue."""
+
+    def test_saves_in_fixed_size_batches(self, fetcher, monkeypatch):
+        """Split the stream into DATA_PIPELINE_BATCH_SIZE batches plus a final remainder."""
+        monkeypatch.setenv("DATA_PIPELINE_BATCH_SIZE", "4")
+
+        async def fake_pages(source_key):
+            if source_key == "data_gov_in":
+                for page in range(3):
+                    yield [_record(f"S{page}-{i}") for i in range(3)]
+
+        monkeypatch.setattr(fetcher, "_iter_resource_pages", fake_pages)
+        summary, _ = asyncio.run(fetcher.fetch_all_data())
+        assert [len(batch) for batch in fetcher.batches] == [4, 4, 1]
+        assert summary["batches"] == 3
+        assert summary["records"] == 9
+
+    def test_full_queue_holds_back_producers(self, fetcher, monkeypatch):
+        """Stop producing pages while the consumer is busy saving and the queue is full."""
+        monkeypatch.setenv("DATA_PIPELINE_BATCH_SIZE", "1")
+        monkeypatch.setenv("DATA_PIPELINE_QUEUE_SIZE", "1")
+        produced = []
+        high_water = []
+
+        async def fake_pages(source_key):
+            if source_key == "data_gov_in":
+                for page in range(10):
+                    produced.append(page)
+                    yield [_record(f"S{page}")]
+
+        def slow_save(batch):
+            # Pages produced but not yet saved stay bounded by the queue size
+            high_water.append(len(produced) - len(fetcher.batches))
+            fetcher.batches.append(batch)
+            return True
+
+        fetcher.save_to_database = slow_save
+        monkeypatch.setattr(fetcher, "_iter_resource_pages", fake_pages)
+        asyncio.run(fetcher.fetch_all_data())
+        assert len(fetcher.batches) == 10
+        assert max(high_water) <= 3
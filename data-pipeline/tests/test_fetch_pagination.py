@@ -0,0 +1,185 @@
+"""Tests for paginated data.gov.in fetching in WaterQualityDataFetcher."""
+
+import asyncio
+import sys
+
+import pytest
+
+import fetch_data
+
+TOTAL = 45
+LIMIT = 10
+
+
+class _FakeResponse:
+    def __init__(self, status, payload):
+        self.status = status
+        self.headers = {}
+        self._payload = payload
+
+    async def json(self):
+        return self._payload
+
+    async def text(self):
+        return str(self._payload)
+
+
+class _FakeRequest:
+    def __init__(self, session, params):
+        self._session = session
+        self._params = params
+
+    async def __aenter__(self):
+        session = self._session
+        offset = int(self._params["offset"])
+        session.offsets.append(offset)
+        session.in_flight += 1
+        session.max_in_flight = max(session.max_in_flight, session.in_flight)
+        # Later windows answer first so ordering bugs would show up.
+        await asyncio.sleep(0.001 * (TOTAL - offset) / LIMIT)
+        session.in_flight -= 1
+        if offset in session.fail_offsets:
+            return _FakeResponse(500, {"error": "boom"})
+        count = max(0, min(LIMIT, TOTAL - offset))
+        records = [
+            {"State": "Delhi", "Station": f"S{offset + i}", "Lat": 28.6, "Long": 77.2, "pH": 7.0}
+            for i in range(count)
+        ]
+        return _FakeResponse(
+            200, {"total": TOTAL, "count": count, "limit": LIMIT, "records": records}
+        )
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class _FakeSession:
+    def __init__(self, fail_offsets=()):
+        self.offsets = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_offsets = set(fail_offsets)
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        return _FakeRequest(self, params)
+
+
+@pytest.fixture
+def fetcher(make_fetcher, monkeypatch):
+    """Build a fetcher wired to a fake session without touching any database."""
+    monkeypatch.setattr(fetch_data.GOVERNMENT_APIS["cpcb"], "api_key", "test-key")
+    monkeypatch.setattr(fetch_data.GOVERNMENT_APIS["cpcb"], "rate_limit", 60000)
+    monkeypatch.setattr(fetch_data.GOVERNMENT_APIS["cpcb"], "retry_attempts", 1)
+    return make_fetcher(
+        DATA_GOV_IN_LIMIT=str(LIMIT),
+        DATA_GOV_IN_MAX_PAGES="10",
+        DATA_GOV_IN_CONCURRENCY="2",
+        ALLOW_SAMPLE_DATA="false",
+    )
+
+
+class TestFetchFromResource:
+    """Tests for concurrent offset-window pagination."""
+
+    def test_pages_are_merged_in_offset_order(self, fetcher):
+        """Return records in offset order even when later pages finish first."""
+        fetcher.session = _FakeSession()
+        records = asyncio.run(fetcher._fetch_from_resource("cpcb"))
+        assert [r["location_name"] for r in records] == [f"S{i}" for i in range(TOTAL)]
+        assert sorted(fetcher.session.offsets) == [0, 10, 20, 30, 40]
+
+    def test_in_flight_requests_are_bounded(self, fetcher):
+        """Never exceed DATA_GOV_IN_CONCURRENCY requests at once."""
+        fetcher.session = _FakeSession()
+        asyncio.run(fetcher._fetch_from_resource("cpcb"))
+        assert fetcher.session.max_in_flight == 2
+
+    def test_respects_max_pages(self, fetcher, monkeypatch):
+        """Stop planning offset windows at DATA_GOV_IN_MAX_PAGES."""
+        monkeypatch.setenv("DATA_GOV_IN_MAX_PAGES", "3")
+        fetcher.session = _FakeSession()
+        records = asyncio.run(fetcher._fetch_from_resource("cpcb"))
+        assert sorted(fetcher.session.offsets) == [0, 10, 20]
+        assert len(records) == 30
+
+    def test_failed_window_fails_the_source(self, fetcher):
+        """Raise when any window fails and sample data is not allowed."""
+        fetcher.session = _FakeSession(fail_offsets={20})
+        with pytest.raises(RuntimeError):
+            asyncio.run(fetcher._fetch_from_resource("cpcb"))
+
+    def test_pages_parsed_on_the_pool_keep_offset_order(self, fetcher, monkeypatch):
+        """Parse pages on the worker pool without changing the merged order."""
+        monkeypatch.setenv("DATA_PIPELINE_PARSE_WORKERS", "3")
+        monkeypatch.setenv("DATA_PIPELINE_PARSE_EXECUTOR", "thread")
+        fetcher.parse_executor = fetcher.create_parse_executor()
+        fetcher.session = _FakeSession()
+        try:
+            records = asyncio.run(fetcher._fetch_from_resource("cpcb"))
+        finally:
+            fetcher.parse_executor.shutdown()
+        assert isinstance(fetcher.parse_executor, fetch_data.ThreadPoolExecutor)
+        assert [r["location_name"] for r in records] == [f"S{i}" for i in range(TOTAL)]
+
+
+class TestCreateParseExecutor:
+    """Tests for choosing the page-parsing pool."""
+
+    def test_parses_inline_by_default(self, monkeypatch):
+        """Keep parsing on the event loop unless workers are requested."""
+        monkeypatch.delenv("DATA_PIPELINE_PARSE_WORKERS", raising=False)
+        assert fetch_data.WaterQualityDataFetcher.create_parse_executor() is None
+
+    def test_auto_uses_a_process_pool_sized_to_the_host(self, monkeypatch):
+        """Size the process pool from the CPU count when workers is "auto"."""
+        monkeypatch.setenv("DATA_PIPELINE_PARSE_WORKERS", "auto")
+        monkeypatch.delenv("DATA_PIPELINE_PARSE_EXECUTOR", raising=False)
+        monkeypatch.setattr(fetch_data.os, "cpu_count", lambda: 16)
+        executor = fetch_data.WaterQualityDataFetcher.create_parse_executor()
+        try:
+            assert isinstance(executor, fetch_data.ProcessPoolExecutor)
+            assert executor._max_workers == 16
+        finally:
+            executor.shutdown()
+
+
+class TestIncrementalFetch:
+    """Tests for watermark-driven incremental pagination."""
+
+    @pytest.fixture
+    def incremental(self, fetcher, monkeypatch, tmp_path):
+        monkeypatch.setenv("DATA_PIPELINE_WATERMARKS", str(tmp_path / "watermarks.json"))
+        fetcher.incremental = True
+        fetcher.watermarks = fetch_data.WatermarkStore.from_env(tmp_path)
+        return fetcher
+
+    def _run(self, fetcher):
+        fetcher.session = _FakeSession()
+        records = asyncio.run(fetcher._fetch_from_resource("cpcb"))
+        fetcher.watermarks.commit(fetcher.pending_watermarks)
+        fetcher.pending_watermarks = {}
+        return records, sorted(fetcher.session.offsets)
+
+    def test_unchanged_resource_costs_one_request(self, incremental):
+        """Fetch only the first page when nothing was added since the last sweep."""
+        records, offsets = self._run(incremental)
+        assert len(records) == TOTAL
+        records, offsets = self._run(incremental)
+        assert offsets == [0]
+        assert records == []
+
+    def test_grown_resource_fetches_only_the_tail(self, incremental, monkeypatch):
+        """Resume at the page holding the old end of the resource."""
+        self._run(incremental)
+        monkeypatch.setattr(sys.modules[__name__], "TOTAL", 72)
+        records, offsets = self._run(incremental)
+        assert offsets == [0, 40, 50, 60, 70]
+        assert [r["location_name"] for r in records] == [f"S{i}" for i in range(40, 72)]
+
+    def test_max_pages_cut_is_resumed_next_run(self, incremental, monkeypatch):
+        """Continue from where a sweep stopped because of DATA_GOV_IN_MAX_PAGES."""
+        monkeypatch.setenv("DATA_GOV_IN_MAX_PAGES", "3")
+        self._run(incremental)
+        records, offsets = self._run(incremental)
+        assert offsets == [0, 30, 40]
+        assert len(records) == TOTAL - 30
@@ -0,0 +1,103 @@
+"""Tests for per-run pipeline metrics and reports."""
+
+import json
+import os
+
+import pytest
+
+from metrics import Histogram, RunMetrics, prometheus_text
+
+
+class TestRunMetrics:
+    """Tests for stage timings, histograms and report files."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Count an observation in every bucket at or above it."""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+        assert histogram.to_dict()["buckets"] == {"0.1": 1, "1.0": 2}
+        assert histogram.count == 3
+
+    def test_report_collects_stages_and_counters(self):
+        """Sum repeated stages and counters into one report."""
+        metrics = RunMetrics("run-1")
+        with metrics.stage("parse"):
+            pass
+        metrics.record_stage("parse", 0.5)
+        metrics.count("records", 40)
+        metrics.count("records", 2)
+        report = metrics.report()
+        assert report["run_id"] == "run-1"
+        assert report["stages"]["parse"]["calls"] == 2
+        assert report["stages"]["parse"]["max_seconds"] == 0.5
+        assert report["counters"] == {"records": 42}
+        assert report["records_per_second"] > 0
+
+    def test_writes_json_and_prometheus_files(self, tmp_path):
+        """Write run-<run_id>.json and a textfile-collector file."""
+        metrics = RunMetrics("run-2", str(tmp_path))
+        metrics.observe("page_fetch_seconds", 0.2)
+        metrics.record_stage("fetch", 0.2)
+        metrics.write("failed")
+
+        report = json.loads((tmp_path / "run-run-2.json").read_text())
+        assert report["status"] == "failed"
+        text = (tmp_path / "aqua_pipeline.prom").read_text()
+        assert 'aqua_pipeline_last_run_info{run_id="run-2",status="failed"} 1' in text
+        assert 'aqua_pipeline_stage_seconds{stage="fetch"} 0.2' in text
+        assert 'aqua_pipeline_page_fetch_seconds_bucket{le="0.25"} 1' in text
+        assert 'aqua_pipeline_page_fetch_seconds_bucket{le="+Inf"} 1' in text
+
+    def test_keeps_only_the_newest_reports(self, monkeypatch, tmp_path):
+        """Delete older run reports beyond DATA_PIPELINE_METRICS_KEEP."""
+        for i, name in enumerate(["run-c.json", "run-a.json", "run-b.json"]):
+            (tmp_path / name).write_text("{}")
+            os.utime(tmp_path / name, (1_000_000 + i, 1_000_000 + i))
+        monkeypatch.setenv("DATA_PIPELINE_METRICS_DIR", str(tmp_path))
+        monkeypatch.setenv("DATA_PIPELINE_METRICS_KEEP", "2")
+        RunMetrics.from_env("new", tmp_path).write()
+
+        assert sorted(p.name for p in tmp_path.glob("run-*.json")) == ["run-b.json", "run-new.json"]
+        assert (tmp_path / "aqua_pipeline.prom").exists()
+
+    def test_every_sample_has_help_and_type(self):
+        """Keep the exposition parseable: each metric family is declared before its samples."""
+        metrics = RunMetrics("run-3")
+        metrics.count("rows_inserted", 3)
+        metrics.observe("page_fetch_seconds", 1.0)
+        declared = set()
+        for line in prometheus_text(metrics.report()).splitlines():
+            if line.startswith("# TYPE"):
+                declared.add(line.split()[2])
+            elif not line.startswith("#"):
+                name = line.split("{")[0].split()[0]
+                assert any(name == d or name.startswith(d + "_") for d in declared), line
+
+
+class TestFetcherInstrumentation:
+    """Tests for the stages the fetcher records."""
+
+    @pytest.mark.parametrize(
+        "fetcher", [{"sqlite": True, "DATA_PIPELINE_METRICS_DIR": "off"}], indirect=True
+    )
+    def test_sqlite_saves_report_inserted_rows(self, fetcher):
+        """Record the save stages and rows inserted against rows attempted."""
+        record = {
+            "location_name": "S1",
+            "state": "Delhi",
+            "district": None,
+            "latitude": 28.6,
+            "longitude": 77.2,
+            "parameter": "BOD",
+            "value": 1.0,
+            "unit": "mg/L",
+            "source": "government",
+        }
+        batch = [dict(record, measurement_date=f"2024-01-0{i + 1}") for i in range(3)]
+        fetcher.save_to_database(batch)
+        fetcher.save_to_database(batch + [dict(record, measurement_date="2024-02-01")])
+        report = fetcher.metrics.report()
+        assert report["counters"]["rows_attempted"] == 7
+        assert report["counters"]["rows_inserted"] == 4
+        assert {"sanitize", "dedup", "location_upsert", "reading_insert"} <= set(report["stages"])
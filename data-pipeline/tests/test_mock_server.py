@@ -0,0 +1,112 @@
+"""Tests for the mock data.gov.in server and the fetcher load test."""
+
+import asyncio
+import gc
+
+import aiohttp
+import pytest
+
+from benchmarks.load_test import percentiles, run_load_test
+from benchmarks.mock_server import MockDataGovIn, MockServerConfig
+
+
+async def _get(base_url, resource, **params):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base_url}{resource}", params=params) as response:
+            return response.status, response.headers, await response.json()
+
+
+class TestMockServer:
+    """Tests for the mock resource API."""
+
+    def test_serves_pages_by_offset_and_caps_the_limit(self):
+        """Answer offset windows like data.gov.in, never larger than max_limit."""
+
+        async def scenario():
+            config = MockServerConfig(records=250, max_limit=100, latency=0, jitter=0)
+            async with MockDataGovIn(config) as mock:
+                first = await _get(mock.base_url, "abc", offset=0, limit=500)
+                last = await _get(mock.base_url, "abc", offset=200, limit=100)
+                return mock, first, last
+
+        mock, (status, _, first), (_, _, last) = asyncio.run(scenario())
+        assert status == 200
+        assert first["total"] == 250
+        assert first["count"] == 100 and first["limit"] == "100"
+        assert last["count"] == 50
+        assert last["records"] == mock.dataset("abc")[200:250]
+
+    def test_injects_throttling_with_retry_after(self):
+        """Answer 429 with the configured Retry-After header."""
+
+        async def scenario():
+            config = MockServerConfig(
+                records=10, latency=0, jitter=0, throttle_rate=1.0, retry_after=3
+            )
+            async with MockDataGovIn(config) as mock:
+                return mock, await _get(mock.base_url, "abc")
+
+        mock, (status, headers, _) = asyncio.run(scenario())
+        assert status == 429
+        assert headers["Retry-After"] == "3"
+        assert mock.status_counts() == {429: 1}
+
+
+class TestLoadTest:
+    """Tests for running the fetcher against the mock server."""
+
+    def test_fetcher_retries_through_injected_failures(self):
+        """Fetch every page despite 429/503 answers and report the retries."""
+        server = MockServerConfig(
+            records=600,
+            max_limit=100,
+            latency=0.001,
+            jitter=0.001,
+            throttle_rate=0.2,
+            error_rate=0.0,
+            retry_after=0,
+            seed=4,
+        )
+        report = asyncio.run(
+            run_load_test(server, concurrency=3, limit=100, retries=10, sources=["cpcb"])
+        )
+        assert report["failed_sources"] == []
+        assert report["pages"] == 6
+        assert report["readings"] > 600
+        assert report["server_statuses"]["200"] == 6
+        assert report["server_requests"] > 6  # the 429s were retried
+        assert report["page_latency"]["p99_ms"] >= report["page_latency"]["p50_ms"]
+
+    def test_saves_to_sqlite_end_to_end(self):
+        """Run fetch_all_data against the mock server and save every reading."""
+        server = MockServerConfig(records=300, max_limit=100, latency=0, jitter=0)
+        report = asyncio.run(run_load_test(server, concurrency=2, limit=100, sources=["cpcb"]))
+        assert report["failed_sources"] == []
+        assert report["pages"] == 3
+        assert report["readings"] > 300
+
+    @pytest.mark.parametrize("fetch_only", [True, False])
+    def test_failing_sources_close_every_session(self, caplog, fetch_only):
+        """Report sources that run out of retries without leaving an HTTP session open."""
+        server = MockServerConfig(records=300, max_limit=100, latency=0, jitter=0, error_rate=1.0)
+        report = asyncio.run(
+            run_load_test(
+                server,
+                concurrency=2,
+                limit=100,
+                retries=1,
+                fetch_only=fetch_only,
+                sources=["cpcb", "data_gov_in"],
+            )
+        )
+        gc.collect()
+        assert sorted(report["failed_sources"]) == ["cpcb", "data_gov_in"]
+        assert report["readings"] == 0
+        assert "Unclosed client session" not in caplog.text
+
+    def test_percentiles_in_milliseconds(self):
+        """Summarise latencies as p50/p95/p99/max in milliseconds."""
+        summary = percentiles([i / 1000 for i in range(1, 101)])
+        assert summary["p50_ms"] == 50.5
+        assert summary["max_ms"] == 100.0
+        assert percentiles([])["p99_ms"] is None
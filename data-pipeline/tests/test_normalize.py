@@ -0,0 +1,169 @@
+"""Unit tests for data.gov.in record normalization."""
+
+import normalize
+
+
+def _payload(*records, title="Water Quality 2021"):
+    return {"title": title, "records": list(records)}
+
+
+class TestResolveFieldPlan:
+    """Tests for per-schema field-resolution plans."""
+
+    def test_plan_is_built_once_per_schema(self):
+        """Reuse the cached plan for every record that shares a schema."""
+        normalize.resolve_field_plan.cache_clear()
+        records = [{"State": "Delhi", "Station": f"S{i}", "pH": "7.1"} for i in range(50)]
+        normalize.process_data_gov_in(_payload(*records))
+        info = normalize.resolve_field_plan.cache_info()
+        assert info.misses == 1
+        assert info.hits == 49
+
+    def test_candidates_follow_mapping_priority(self):
+        """Prefer the earliest candidate in the mapping, whatever the record key order."""
+        plan = normalize.resolve_field_plan(("Station", "Location_Name", "bod", "BOD_MG_L"))
+        assert plan.location == "Location_Name"
+        assert plan.params == (("BOD", ("bod", "BOD_MG_L")),)
+
+    def test_later_key_wins_on_case_collision(self):
+        """Resolve keys differing only in case to the last one, as lowercasing a dict would."""
+        plan = normalize.resolve_field_plan(("state", "STATE"))
+        assert plan.state == "STATE"
+
+
+class TestProcessDataGovIn:
+    """Tests for the canonical reading output."""
+
+    def test_emits_one_reading_per_parameter(self):
+        """Produce a canonical row for each recognised parameter column."""
+        rows = normalize.process_data_gov_in(
+            _payload(
+                {
+                    "State": ' "Delhi" ',
+                    "Station": "Yamuna  at  Okhla",
+                    "Latitude": "28.5",
+                    "Longitude": "77.3",
+                    "BOD": "4.2",
+                    "pH": "7.6",
+                }
+            )
+        )
+        assert [(r["parameter"], r["value"]) for r in rows] == [("BOD", 4.2), ("pH", 7.6)]
+        assert rows[0]["location_name"] == "Yamuna at Okhla"
+        assert rows[0]["state"] == "Delhi"
+        assert rows[0]["measurement_date"] == "2021-01-01"
+        assert rows[0]["unit"] == "mg/L"
+
+    def test_falls_through_to_next_candidate_on_missing_value(self):
+        """Skip NA cells and use the next matching column for the same parameter."""
+        rows = normalize.process_data_gov_in(
+            _payload({"State": "Goa", "lat": 15, "lon": 74, "bod": "NA", "bod_mg_l": "2.5"})
+        )
+        assert [(r["parameter"], r["value"]) for r in rows] == [("BOD", 2.5)]
+
+    def test_maps_generic_parameter_value_records(self):
+        """Map long-format parameter/value records onto canonical parameters."""
+        rows = normalize.process_data_gov_in(
+            _payload(
+                {"state": "Goa", "lat": 15, "lon": 74, "parameter": "Total Coliform", "value": "9"}
+            )
+        )
+        assert [(r["parameter"], r["value"]) for r in rows] == [("Coliform", 9.0)]
+
+    def test_skips_malformed_records(self):
+        """Ignore records that are not objects and keep processing the rest."""
+        rows = normalize.process_data_gov_in(
+            _payload("garbage", {"state": "Goa", "lat": 15, "lon": 74, "tds": 300})
+        )
+        assert [r["parameter"] for r in rows] == ["TDS"]
+
+    def test_missing_records_returns_empty_list(self):
+        """Return nothing when the payload has no records array."""
+        assert normalize.process_data_gov_in({"title": "x"}) == []
+
+
+class TestColumnarPath:
+    """Tests for the vectorized path used on large single-schema pages."""
+
+    @staticmethod
+    def _page():
+        records = []
+        for i in range(300):
+            records.append(
+                {
+                    "State Name": ["Delhi", " goa ", "", "Atlantis"][i % 4],
+                    "Station_Name": ["Okhla", "", None, "Panaji"][i % 3],
+                    "District": "North",
+                    "Latitude": ["28.5", None, "x", 15][i % 4],
+                    "Longitude": "77.1",
+                    "Date": ["2020-05-06", "bad", None, "12/03/2021"][i % 4],
+                    "BOD": ["NA", "4.2", "", " 1.5 ", "abc", 3][i % 6],
+                    "BOD_MG_L": str(i / 7),
+                    "pH": ["nan", "7.1", "1_0", "-nan"][i % 4],
+                    "Nitrate": [None, "0.30000000000000004"][i % 2],
+                }
+            )
+        return {"title": "Data for 2019", "records": records}
+
+    def _run(self, monkeypatch, min_rows):
+        monkeypatch.setenv("DATA_GOV_IN_COLUMNAR_MIN_ROWS", str(min_rows))
+        normalize.random.seed(7)
+        return normalize.process_data_gov_in(self._page())
+
+    def test_matches_record_path_row_for_row(self, monkeypatch):
+        """Produce exactly the rows of the record-by-record path, in the same order."""
+        columnar = self._run(monkeypatch, 1)
+        by_record = self._run(monkeypatch, 0)
+        assert repr(columnar) == repr(by_record)
+        assert len(columnar) > 300
+
+    def test_mixed_schemas_use_the_record_path(self, monkeypatch):
+        """Fall back to per-record processing when records do not share one schema."""
+        monkeypatch.setenv("DATA_GOV_IN_COLUMNAR_MIN_ROWS", "1")
+        records = [{"state": "Goa", "lat": 1, "lon": 2, "tds": 5}, {"state": "Goa", "bod": 2}]
+        assert normalize._columnar_plan(records) is None
+        rows = normalize.process_data_gov_in({"records": records})
+        assert [r["parameter"] for r in rows] == ["TDS", "BOD"]
+
+
+class TestParseDate:
+    """Tests for the fast-path date parser."""
+
+    def test_fast_path_matches_dateutil(self):
+        """Give the same answer as dateutil for every layout the fast path handles."""
+        today = normalize.date(2024, 2, 29)
+        cases = [
+            "2020-05-06",
+            "2020-5-6",
+            "2020-05-06T10:30:00Z",
+            "2020-05-06 10:30:15.123",
+            "06-05-2020",
+            "13/05/2020",
+            "5/13/2020",
+            "2019",
+        ]
+        for text in cases:
+            expected = normalize.date_parser.parse(text, default=normalize.datetime(2024, 2, 29))
+            assert normalize._fast_parse_date(text, today).date() == expected.date(), text
+
+    def test_years_below_1000_go_to_dateutil(self):
+        """Leave years below 1000 to dateutil, which reads a bare "0099" as 1999."""
+        today = normalize.date(2024, 2, 29)
+        for text in ["0099", "0999", "0099-01-05"]:
+            assert normalize._fast_parse_date(text, today) is None, text
+            expected = normalize.date_parser.parse(text).date().isoformat()
+            assert normalize._parse_date(text) == expected, text
+        assert normalize._parse_date("0099").startswith("1999-")
+        assert normalize._parse_date("0099-01-05") == "0099-01-05"
+
+    def test_bare_year_clamps_to_month_length(self):
+        """Use today's month and day for a bare year, clamped like dateutil does."""
+        assert normalize._fast_parse_date("2019", normalize.date(2024, 2, 29)).day == 28
+
+    def test_invalid_dates_fall_back_or_fail(self):
+        """Leave invalid or unknown layouts to dateutil and return None when it rejects them."""
+        assert normalize._fast_parse_date("2020-02-30", normalize.date.today()) is None
+        assert normalize._fast_parse_date("March 2020", normalize.date.today()) is None
+        assert normalize._parse_date("2020-02-30") is None
+        assert normalize._parse_date("0000") is None
+        assert normalize._parse_date("March 5 2020") == "2020-03-05"
@@ -0,0 +1,215 @@
+"""Tests for the PostgreSQL write path of WaterQualityDataFetcher, without a live database."""
+
+import contextlib
+
+import psycopg2.extras
+import pytest
+
+import fetch_data
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """Capture execute_values calls and answer RETURNING name, id with sequential ids."""
+    calls = []
+
+    def fake_execute_values(cursor, sql, rows, template=None, page_size=100, fetch=False):
+        calls.append({"sql": sql, "rows": list(rows), "page_size": page_size})
+        return [(row[0], 100 + i) for i, row in enumerate(rows)]
+
+    monkeypatch.setattr(psycopg2.extras, "execute_values", fake_execute_values)
+    return calls
+
+
+def _reading(name, state="Delhi", lat=28.6, lon=77.2, district=None):
+    return {
+        "location_name": name,
+        "state": state,
+        "district": district,
+        "latitude": lat,
+        "longitude": lon,
+    }
+
+
+class TestUpsertLocations:
+    """Tests for the set-based location upsert."""
+
+    def test_sends_all_locations_in_one_statement(self, fetcher, statements):
+        """Upsert every distinct station with a single INSERT ... RETURNING."""
+        data = [_reading(f"S{i % 250}") for i in range(1000)]
+        ids = fetcher._upsert_postgres_locations(None, data)
+        assert len(statements) == 1
+        assert len(statements[0]["rows"]) == 250
+        assert statements[0]["page_size"] == 5000
+        assert len(ids) == 250
+        assert len(set(ids.values())) == 250
+
+    def test_statements_are_bounded_by_the_batch_size(self, fetcher, statements, monkeypatch):
+        """Page a large upsert at DATA_PIPELINE_BATCH_SIZE locations per statement."""
+        monkeypatch.setenv("DATA_PIPELINE_BATCH_SIZE", "100")
+        fetcher._upsert_postgres_locations(None, [_reading(f"S{i}") for i in range(250)])
+        assert statements[0]["page_size"] == 100
+
+    def test_maps_returned_ids_back_by_key(self, fetcher, statements):
+        """Look ids up by name, whatever order the rows were sent in."""
+        ids = fetcher._upsert_postgres_locations(None, [_reading("B"), _reading("A")])
+        sent = [row[0] for row in statements[0]["rows"]]
+        assert sent == ["A", "B"]
+        assert ids == {("A", "Delhi"): 100, ("B", "Delhi"): 101}
+
+    def test_keys_sharing_a_name_become_one_row(self, fetcher, statements):
+        """Keep the first state and the last coordinates for a name seen under two states."""
+        data = [
+            _reading("Ganga", "Bihar", lat=25.0, district="Patna"),
+            _reading("Ganga", "Uttar Pradesh", lat=26.0),
+        ]
+        ids = fetcher._upsert_postgres_locations(None, data)
+        assert statements[0]["rows"] == [("Ganga", "Bihar", "Patna", 26.0, 77.2, "river")]
+        assert ids == {("Ganga", "Bihar"): 100, ("Ganga", "Uttar Pradesh"): 100}
+
+    def test_no_statement_for_empty_batches(self, fetcher, statements):
+        """Skip the round-trip entirely when there is nothing to upsert."""
+        assert fetcher._upsert_postgres_locations(None, []) == {}
+        assert statements == []
+
+
+class _CopyCursor:
+    """Record SQL and COPY payloads; return `merged` rows from the merge statement."""
+
+    def __init__(self, merged):
+        self.sql = []
+        self.copied = None
+        self._merged = merged
+
+    def execute(self, sql, params=None):
+        self.sql.append(" ".join(sql.split()))
+        if sql.strip().startswith("SELECT parameter_code"):
+            self._rows = [("BOD", 1), ("pH", 2)]
+        elif sql.strip().startswith("INSERT INTO water_quality_readings"):
+            self._rows = [(5, 1, 0.0, "2020-01-01")] * self._merged
+
+    def fetchall(self):
+        return self._rows
+
+    def copy_expert(self, sql, file):
+        self.sql.append(sql)
+        self.copied = file.read()
+
+
+class TestCopyReadings:
+    """Tests for COPY-based bulk ingestion of readings."""
+
+    def _data(self, n):
+        return [
+            {
+                "location_name": "S1",
+                "state": "Delhi",
+                "parameter": ["BOD", "pH", "XYZ"][i % 3],
+                "value": i / 10,
+                "measurement_date": f"2020-01-{i % 28 + 1:02d}",
+                "source": "government",
+            }
+            for i in range(n)
+        ]
+
+    def test_large_batches_are_copied_and_merged(self, fetcher, monkeypatch):
+        """Stream rows through COPY and return the readings the merge inserted."""
+        monkeypatch.setenv("DATA_PIPELINE_COPY_MIN_ROWS", "10")
+        cursor = _CopyCursor(merged=7)
+        inserted, stored = fetcher._insert_postgres_readings(
+            cursor, self._data(30), {("S1", "Delhi"): 5}
+        )
+        assert len(inserted) == 7
+        assert stored.sum() == 20
+        assert any(s.startswith("COPY water_quality_readings_staging") for s in cursor.sql)
+        assert cursor.sql[-1].startswith("INSERT INTO water_quality_readings")
+        assert "ON CONFLICT (location_id, parameter_id, measurement_date) DO NOTHING" in (
+            cursor.sql[-1]
+        )
+        assert cursor.sql[-1].endswith(
+            "RETURNING location_id, parameter_id, value, measurement_date"
+        )
+        lines = cursor.copied.splitlines()
+        assert len(lines) == 20  # unknown parameters are dropped
+        assert lines[0] == "5,1,0.0,2020-01-01,government"
+
+    def test_small_batches_use_multi_row_values(self, fetcher, monkeypatch, statements):
+        """Keep execute_values for batches below DATA_PIPELINE_COPY_MIN_ROWS."""
+        monkeypatch.setenv("DATA_PIPELINE_COPY_MIN_ROWS", "1000")
+        cursor = _CopyCursor(merged=0)
+        fetcher._insert_postgres_readings(cursor, self._data(30), {("S1", "Delhi"): 5})
+        assert cursor.copied is None
+        assert len(statements) == 1
+
+
+class TestSaveUsesDimensionCache:
+    """Tests for dimension traffic across batches of one run."""
+
+    @pytest.fixture
+    def cursor(self, monkeypatch):
+        """Serve pooled connections whose cursor records SQL; commits are counted."""
+        cursor = _CopyCursor(merged=0)
+        cursor.fetchone = lambda: ("db", 2, 2, 1, 1, 1)
+        cursor.commits = 0
+
+        class _Conn:
+            def cursor(self):
+                return cursor
+
+            def commit(self):
+                cursor.commits += 1
+
+            def rollback(self):
+                pass
+
+        @contextlib.contextmanager
+        def fake_connection():
+            yield _Conn()
+
+        monkeypatch.setattr(fetch_data.db_pool, "connection", fake_connection)
+        return cursor
+
+    def test_known_stations_skip_the_upsert(self, fetcher, statements, cursor):
+        """Upsert a station the first time only and read parameters once per run."""
+        batch = [dict(r, latitude=28.6, longitude=77.2) for r in TestCopyReadings()._data(6)]
+        fetcher._save_to_postgres(batch)
+        fetcher._save_to_postgres(batch)
+        location_upserts = [c for c in statements if "INSERT INTO locations" in c["sql"]]
+        assert len(location_upserts) == 1
+        assert sum(q.startswith("SELECT parameter_code") for q in cursor.sql) == 1
+
+    def test_cache_failure_keeps_the_committed_batch(self, fetcher, statements, cursor):
+        """Report a committed batch as saved even when updating the id cache fails."""
+
+        def broken(*args):
+            raise OSError("disk full")
+
+        fetcher.dimension_cache.commit = broken
+        batch = [dict(r, latitude=28.6, longitude=77.2) for r in TestCopyReadings()._data(6)]
+        assert len(fetcher._save_to_postgres(batch)) == 4  # XYZ is not a known parameter
+        assert cursor.commits == 1
+        assert fetcher.dimension_cache.locations == {}
+
+
+class TestAlertEvaluation:
+    """Tests for raising alerts inside the save transaction."""
+
+    def test_failed_evaluation_keeps_the_readings(self, fetcher):
+        """Roll back to the savepoint and still let the batch commit."""
+        cursor = _CopyCursor(merged=0)
+        fetcher.dimension_cache.parameters = {"BOD": 1}
+
+        def broken(*args):
+            raise RuntimeError("boom")
+
+        fetcher.alert_engine.evaluate = broken
+        fetcher._evaluate_postgres_alerts(
+            cursor,
+            [dict(_reading("S1"), parameter="BOD")],
+            {("S1", "Delhi"): 5},
+            [(5, 1, 20.0, "2020-01-01")],
+        )
+        assert cursor.sql == [
+            "SAVEPOINT alert_evaluation",
+            "ROLLBACK TO SAVEPOINT alert_evaluation",
+        ]
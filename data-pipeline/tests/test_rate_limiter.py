@@ -0,0 +1,144 @@
+"""Unit tests for the shared per-host rate limiter and retry helper."""
+
+import asyncio
+
+import pytest
+
+import config
+import rate_limiter
+
+
+class _FakeResponse:
+    def __init__(self, status, payload=None, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._payload = payload
+
+    async def json(self):
+        return self._payload
+
+    async def text(self):
+        return str(self._payload)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class _ScriptedSession:
+    """Answer successive GETs from a fixed list of responses."""
+
+    def __init__(self, responses):
+        self._responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls += 1
+        return self._responses.pop(0)
+
+
+def _api(**overrides):
+    values = {"base_url": "https://api.example.gov/resource/", "rate_limit": 6000}
+    values.update(overrides)
+    return config.APIConfig(**values)
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """Record requested sleeps instead of waiting on them."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+    return delays
+
+
+class TestRateLimiter:
+    """Tests for bucket sharing and retry behaviour."""
+
+    def test_sources_on_the_same_host_share_a_bucket(self):
+        """Give data_gov_in and cpcb the same bucket because both call api.data.gov.in."""
+        limiter = rate_limiter.RateLimiter(config.GOVERNMENT_APIS)
+        assert limiter.bucket_for(config.GOVERNMENT_APIS["data_gov_in"]) is limiter.bucket_for(
+            config.GOVERNMENT_APIS["cpcb"]
+        )
+        assert limiter.bucket_for(config.GOVERNMENT_APIS["weather_api"]) is not (
+            limiter.bucket_for(config.GOVERNMENT_APIS["cpcb"])
+        )
+
+    def test_shared_host_keeps_the_lowest_source_limit(self, no_sleep):
+        """Hold two sources on one host to the smaller of their rate limits."""
+        fast, slow = _api(rate_limit=6000), _api(rate_limit=600)
+        limiter = rate_limiter.RateLimiter({"fast": fast, "slow": slow})
+        bucket = limiter.bucket_for(fast)
+        assert bucket.rate_per_second == 10
+        session = _ScriptedSession([_FakeResponse(200, {"ok": 1}) for _ in range(70)])
+
+        async def fetch_both():
+            return await asyncio.gather(
+                *(limiter.request_json(session, api, "u") for api in [fast, slow] * 35)
+            )
+
+        assert len(asyncio.run(fetch_both())) == 70
+        # The burst allowance is 60 requests; the rest wait for the 10/s refill
+        assert no_sleep and max(no_sleep) <= 0.1
+
+    def test_retries_transient_errors_then_succeeds(self, no_sleep):
+        """Retry a 503 and return the JSON body of the next successful response."""
+        api = _api(retry_attempts=3)
+        session = _ScriptedSession([_FakeResponse(503, "busy"), _FakeResponse(200, {"ok": 1})])
+        limiter = rate_limiter.RateLimiter({"x": api})
+        assert asyncio.run(limiter.request_json(session, api, "u")) == {"ok": 1}
+        assert session.calls == 2
+
+    def test_honours_retry_after(self, no_sleep):
+        """Wait for the Retry-After delay instead of the computed backoff."""
+        api = _api(retry_attempts=2)
+        session = _ScriptedSession(
+            [_FakeResponse(429, "slow down", {"Retry-After": "0.05"}), _FakeResponse(200, [])]
+        )
+        limiter = rate_limiter.RateLimiter({"x": api})
+        asyncio.run(limiter.request_json(session, api, "u"))
+        assert 0.05 in no_sleep
+
+    def test_gives_up_after_retry_attempts(self, no_sleep):
+        """Raise APIRequestError once every attempt has failed."""
+        api = _api(retry_attempts=2)
+        session = _ScriptedSession([_FakeResponse(500, "a"), _FakeResponse(500, "b")])
+        limiter = rate_limiter.RateLimiter({"x": api})
+        with pytest.raises(rate_limiter.APIRequestError) as excinfo:
+            asyncio.run(limiter.request_json(session, api, "u", label="cpcb"))
+        assert excinfo.value.status == 500
+        assert session.calls == 2
+
+    def test_does_not_retry_client_errors(self, no_sleep):
+        """Fail immediately on a non-retryable status such as 403."""
+        api = _api(retry_attempts=5)
+        session = _ScriptedSession([_FakeResponse(403, "forbidden")])
+        limiter = rate_limiter.RateLimiter({"x": api})
+        with pytest.raises(rate_limiter.APIRequestError):
+            asyncio.run(limiter.request_json(session, api, "u"))
+        assert session.calls == 1
+
+
+class TestParseRetryAfter:
+    """Tests for Retry-After header parsing."""
+
+    def test_parses_delta_seconds(self):
+        """Accept a plain number of seconds."""
+        assert rate_limiter.parse_retry_after("12") == 12.0
+
+    def test_parses_http_dates_in_the_past_as_zero(self):
+        """Treat an HTTP date that has already passed as no wait."""
+        assert rate_limiter.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    def test_ignores_missing_or_garbage_values(self):
+        """Return None when the header is absent or unparseable."""
+        assert rate_limiter.parse_retry_after(None) is None
+        assert rate_limiter.parse_retry_after("soon") is None
@@ -0,0 +1,154 @@
+"""Tests for columnar ReadingsBatch handling across normalize, dedup and storage."""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import normalize
+from dedup import ReadingDeduplicator, natural_key, natural_keys
+from readings_batch import NO_DATE, ReadingsBatch
+
+
+def _reading(name, parameter="BOD", date="2024-01-01", value=1.5, state="Delhi"):
+    return {
+        "location_name": name,
+        "state": state,
+        "district": None,
+        "latitude": 28.6,
+        "longitude": 77.2,
+        "parameter": parameter,
+        "value": value,
+        "unit": "mg/L",
+        "measurement_date": date,
+        "source": "government",
+    }
+
+
+class TestReadingsBatch:
+    """Tests for encoding, slicing and merging batches."""
+
+    def test_round_trips_reading_dicts(self):
+        """Give back the same dicts, with missing values and dates as None."""
+        records = [
+            _reading("A"),
+            _reading("A", "pH", value=None),
+            _reading("B", date=None, state="Goa"),
+        ]
+        batch = ReadingsBatch.from_records(records)
+        assert len(batch) == 3
+        assert len(batch.stations) == 2
+        assert batch.date[2] == NO_DATE
+        assert batch.to_records() == records
+        assert list(batch) == records
+
+    def test_take_and_concat_keep_row_order(self):
+        """Merge dictionaries of several batches and keep only entries still in use."""
+        first = ReadingsBatch.from_records([_reading(f"S{i}", date="2024-01-02") for i in range(4)])
+        second = ReadingsBatch.from_records([_reading("S3", "pH"), _reading("S9", "DO")])
+        merged = ReadingsBatch.concat([first[2:], first.take(np.array([True, False] * 2)), second])
+        expected = [*first.to_records()[2:], *first.to_records()[0::2], *second.to_records()]
+        assert merged.to_records() == expected
+        assert sorted(s.location_name for s in merged.stations) == ["S0", "S2", "S3", "S9"]
+
+    def test_reads_non_iso_dates_and_skips_unparseable_ones(self):
+        """Parse dates the way normalize does and drop readings whose date is not a date."""
+        batch = ReadingsBatch.from_records(
+            [
+                _reading("A", date="05-01-2023"),
+                _reading("B", date="2023-1-5"),
+                _reading("C", date="n/a"),
+            ]
+        )
+        assert [r["measurement_date"] for r in batch] == ["2023-05-01", "2023-01-05"]
+        assert [s.location_name for s in batch.stations] == ["A", "B"]
+
+    def test_to_frame_keeps_labels_categorical(self):
+        """Build the training frame with categorical labels and datetime dates."""
+        batch = ReadingsBatch.from_rows(
+            [("A", "Delhi", None, 28.6, 77.2, "BOD", 3.0, "mg/L", "2024-01-01", "government")] * 3
+        )
+        frame = batch.to_frame()
+        assert isinstance(frame["location_name"].dtype, pd.CategoricalDtype)
+        assert frame["measurement_date"].iloc[0] == pd.Timestamp("2024-01-01")
+        assert frame["value"].tolist() == [3.0] * 3
+
+
+class TestBatchPipeline:
+    """Tests for producing and consuming batches instead of reading dicts."""
+
+    def test_normalize_batch_matches_dicts(self, monkeypatch):
+        """Produce the same readings on both the columnar and record-by-record paths."""
+        page = {
+            "title": "Data for 2019",
+            "records": [
+                {
+                    "State": "Goa",
+                    "Station": f"P{i % 7}",
+                    "Lat": str(15 + i % 7),
+                    "Lon": "74",
+                    "BOD": str(i),
+                    "pH": ["7", "NA"][i % 2],
+                }
+                for i in range(50)
+            ],
+        }
+        for min_rows in ("1", "0"):
+            monkeypatch.setenv("DATA_GOV_IN_COLUMNAR_MIN_ROWS", min_rows)
+            normalize.random.seed(3)
+            records = normalize.process_data_gov_in(page)
+            normalize.random.seed(3)
+            batch = normalize.process_data_gov_in_batch(page)
+            assert batch.to_records() == records
+            assert len(batch.stations) == 7
+
+    def test_natural_keys_match_the_dict_keys(self):
+        """Key batch readings exactly as stored dict readings were keyed."""
+        records = [_reading("A"), _reading("B", "pH", date=None), _reading(None)]
+        assert natural_keys(ReadingsBatch.from_records(records)) == [
+            natural_key(r) for r in records
+        ]
+
+    def test_deduplicator_filters_batches(self, tmp_path):
+        """Drop repeats and readings already stored, keeping a batch a batch."""
+        path = str(tmp_path / "bloom.bin")
+        first = ReadingDeduplicator(path, 1000, 1e-6)
+        first.mark_stored(ReadingsBatch.from_records([_reading("A")]))
+        batch = ReadingsBatch.from_records([_reading("A"), _reading("C"), _reading("C", value=9)])
+        new, skipped = first.filter_new(batch)
+        assert isinstance(new, ReadingsBatch)
+        assert skipped == 2
+        assert new.to_records() == [_reading("C")]
+
+    def test_sqlite_saves_dicts_with_non_iso_dates(self, make_fetcher):
+        """Store a list of reading dicts whose dates are not YYYY-MM-DD."""
+        fetcher = make_fetcher(sqlite=True)
+        fetcher.save_to_database(
+            [_reading("A", date="05-01-2023"), _reading("B", date="2023-1-5"), _reading("C")]
+        )
+        conn = sqlite3.connect(fetcher.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT location_name, measurement_date FROM water_quality_readings"
+                " ORDER BY location_name"
+            ).fetchall()
+        finally:
+            conn.close()
+        assert rows == [("A", "2023-05-01"), ("B", "2023-01-05"), ("C", "2024-01-01")]
+
+    @pytest.mark.parametrize("layout", ["flat", "normalized"])
+    def test_sqlite_saves_a_batch(self, make_fetcher, layout):
+        """Store every reading of a batch in either SQLite layout."""
+        fetcher = make_fetcher(sqlite=True, SQLITE_SCHEMA=layout)
+        records = [
+            _reading(f"S{i % 3}", ["BOD", "pH"][i % 2], f"2024-01-{i % 5 + 1:02d}", i)
+            for i in range(30)
+        ]
+        fetcher.save_to_database(ReadingsBatch.from_records(records))
+        conn = sqlite3.connect(fetcher.db_path)
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM water_quality_readings").fetchone()[0] == 30
+            assert conn.execute("SELECT COUNT(*) FROM locations").fetchone()[0] == 3
+        finally:
+            conn.close()
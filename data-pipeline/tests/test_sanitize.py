@@ -1,6 +1,7 @@
 """Unit tests for the input-sanitisation helpers in fetch_data."""
 
 import fetch_data
+from readings_batch import ReadingsBatch
 
 
 class TestSanitizeText:
@@ -62,3 +63,44 @@ class TestSanitizeRecord:
         out = fetch_data.sanitize_record(record, ["name", "absent"])
         assert out["name"] is None
         assert "absent" not in out
+
+
+class TestSanitizeRecords:
+    """Tests for batch sanitization."""
+
+    def test_matches_sanitize_record_for_every_record(self):
+        """Produce exactly what sanitize_record gives record by record."""
+        records = [
+            {"name": "<b>Ganga</b> &amp; co\x07", "state": " Delhi ", "value": i} for i in range(3)
+        ] + [{"name": None, "state": 42}]
+        fields = ["name", "state", "absent"]
+        expected = [fetch_data.sanitize_record(r, fields) for r in records]
+        assert fetch_data.sanitize_records(records, fields) == expected
+
+    def test_does_not_mutate_the_input_records(self):
+        """Return sanitized copies and leave the input list untouched."""
+        records = [{"name": "<i>Yamuna</i>"}]
+        out = fetch_data.sanitize_records(records, ["name"])
+        assert records[0]["name"] == "<i>Yamuna</i>"
+        assert out[0] is not records[0]
+
+
+class TestParsePage:
+    """Tests for sanitizing pages on the parse pool."""
+
+    def test_parsed_pages_arrive_sanitized(self):
+        """Sanitize station text while parsing and mark the batch so saving skips it."""
+        page = {"records": [{"State": "Delhi", "Station": "<b>S1</b>", "pH": 7.0}]}
+        batch = fetch_data.parse_page(page)
+        assert batch.text_clean
+        assert [r["location_name"] for r in batch] == ["S1"]
+        assert fetch_data.sanitize_batch(batch, fetch_data.TEXT_FIELDS) is batch
+        assert ReadingsBatch.concat([batch[:1], batch[:1]]).text_clean
+
+    def test_unmarked_batches_are_still_sanitized(self):
+        """Sanitize batches built elsewhere, e.g. from reading dicts."""
+        batch = ReadingsBatch.from_records([{"location_name": "<b>S1</b>", "value": 1.0}])
+        out = fetch_data.sanitize_batch(batch, fetch_data.TEXT_FIELDS)
+        assert out.text_clean and not batch.text_clean
+        assert out.record(0)["location_name"] == "S1"
+        assert not ReadingsBatch.concat([out, batch]).text_clean
@@ -0,0 +1,129 @@
+"""Tests for the SQLite storage mode of WaterQualityDataFetcher."""
+
+import sqlite3
+
+import pytest
+
+import fetch_data
+import sqlite_store
+
+
+@pytest.fixture
+def sqlite_fetcher(make_fetcher):
+    """Build a fetcher that falls back to a fresh SQLite file."""
+    return make_fetcher(sqlite=True)
+
+
+def _record(name, parameter="BOD", date="2024-01-01", value=1.5):
+    return {
+        "location_name": name,
+        "state": "Delhi",
+        "district": None,
+        "latitude": 28.6,
+        "longitude": 77.2,
+        "parameter": parameter,
+        "value": value,
+        "unit": "mg/L",
+        "measurement_date": date,
+        "source": "government",
+    }
+
+
+class TestSQLiteStore:
+    """Tests for pragmas, indexes and batched writes."""
+
+    def test_database_uses_wal_and_reading_indexes(self, sqlite_fetcher):
+        """Switch the file to WAL and create the date and parameter/date indexes."""
+        assert not sqlite_fetcher.use_postgres
+        conn = sqlite_store.connect(sqlite_fetcher.db_path, readonly=True)
+        try:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(water_quality_readings)")}
+        finally:
+            conn.close()
+        assert set(sqlite_store.READING_INDEXES[sqlite_store.FLAT]) <= indexes
+
+    def test_saves_readings_and_locations(self, sqlite_fetcher):
+        """Store every reading once and one row per station."""
+        data = [_record(f"S{i % 3}", date=f"2024-01-{i % 5 + 1:02d}") for i in range(15)]
+        sqlite_fetcher.save_to_database(data)
+        sqlite_fetcher.save_to_database(data)
+        conn = sqlite_store.connect(sqlite_fetcher.db_path, readonly=True)
+        try:
+            readings = conn.execute("SELECT COUNT(*) FROM water_quality_readings").fetchone()[0]
+            locations = conn.execute("SELECT COUNT(*) FROM locations").fetchone()[0]
+        finally:
+            conn.close()
+        assert readings == 15
+        assert locations == 3
+
+    def test_readers_cannot_write(self, sqlite_fetcher):
+        """Open reader connections read-only, so a stray write fails instead of landing."""
+        conn = sqlite_store.connect(sqlite_fetcher.db_path, readonly=True)
+        try:
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                conn.execute("DELETE FROM locations")
+        finally:
+            conn.close()
+
+
+def _readings(db_path):
+    conn = sqlite_store.connect(db_path, readonly=True)
+    try:
+        layout = sqlite_store.reading_layout(conn)
+        return layout, sorted(conn.execute(sqlite_store.READINGS_QUERY[layout]).fetchall())
+    finally:
+        conn.close()
+
+
+class TestNormalizedLayout:
+    """Tests for the normalized SQLite layout and the migration to it."""
+
+    def test_new_databases_use_the_requested_layout(self, monkeypatch, sqlite_fetcher):
+        """Create integer-keyed readings when SQLITE_SCHEMA=normalized."""
+        monkeypatch.setenv("SQLITE_SCHEMA", "normalized")
+        fetcher = fetch_data.WaterQualityDataFetcher(db_path=sqlite_fetcher.db_path + ".n")
+        data = [_record(f"S{i % 3}", parameter=["BOD", "pH"][i % 2]) for i in range(6)]
+        fetcher.save_to_database(data)
+        fetcher.save_to_database(data)
+        layout, rows = _readings(fetcher.db_path)
+        assert layout == sqlite_store.NORMALIZED
+        assert len(rows) == 6
+        assert rows[0] == (
+            "S0",
+            "Delhi",
+            None,
+            28.6,
+            77.2,
+            "BOD",
+            1.5,
+            "mg/L",
+            "2024-01-01",
+            "government",
+        )
+
+    def test_flat_database_is_migrated_without_losing_readings(self, monkeypatch, sqlite_fetcher):
+        """Keep every reading, with the same columns, when a flat file is migrated."""
+        data = [
+            _record(
+                f"S{i % 7}", parameter=["BOD", "pH", "TDS"][i % 3], date=f"2024-02-{i % 20 + 1:02d}"
+            )
+            for i in range(300)
+        ]
+        sqlite_fetcher.save_to_database(data)
+        before = _readings(sqlite_fetcher.db_path)
+
+        monkeypatch.setenv("SQLITE_SCHEMA", "normalized")
+        migrated = fetch_data.WaterQualityDataFetcher(db_path=sqlite_fetcher.db_path)
+        assert migrated.sqlite_layout == sqlite_store.NORMALIZED
+        after = _readings(sqlite_fetcher.db_path)
+        assert before[0] == sqlite_store.FLAT
+        assert after == (sqlite_store.NORMALIZED, before[1])
+
+    def test_normalized_files_stay_normalized(self, monkeypatch, sqlite_fetcher):
+        """Keep using the normalized layout even when SQLITE_SCHEMA is unset later."""
+        monkeypatch.setenv("SQLITE_SCHEMA", "normalized")
+        fetch_data.WaterQualityDataFetcher(db_path=sqlite_fetcher.db_path + ".n")
+        monkeypatch.delenv("SQLITE_SCHEMA")
+        reopened = fetch_data.WaterQualityDataFetcher(db_path=sqlite_fetcher.db_path + ".n")
+        assert reopened.sqlite_layout == sqlite_store.NORMALIZED
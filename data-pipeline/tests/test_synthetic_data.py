@@ -0,0 +1,110 @@
+"""Tests for the vectorized synthetic reading generator."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fetch_data
+from config import WATER_QUALITY_PARAMETERS
+from synthetic_data import ReadingGenerator, generate_readings, to_records
+
+
+class TestReadingGenerator:
+    """Tests for ReadingGenerator and generate_readings."""
+
+    def test_same_seed_gives_same_frame(self):
+        """Draw identical readings for an int seed or an equally seeded Generator."""
+        first = generate_readings(2000, seed=11)
+        assert first.equals(generate_readings(2000, seed=11))
+        assert first.equals(generate_readings(2000, seed=np.random.default_rng(11)))
+        assert not first.equals(generate_readings(2000, seed=12))
+
+    def test_chunks_stream_the_requested_rows(self):
+        """Split N rows into frames no larger than the chunk size."""
+        sizes = [len(chunk) for chunk in ReadingGenerator(1).chunks(25_000, chunk_size=10_000)]
+        assert sizes == [10_000, 10_000, 5_000]
+
+    def test_columns_and_value_ranges(self):
+        """Produce the pipeline's reading columns with plausible, positive values."""
+        frame = generate_readings(50_000, seed=3, start="2023-01-01", days=365)
+        assert list(frame.columns) == [
+            "location_name",
+            "state",
+            "district",
+            "latitude",
+            "longitude",
+            "parameter",
+            "value",
+            "unit",
+            "measurement_date",
+            "source",
+        ]
+        assert set(frame["parameter"].unique()) == set(WATER_QUALITY_PARAMETERS)
+        assert (frame["value"] > 0).all()
+        assert frame["measurement_date"].min() >= pd.Timestamp("2023-01-01")
+        assert frame["measurement_date"].max() <= pd.Timestamp("2023-12-31")
+        medians = frame.groupby("parameter", observed=True)["value"].median()
+        assert 6.5 < medians["pH"] < 8.5
+        assert medians["Mercury"] < medians["Lead"] < 0.1
+
+    def test_each_station_keeps_its_state_and_position(self):
+        """Report one state, district and coordinate pair per station."""
+        frame = generate_readings(20_000, seed=5, sites_per_river=2)
+        per_station = frame.groupby("location_name", observed=True)[
+            ["state", "district", "latitude", "longitude"]
+        ].nunique()
+        assert (per_station == 1).all().all()
+        assert frame["location_name"].nunique() > 31
+
+    def test_station_days_report_every_parameter_once(self):
+        """Never repeat a (location, state, parameter, date) key, even across chunks."""
+        key = ["location_name", "state", "parameter", "measurement_date"]
+        frame = generate_readings(8_000, seed=6, days=60)
+        assert not frame.duplicated(key).any()
+        assert (frame.groupby(key[:2] + key[3:], observed=True).size() == 8).all()
+        chunked = pd.concat(ReadingGenerator(6, days=60).chunks(8_000, chunk_size=3_000))
+        assert not chunked.duplicated(key).any()
+
+    def test_too_many_readings_for_the_grid_raise(self):
+        """Refuse a sample that cannot fit in distinct station-days."""
+        with pytest.raises(ValueError, match="station-days"):
+            generate_readings(10_000, seed=1, days=1)
+
+    def test_import_needs_no_database_settings(self):
+        """Import without DB_PASSWORD/DATABASE_URL, as the training fallback does."""
+        env = {k: v for k, v in os.environ.items() if k not in ("DB_PASSWORD", "DATABASE_URL")}
+        code = "import sys, synthetic_data; assert 'config' not in sys.modules"
+        pipeline_dir = Path(__file__).resolve().parent.parent
+        subprocess.run([sys.executable, "-c", code], cwd=pipeline_dir, env=env, check=True)
+
+    def test_records_match_the_fetcher_shape(self):
+        """Convert a frame into reading dicts with string dates and rounded values."""
+        records = to_records(generate_readings(5, seed=2, source="sensor"))
+        assert len(records) == 5
+        record = records[0]
+        assert isinstance(record["location_name"], str)
+        assert isinstance(record["measurement_date"], str) and len(record["measurement_date"]) == 10
+        assert record["value"] == round(record["value"], 3)
+        assert record["source"] == "sensor"
+
+
+class TestFetcherSampleData:
+    """Tests for the fetcher's sample-data fallback."""
+
+    def test_sample_data_uses_the_shared_generator(self, monkeypatch):
+        """Return the configured number of recent readings tagged with the source type."""
+        monkeypatch.setenv("DATA_PIPELINE_SAMPLE_READINGS", "120")
+        fetcher = fetch_data.WaterQualityDataFetcher.__new__(fetch_data.WaterQualityDataFetcher)
+        fetcher.allow_sample_data = True
+        fetcher.run_id = "test"
+        records = fetcher._generate_sample_data("cpcb")
+        assert len(records) == 120
+        assert {r["source"] for r in records} == {"government"}
+        newest = max(r["measurement_date"] for r in records)
+        assert newest <= fetch_data.datetime.now().strftime("%Y-%m-%d")
+        assert fetcher._generate_sample_data("cpcb") == records
@@ -0,0 +1,58 @@
+"""Unit tests for incremental-fetch watermarks."""
+
+from datetime import datetime, timedelta
+
+from watermarks import FetchPlan, Watermark, WatermarkStore
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def _store(tmp_path, **watermark):
+    store = WatermarkStore(str(tmp_path / "wm.json"), full_sweep_hours=24)
+    values = {
+        "total": 45,
+        "page_limit": 10,
+        "first_page_hash": "h",
+        "last_full_sweep": (NOW - timedelta(hours=1)).isoformat(),
+    }
+    values.update(watermark)
+    store.watermarks["cpcb"] = Watermark(**values)
+    return store
+
+
+class TestWatermarkStore:
+    """Tests for fetch planning and persistence."""
+
+    def test_plans_a_full_sweep_without_a_watermark(self, tmp_path):
+        """Start from scratch for a source that was never fetched incrementally."""
+        store = WatermarkStore(str(tmp_path / "wm.json"))
+        assert store.plan("cpcb", 45, 10, "h", NOW).full_sweep
+
+    def test_resumes_at_the_last_stored_page(self, tmp_path):
+        """Start at the page containing the old total when only the tail grew."""
+        plan = _store(tmp_path).plan("cpcb", 80, 10, "h", NOW)
+        assert plan == FetchPlan(False, 40, "resuming at offset 40 of 80")
+
+    def test_changed_first_page_or_shrunk_total_forces_a_sweep(self, tmp_path):
+        """Re-read everything when earlier pages may have been rewritten."""
+        store = _store(tmp_path)
+        assert store.plan("cpcb", 80, 10, "other", NOW).full_sweep
+        assert store.plan("cpcb", 30, 10, "h", NOW).full_sweep
+        assert store.plan("cpcb", 80, 20, "h", NOW).full_sweep
+
+    def test_full_sweep_runs_on_schedule(self, tmp_path):
+        """Sweep again once DATA_PIPELINE_FULL_SWEEP_HOURS have passed."""
+        store = _store(tmp_path, last_full_sweep=(NOW - timedelta(hours=25)).isoformat())
+        assert store.plan("cpcb", 45, 10, "h", NOW).reason == "scheduled full sweep"
+
+    def test_commit_persists_watermarks(self, tmp_path):
+        """Reload committed watermarks from disk."""
+        store = _store(tmp_path)
+        plan = store.plan("cpcb", 60, 10, "h", NOW)
+        store.commit({"cpcb": store.advance("cpcb", plan, 60, 10, "h", "2024-05-31", NOW)})
+        reloaded = WatermarkStore(str(tmp_path / "wm.json"))
+        assert reloaded.watermarks["cpcb"].total == 60
+        assert reloaded.watermarks["cpcb"].newest_measurement_date == "2024-05-31"
+        assert (
+            reloaded.watermarks["cpcb"].last_full_sweep == store.watermarks["cpcb"].last_full_sweep
+        )
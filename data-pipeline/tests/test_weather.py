@@ -0,0 +1,108 @@
+"""Tests for grid-cell weather lookups and the weather cache."""
+
+import asyncio
+
+import pytest
+
+import fetch_data
+from weather_cache import WeatherCache, grid_cell
+
+_OBSERVATION = {
+    "main": {"temp": 30.0, "humidity": 40, "pressure": 1010},
+    "wind": {"speed": 2.5},
+    "weather": [{"main": "Clear"}],
+}
+
+
+@pytest.fixture
+def fetcher(make_fetcher, monkeypatch, tmp_path):
+    """Build a fetcher whose weather requests are counted instead of sent."""
+    monkeypatch.setattr(fetch_data.GOVERNMENT_APIS["weather_api"], "api_key", "test-key")
+    fetcher = make_fetcher(DATA_PIPELINE_WEATHER_CACHE=str(tmp_path / "weather.json"))
+    fetcher.session = object()
+    fetcher.requests = []
+
+    async def request_json(session, api, url, params=None, headers=None, label=""):
+        fetcher.requests.append((params["lat"], params["lon"]))
+        await asyncio.sleep(0)
+        return _OBSERVATION
+
+    monkeypatch.setattr(fetcher.rate_limiter, "request_json", request_json)
+    return fetcher
+
+
+def _locations():
+    return [
+        {"name": "Okhla", "latitude": 28.61, "longitude": 77.21},
+        {"name": "Nizamuddin", "latitude": 28.62, "longitude": 77.24},
+        {"name": "Varanasi", "latitude": 25.31, "longitude": 83.01},
+        {"name": "Unknown", "latitude": None, "longitude": None},
+    ]
+
+
+class TestGridCell:
+    """Tests for the grid used to share lookups."""
+
+    def test_nearby_points_share_a_cell(self):
+        """Map points in the same 0.1° square to its centre."""
+        assert grid_cell(28.61, 77.21) == grid_cell(28.69, 77.29) == (28.65, 77.25)
+        assert grid_cell(28.6, 77.2) == (28.65, 77.25)
+        assert grid_cell(-0.05, -0.01) == (-0.05, -0.05)
+
+
+class TestWeatherCache:
+    """Tests for persisting observations."""
+
+    def test_snapshot_is_not_changed_by_later_puts(self, tmp_path):
+        """Write the observations as of the snapshot while new ones keep arriving."""
+        cache = WeatherCache(str(tmp_path / "weather.json"))
+        cache.put((28.65, 77.25), {"temperature": 30.0})
+        snapshot = cache.snapshot()
+        cache.put((25.35, 83.05), {"temperature": 31.0})
+        cache.write(snapshot)
+        assert list(WeatherCache(str(tmp_path / "weather.json")).observations) == [
+            "28.650000,77.250000"
+        ]
+        # The later observation is still waiting to be written
+        cache.save()
+        assert len(WeatherCache(str(tmp_path / "weather.json")).observations) == 2
+        assert cache.snapshot() is None
+
+
+class TestFetchWeatherData:
+    """Tests for de-duplicated, cached weather lookups."""
+
+    def test_one_request_per_cell(self, fetcher):
+        """Give every located station weather from one request per grid cell."""
+        weather = asyncio.run(fetcher.fetch_weather_data(_locations()))
+        assert [w["location_name"] for w in weather] == ["Okhla", "Nizamuddin", "Varanasi"]
+        assert sorted(fetcher.requests) == [(25.35, 83.05), (28.65, 77.25)]
+        assert weather[0]["temperature"] == 30.0
+
+    def test_repeat_runs_use_the_cache(self, fetcher):
+        """Serve a second run within the TTL from the cache file."""
+        asyncio.run(fetcher.fetch_weather_data(_locations()))
+        fetcher.weather_cache = WeatherCache.from_env(fetch_data._script_dir)
+        weather = asyncio.run(fetcher.fetch_weather_data(_locations()))
+        assert len(fetcher.requests) == 2
+        assert len(weather) == 3
+
+    def test_expired_observations_are_fetched_again(self, fetcher):
+        """Request a cell again once its cached observation is older than the TTL."""
+        asyncio.run(fetcher.fetch_weather_data(_locations()))
+        fetcher.weather_cache.ttl_seconds = 0
+        asyncio.run(fetcher.fetch_weather_data(_locations()))
+        assert len(fetcher.requests) == 4
+
+    def test_concurrent_batches_share_in_flight_lookups(self, fetcher):
+        """Await a cell already being fetched for another batch instead of requesting it twice."""
+
+        async def run():
+            return await asyncio.gather(
+                fetcher.fetch_weather_data(_locations()[0:1]),
+                fetcher.fetch_weather_data(_locations()[1:2]),
+            )
+
+        first, second = asyncio.run(run())
+        assert len(first) == len(second) == 1
+        assert fetcher.requests == [(28.65, 77.25)]
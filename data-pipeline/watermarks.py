@@ -0,0 +1,155 @@
+"""
+Per-source watermarks for incremental data.gov.in fetches
+Remembers how far each resource has been read so later runs only request new pages
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def page_hash(records: Any) -> str:
+    """Stable digest of a page's records, used to notice when earlier pages were rewritten."""
+    payload = json.dumps(records, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+@dataclass
+class Watermark:
+    """How far a resource was read in the last successful run"""
+
+    total: int  # records known to be stored, i.e. the next run starts at this offset's page
+    page_limit: int
+    first_page_hash: str
+    newest_measurement_date: Optional[str] = None
+    last_full_sweep: Optional[str] = None  # ISO timestamp
+    updated_at: Optional[str] = None
+
+
+@dataclass
+class FetchPlan:
+    """Which offsets of a resource to fetch this run"""
+
+    full_sweep: bool
+    start_offset: int
+    reason: str
+
+
+class WatermarkStore:
+    """JSON file of Watermark entries keyed by source"""
+
+    def __init__(self, path: str, full_sweep_hours: float = 168.0):
+        self.path = Path(path)
+        self.full_sweep_interval = timedelta(hours=full_sweep_hours)
+        self.watermarks: Dict[str, Watermark] = {}
+        self._load()
+
+    @classmethod
+    def from_env(cls, default_dir: Path) -> "WatermarkStore":
+        """
+        DATA_PIPELINE_WATERMARKS sets the file; DATA_PIPELINE_FULL_SWEEP_HOURS the sweep period.
+        """
+        return cls(
+            os.getenv("DATA_PIPELINE_WATERMARKS") or str(default_dir / "watermarks.json"),
+            float(os.getenv("DATA_PIPELINE_FULL_SWEEP_HOURS", "168")),
+        )
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                raw = json.load(f)
+            self.watermarks = {key: Watermark(**value) for key, value in raw.items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable watermark file {self.path}: {e}")
+            self.watermarks = {}
+
+    def save(self) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({key: asdict(wm) for key, wm in self.watermarks.items()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def plan(
+        self,
+        source: str,
+        total: Optional[int],
+        page_limit: int,
+        first_page_hash: str,
+        now: Optional[datetime] = None,
+    ) -> FetchPlan:
+        """
+        Decide whether this run can skip pages that were already stored.
+
+        Only the tail from the last stored offset is fetched when the resource has grown by
+        appending: the first page is unchanged and the total has not shrunk. Anything else
+        (no watermark, unknown total, changed page size or first page, or a full sweep being
+        due) means a full sweep from offset 0.
+        """
+        now = now or datetime.now()
+        wm = self.watermarks.get(source)
+        if wm is None:
+            return FetchPlan(True, page_limit, "no watermark")
+        if total is None:
+            return FetchPlan(True, page_limit, "resource did not report a total")
+        if (
+            wm.last_full_sweep is None
+            or now - datetime.fromisoformat(wm.last_full_sweep) >= self.full_sweep_interval
+        ):
+            return FetchPlan(True, page_limit, "scheduled full sweep")
+        if wm.page_limit != page_limit:
+            return FetchPlan(True, page_limit, "page size changed")
+        if total < wm.total or wm.first_page_hash != first_page_hash:
+            return FetchPlan(True, page_limit, "earlier pages changed")
+        if total == wm.total:
+            return FetchPlan(False, total, "no new records")
+        start = max(page_limit, (wm.total // page_limit) * page_limit)
+        return FetchPlan(False, start, f"resuming at offset {start} of {total}")
+
+    def advance(
+        self,
+        source: str,
+        plan: FetchPlan,
+        stored_total: int,
+        page_limit: int,
+        first_page_hash: str,
+        newest_measurement_date: Optional[str],
+        now: Optional[datetime] = None,
+    ) -> Watermark:
+        """Build the watermark for a completed fetch (the caller commits it once data is saved)."""
+        now = now or datetime.now()
+        previous = self.watermarks.get(source)
+        newest = newest_measurement_date
+        if previous is not None and previous.newest_measurement_date and not plan.full_sweep:
+            newest = max(filter(None, [newest, previous.newest_measurement_date]))
+        return Watermark(
+            total=stored_total,
+            page_limit=page_limit,
+            first_page_hash=first_page_hash,
+            newest_measurement_date=newest,
+            last_full_sweep=(
+                now.isoformat()
+                if plan.full_sweep
+                else (previous.last_full_sweep if previous else None)
+            ),
+            updated_at=now.isoformat(),
+        )
+
+    def commit(self, updates: Dict[str, Watermark]) -> None:
+        """Store watermarks for sources whose pages were all saved, and write the file."""
+        if not updates:
+            return
+        self.watermarks.update(updates)
+        try:
+            self.save()
+        except OSError as e:
+            logger.warning(f"Could not write watermark file {self.path}: {e}")
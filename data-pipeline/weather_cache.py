@@ -0,0 +1,124 @@
+"""
+Spatially de-duplicated weather lookups
+Stations are grouped into coarse lat/lon grid cells so one OpenWeather request serves every
+station in a cell, and observations are cached on disk for a TTL so repeat runs are free
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[float, float]
+
+
+def grid_cell(latitude: float, longitude: float, degrees: float = 0.1) -> Cell:
+    """Centre of the `degrees`-wide grid cell holding a point, used as the lookup key and query."""
+    return (
+        round((math.floor(latitude / degrees) + 0.5) * degrees, 6),
+        round((math.floor(longitude / degrees) + 0.5) * degrees, 6),
+    )
+
+
+class WeatherCache:
+    """JSON file of weather observations per grid cell, each valid for `ttl_seconds`"""
+
+    def __init__(self, path: Optional[str], ttl_seconds: float = 3600.0, degrees: float = 0.1):
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_seconds
+        self.degrees = degrees
+        self.observations: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._write_lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def from_env(cls, default_dir: Path) -> "WeatherCache":
+        """
+        DATA_PIPELINE_WEATHER_CACHE sets the file ("off" keeps it in memory),
+        WEATHER_CACHE_TTL_SECONDS the lifetime (default one hour) and WEATHER_GRID_DEGREES the
+        cell size (default 0.1°).
+        """
+        path = os.getenv("DATA_PIPELINE_WEATHER_CACHE") or str(default_dir / "weather_cache.json")
+        return cls(
+            None if path.lower() == "off" else path,
+            float(os.getenv("WEATHER_CACHE_TTL_SECONDS", "3600")),
+            float(os.getenv("WEATHER_GRID_DEGREES", "0.1")),
+        )
+
+    @staticmethod
+    def _key(cell: Cell) -> str:
+        return f"{cell[0]:.6f},{cell[1]:.6f}"
+
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.observations = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable weather cache {self.path}: {e}")
+            self.observations = {}
+
+    def cell_for(self, latitude: float, longitude: float) -> Cell:
+        return grid_cell(latitude, longitude, self.degrees)
+
+    def get(self, cell: Cell, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The cached observation for a cell, or None when there is none or it has expired."""
+        entry = self.observations.get(self._key(cell))
+        if entry is None:
+            return None
+        if (now if now is not None else time.time()) - entry["fetched_at"] >= self.ttl_seconds:
+            return None
+        return entry["observation"]
+
+    def put(self, cell: Cell, observation: Dict[str, Any], now: Optional[float] = None) -> None:
+        self.observations[self._key(cell)] = {
+            "fetched_at": now if now is not None else time.time(),
+            "observation": observation,
+        }
+        self._dirty = True
+
+    def snapshot(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        A copy of the unexpired observations to write, or None when nothing changed.
+        Taken on the event loop so that write() can run in a thread while put() keeps going.
+        """
+        if self.path is None or not self._dirty:
+            return None
+        now = time.time()
+        self.observations = {
+            key: entry
+            for key, entry in self.observations.items()
+            if now - entry["fetched_at"] < self.ttl_seconds
+        }
+        self._dirty = False
+        return dict(self.observations)
+
+    def write(self, observations: Dict[str, Dict[str, Any]]) -> None:
+        """Write a snapshot; a failed write only costs requests and is retried by the next save."""
+        # Overlapping writes would share the tmp file
+        with self._write_lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(self.path.name + ".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(observations, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not write weather cache {self.path}: {e}")
+                self._dirty = True
+
+    def save(self) -> None:
+        """Write new observations, dropping expired ones."""
+        observations = self.snapshot()
+        if observations is not None:
+            self.write(observations)